@@ -0,0 +1,212 @@
+# Ai_adjust.py - Gọi Gemini AI từ phía server để đề xuất điều chỉnh lương (thay cho việc gọi trực tiếp từ trình duyệt)
+#
+# Một vòng lặp sự kiện (event loop) chạy trên luồng nền giữ một httpx.AsyncClient dùng chung, nên các kết nối
+# HTTP được tái sử dụng giữa các yêu cầu (connection pooling). Mỗi lần gọi có timeout, được thử lại khi gặp lỗi
+# tạm thời, và kết quả được lưu đệm theo hồ sơ + yêu cầu (prompt) đã chuẩn hóa.
+
+import asyncio # Vòng lặp sự kiện cho client HTTP bất đồng bộ
+import concurrent.futures # Future để luồng xử lý yêu cầu Flask chờ kết quả từ vòng lặp nền
+import os # Đọc cấu hình từ biến môi trường
+import re # Trích xuất phần trăm điều chỉnh từ phản hồi của AI
+import threading # Luồng nền chạy vòng lặp sự kiện
+import httpx # Client HTTP bất đồng bộ có connection pooling, timeout
+from Prediction_cache import PredictionCache # Bộ nhớ đệm LRU/TTL (dùng lại cho kết quả điều chỉnh AI)
+
+# Cấu hình (có thể thay đổi qua biến môi trường; GEMINI_API_URL cho phép trỏ tới một server giả lập khi kiểm thử)
+GEMINI_API_URL = os.getenv('GEMINI_API_URL', 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent')
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', '10'))              # Timeout cho mỗi lần gọi API (giây)
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '2'))         # Số lần thử lại khi gặp lỗi tạm thời
+AI_MAX_CONNECTIONS = int(os.getenv('AI_MAX_CONNECTIONS', '20')) # Số kết nối tối đa trong pool
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', '1024'))        # Số kết quả điều chỉnh được lưu đệm (0: tắt)
+AI_CACHE_TTL = float(os.getenv('AI_CACHE_TTL', '3600'))        # Thời gian sống của kết quả lưu đệm (giây)
+
+# Mẫu trích xuất phần trăm điều chỉnh (ví dụ: '+5%', '-2.5%', '0%')
+PERCENTAGE_PATTERN = re.compile(r'([+-]?\d+\.?\d*)%')
+
+# Mã trạng thái HTTP được coi là lỗi tạm thời (nên thử lại)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AiConfigurationError(Exception):
+    """Lỗi cấu hình (ví dụ: thiếu API key) khiến không thể gọi AI."""
+
+
+def parse_adjustment_percentage(text):
+    """Trích xuất phần trăm điều chỉnh đầu tiên trong text; trả về tỷ lệ (ví dụ: 0.05 cho '+5%') hoặc None."""
+    match = PERCENTAGE_PATTERN.search(text or '')
+    if match is None:
+        return None
+    return float(match.group(1)) / 100
+
+
+def normalize_prompt(prompt):
+    """Chuẩn hóa yêu cầu của người dùng (bỏ khoảng trắng thừa, chữ thường) để dùng làm khóa bộ nhớ đệm."""
+    return ' '.join((prompt or '').split()).lower()
+
+
+def build_features_summary(fields):
+    """Tóm tắt hồ sơ nhân viên thành một câu (giống nội dung frontend từng gửi cho AI)."""
+    yes_no = lambda flag: 'Có' if flag else 'Không'
+    return (
+        f"Kinh nghiệm: {fields['experience']:g} năm, Trình độ: {fields['education']}, "
+        f"Chứng chỉ: {yes_no(fields['certificate'])}, Ca đêm: {yes_no(fields['night_shift'])}, "
+        f"Làm thêm: {yes_no(fields['overtime'])}, Chức vụ: {fields['position']}, "
+        f"Loại HĐ: {fields['contract_type']}, Kỹ năng đặc thù: {yes_no(fields['special_skills'])}, "
+        f"Khu vực: {fields['work_area']}, Loại mục tiêu: {fields['client_type']}, "
+        f"Phụ cấp: {fields['allowances_percentage'] * 100:.1f}%"
+    )
+
+
+def build_prompt(fields, user_prompt):
+    """
+    Tạo nội dung gửi cho AI. Prompt không chứa mức lương dự đoán của mô hình ML
+    (AI chỉ đề xuất phần trăm điều chỉnh), nhờ vậy có thể gọi AI song song với dự đoán ML.
+    """
+    return (
+        f"Dựa trên hồ sơ nhân viên sau: {build_features_summary(fields)}. "
+        f"Và yêu cầu cụ thể từ người dùng: '{user_prompt}'. "
+        f"Bạn đề xuất mức lương dự đoán từ mô hình nên được điều chỉnh bao nhiêu phần trăm? "
+        f"Chỉ trả lời bằng một giá trị phần trăm (ví dụ: '+5%', '-2%', '0%'). "
+        f"Nếu không có sự điều chỉnh rõ ràng nào được ngụ ý, hãy trả lời bằng '0%'."
+        f"Ví dụ: +7.5% hoặc -3% hoặc 0% kèm theo lý do ngắn gọn."
+    )
+
+
+def interpret_response(result):
+    """
+    Đọc phản hồi generateContent của Gemini. Trả về (tỷ lệ điều chỉnh, nội dung giải thích, hợp lệ hay không).
+    Phản hồi không hợp lệ hoặc không có phần trăm cho điều chỉnh 0 kèm thông báo (giống logic frontend trước đây).
+    """
+    try:
+        text = result['candidates'][0]['content']['parts'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        error = result.get('error') if isinstance(result, dict) else None
+        if isinstance(error, dict) and error.get('message'):
+            detail = f"Lỗi từ AI: {error['message']}"
+        else:
+            detail = f"Phản hồi: {str(result)[:100]}..." if result else "Cấu trúc phản hồi không hợp lệ."
+        return 0.0, f"Không nhận được phản hồi hợp lệ từ AI. ({detail})", False
+
+    percentage = parse_adjustment_percentage(text)
+    if percentage is None:
+        preview = text[:100] + "..." if len(text) > 100 else text
+        return 0.0, f"AI không đưa ra điều chỉnh rõ ràng từ phản hồi: {preview}", True
+    return percentage, text, True
+
+
+class GeminiAdjuster:
+    def __init__(self, api_key=None, api_url=None, timeout=None, max_retries=None,
+                 max_connections=None, cache_size=None, cache_ttl=None):
+        self.api_key = os.getenv('GEMINI_API_KEY', '') if api_key is None else api_key
+        self.api_url = api_url or GEMINI_API_URL
+        self.timeout = AI_TIMEOUT if timeout is None else timeout
+        self.max_retries = AI_MAX_RETRIES if max_retries is None else max_retries
+        self.max_connections = max_connections or AI_MAX_CONNECTIONS
+        self.cache = PredictionCache(maxsize=AI_CACHE_SIZE if cache_size is None else cache_size,
+                                     ttl=AI_CACHE_TTL if cache_ttl is None else cache_ttl)
+        self._loop = None    # Vòng lặp sự kiện chạy trên luồng nền (tạo lười ở lần gọi đầu tiên)
+        self._client = None  # httpx.AsyncClient dùng chung, thuộc về vòng lặp nền
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.api_key) and self.api_key != 'YOUR_GEMINI_API_KEY_HERE'
+
+    def _ensure_loop(self):
+        """Khởi động vòng lặp sự kiện nền và client HTTP dùng chung (một lần cho mỗi tiến trình)."""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='ai-adjust-loop', daemon=True)
+            thread.start()
+
+            async def create_client():
+                return httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout),
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                )
+            self._client = asyncio.run_coroutine_threadsafe(create_client(), loop).result()
+            self._loop = loop
+            return loop
+
+    def cache_key(self, fields, user_prompt):
+        """Khóa bộ nhớ đệm: toàn bộ các trường của hồ sơ + prompt đã chuẩn hóa."""
+        return (tuple(sorted(fields.items())), normalize_prompt(user_prompt))
+
+    async def adjust(self, fields, user_prompt):
+        """
+        Coroutine gọi Gemini để lấy đề xuất điều chỉnh (phải chạy trên vòng lặp nền của adjuster
+        hoặc vòng lặp sở hữu client). Trả về dict: adjustment_percentage, insight_text, cached.
+        """
+        if not self.configured:
+            raise AiConfigurationError("API Key cho Gemini AI chưa được cung cấp. Vui lòng kiểm tra file .env và khởi động lại server.")
+
+        key = self.cache_key(fields, user_prompt)
+        cached = self.cache.get(key) if self.cache.enabled else None
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        payload = {'contents': [{'role': 'user', 'parts': [{'text': build_prompt(fields, user_prompt)}]}]}
+        response_json = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(self.api_url, params={'key': self.api_key}, json=payload)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    raise httpx.HTTPStatusError("retryable status", request=response.request, response=response)
+                response_json = response.json()
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(0.25 * (2 ** attempt)) # Chờ tăng dần trước khi thử lại
+            except ValueError:
+                response_json = None # Phản hồi không phải JSON
+                break
+
+        percentage, insight_text, valid = interpret_response(response_json)
+        result = {'adjustment_percentage': percentage, 'insight_text': insight_text}
+        if valid and self.cache.enabled:
+            self.cache.put(key, result) # Chỉ lưu đệm phản hồi hợp lệ
+        return {**result, 'cached': False}
+
+    def submit(self, fields, user_prompt):
+        """
+        Bắt đầu gọi AI trên vòng lặp nền và trả về ngay một concurrent.futures.Future,
+        để luồng gọi có thể làm việc khác (ví dụ: dự đoán ML) trong lúc chờ.
+        """
+        if not self.configured:
+            future = concurrent.futures.Future()
+            future.set_exception(AiConfigurationError("API Key cho Gemini AI chưa được cung cấp. Vui lòng kiểm tra file .env và khởi động lại server."))
+            return future
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self.adjust(fields, user_prompt), loop)
+
+    def close(self):
+        """Đóng client HTTP và dừng vòng lặp nền."""
+        with self._lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            self._client = None
+
+
+_adjuster = None
+_adjuster_pid = None
+_adjuster_lock = threading.Lock()
+
+def get_adjuster():
+    """
+    Trả về GeminiAdjuster dùng chung của tiến trình (tạo lười ở lần gọi đầu tiên).
+    Sau khi fork, tiến trình con tạo adjuster mới vì luồng nền của tiến trình cha không tồn tại trong con.
+    """
+    global _adjuster, _adjuster_pid
+    if _adjuster is None or _adjuster_pid != os.getpid():
+        with _adjuster_lock:
+            if _adjuster is None or _adjuster_pid != os.getpid():
+                _adjuster = GeminiAdjuster()
+                _adjuster_pid = os.getpid()
+    return _adjuster
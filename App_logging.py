@@ -0,0 +1,95 @@
+# App_logging.py - Ghi log có cấu trúc (key=value), không chặn luồng xử lý yêu cầu
+#
+# Các bản ghi log được đưa vào hàng đợi (QueueHandler) và một luồng nền (QueueListener) ghi ra stderr,
+# nên luồng xử lý yêu cầu không phải chờ thao tác I/O. Log của từng yêu cầu được lấy mẫu (sampling):
+# chỉ một tỷ lệ nhỏ yêu cầu thành công được ghi lại, còn yêu cầu lỗi hoặc chậm luôn được ghi.
+
+import logging # Thư viện ghi log chuẩn của Python
+import logging.handlers # QueueHandler/QueueListener
+import os # Đọc cấu hình từ biến môi trường, đăng ký hook sau khi fork
+import queue # Hàng đợi không giới hạn giữa luồng xử lý yêu cầu và luồng ghi log
+import random # Lấy mẫu yêu cầu để ghi log
+import sys # Ghi log ra sys.stderr
+import time # Định dạng thời gian trong bản ghi log
+
+# Tên logger gốc của ứng dụng
+LOGGER_NAME = 'salary_app'
+
+# Cấu hình mặc định (có thể thay đổi qua biến môi trường)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01')) # Tỷ lệ yêu cầu thành công được ghi log (0..1)
+LOG_SLOW_MS = float(os.getenv('LOG_SLOW_MS', '500'))          # Yêu cầu chậm hơn ngưỡng này (ms) luôn được ghi log
+
+_listener = None # QueueListener đang chạy của tiến trình hiện tại
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Định dạng bản ghi thành một dòng: thời gian, mức, logger, thông điệp và các trường key=value."""
+
+    def format(self, record):
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))
+        parts = [f"ts={timestamp}.{int(record.msecs):03d}", f"level={record.levelname}",
+                 f"logger={record.name}", f"msg={_quote(record.getMessage())}"]
+        for key, value in getattr(record, 'fields', {}).items():
+            parts.append(f"{key}={_quote(value)}")
+        line = ' '.join(parts)
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def _quote(value):
+    """Đặt giá trị trong ngoặc kép nếu có khoảng trắng hoặc dấu '=' để dòng log vẫn tách được."""
+    text = str(value)
+    if text == '' or any(c in text for c in ' ="\n'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+    return text
+
+
+def _start_listener(handler):
+    """Tạo hàng đợi mới, gắn vào handler và khởi động luồng nền ghi log ra stderr."""
+    global _listener
+    log_queue = queue.SimpleQueue()
+    handler.queue = log_queue
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(KeyValueFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def setup_logging(level=None):
+    """
+    Cấu hình logger của ứng dụng (chỉ thực hiện một lần, các lần gọi sau trả về logger đã có).
+    Luồng ghi log được khởi động lại trong tiến trình con sau khi fork (ví dụ: các worker của gunicorn).
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if getattr(logger, '_queue_configured', False):
+        return logger
+
+    handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _start_listener(handler)
+    logger.addHandler(handler)
+    logger.setLevel(level or LOG_LEVEL)
+    logger.propagate = False
+    logger._queue_configured = True
+
+    # Luồng nền không tồn tại trong tiến trình con sau fork: tạo lại hàng đợi và luồng ghi log
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=lambda: _start_listener(handler))
+    return logger
+
+
+def stop_logging():
+    """Dừng luồng ghi log sau khi đã ghi hết các bản ghi còn trong hàng đợi."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def should_log_request(status_code, duration_ms, sample_rate=None, slow_ms=None):
+    """Quyết định có ghi log cho một yêu cầu hay không: luôn ghi nếu lỗi hoặc chậm, còn lại lấy mẫu ngẫu nhiên."""
+    if status_code >= 400 or duration_ms >= (LOG_SLOW_MS if slow_ms is None else slow_ms):
+        return True
+    rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    return rate > 0 and random.random() < rate
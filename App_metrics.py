@@ -0,0 +1,213 @@
+# App_metrics.py - Đo thời gian từng giai đoạn xử lý và xuất số liệu theo định dạng văn bản của Prometheus
+#
+# - Histogram thời gian theo giai đoạn (đọc JSON, chuyển đổi trường, mã hóa, dự đoán, tạo phản hồi...) với các
+#   ngưỡng (bucket) cố định; mỗi lần ghi chỉ là một phép tìm kiếm nhị phân và một phép cộng dưới khóa.
+# - Bộ đếm yêu cầu theo endpoint và mã trạng thái, histogram thời gian xử lý theo endpoint.
+# - StageTimer: đồng hồ đơn điệu (perf_counter) đánh dấu điểm kết thúc của từng giai đoạn liên tiếp.
+# Tắt bằng METRICS_ENABLED=0: stage_timer() trả về một đối tượng không làm gì và không có gì được ghi.
+# Số liệu được giữ riêng trong từng tiến trình (mỗi worker của gunicorn có số liệu riêng).
+
+import bisect # Tìm bucket của một giá trị đo
+import os # Đọc cấu hình từ biến môi trường
+import threading # Khóa bảo vệ các bộ đếm khi nhiều luồng xử lý yêu cầu cùng lúc
+from time import perf_counter # Đồng hồ đơn điệu độ phân giải cao
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+
+# Tiền tố tên của mọi số liệu
+METRIC_PREFIX = 'salary'
+
+# Ngưỡng (giây) của các histogram: từ 5 µs (tra cứu bộ nhớ đệm) đến 10 s (dự đoán theo lô lớn)
+DEFAULT_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Histogram với các ngưỡng cố định (số đếm từng bucket không cộng dồn, cộng dồn khi xuất)."""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count', '_lock')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Phần tử cuối: lớn hơn mọi ngưỡng (+Inf)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        """(số đếm cộng dồn theo từng ngưỡng kèm +Inf, tổng, số lần đo) tại một thời điểm nhất quán."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.total, self.count
+        cumulative, running = [], 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class StageTimer:
+    """Đo các giai đoạn liên tiếp: mỗi lần mark(stage) ghi thời gian từ lần đánh dấu trước (hoặc lúc tạo)."""
+
+    __slots__ = ('_registry', '_last')
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._last = perf_counter()
+
+    def mark(self, stage):
+        now = perf_counter()
+        self._registry.observe_stage(stage, now - self._last)
+        self._last = now
+
+
+class _NullTimer:
+    """Đồng hồ khi số liệu bị tắt: không đo, không ghi."""
+
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._stages = {}      # giai đoạn -> Histogram
+        self._durations = {}   # endpoint -> Histogram thời gian xử lý toàn bộ yêu cầu
+        self._requests = {}    # (endpoint, mã trạng thái) -> số yêu cầu
+        self._histograms = {}  # tên -> (mô tả, Histogram) của các histogram riêng (register_histogram)
+        self._gauge_sources = [] # Hàm trả về thêm gauges lúc xuất (thành phần tự đăng ký, ví dụ pool của Asgi_app)
+        self._lock = threading.Lock()
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe_stage(self, stage, seconds):
+        self._histogram(self._stages, stage).observe(seconds)
+
+    def observe_request(self, endpoint, status, seconds):
+        """Ghi một yêu cầu đã xử lý xong: tăng bộ đếm theo (endpoint, mã trạng thái) và ghi thời gian xử lý."""
+        key = (endpoint, status)
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+        self._histogram(self._durations, endpoint).observe(seconds)
+
+    def register_histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """Đăng ký một histogram không nhãn với ngưỡng riêng (ví dụ: số dòng mỗi lô), ghi bằng observe(name, value)."""
+        with self._lock:
+            self._histograms.setdefault(name, (help_text, Histogram(buckets)))
+
+    def observe(self, name, value):
+        self._histograms[name][1].observe(value)
+
+    def add_gauge_source(self, source):
+        """Đăng ký source(): trả về danh sách gauges (cùng dạng tham số gauges của render) mỗi lần xuất."""
+        with self._lock:
+            self._gauge_sources.append(source)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._durations.clear()
+            self._requests.clear()
+            for name, (help_text, histogram) in self._histograms.items():
+                self._histograms[name] = (help_text, Histogram(histogram.buckets))
+
+    def render(self, gauges=None):
+        """
+        Xuất mọi số liệu theo định dạng văn bản của Prometheus (phiên bản 0.0.4).
+        gauges: danh sách (tên, mô tả, kiểu 'gauge'/'counter', {nhãn: giá trị} hoặc None, giá trị) do ứng dụng
+                cung cấp tại thời điểm xuất (ví dụ: phiên bản mô hình, thống kê bộ nhớ đệm).
+        """
+        lines = []
+        self._render_histograms(lines, f"{METRIC_PREFIX}_stage_duration_seconds",
+                                "Thời gian của từng giai đoạn xử lý dự đoán", 'stage', self._stages)
+        self._render_histograms(lines, f"{METRIC_PREFIX}_http_request_duration_seconds",
+                                "Thời gian xử lý yêu cầu HTTP theo endpoint", 'endpoint', self._durations)
+
+        for key, (help_text, histogram) in sorted(self._histograms.items()):
+            name = f"{METRIC_PREFIX}_{key}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            _render_histogram(lines, name, '', histogram)
+
+        name = f"{METRIC_PREFIX}_http_requests_total"
+        lines.append(f"# HELP {name} Số yêu cầu HTTP theo endpoint và mã trạng thái")
+        lines.append(f"# TYPE {name} counter")
+        with self._lock:
+            requests = sorted(self._requests.items())
+        for (endpoint, status), count in requests:
+            lines.append(f'{name}{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+        gauges = list(gauges or ())
+        for source in list(self._gauge_sources):
+            gauges.extend(source())
+        seen = set()
+        for name, help_text, kind, labels, value in gauges:
+            full_name = f"{METRIC_PREFIX}_{name}"
+            if full_name not in seen:
+                seen.add(full_name)
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+            if value is not None:
+                lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines, name, help_text, label, table):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in sorted(table.items()):
+            _render_histogram(lines, name, f'{label}="{_escape(key)}"', histogram)
+
+
+def _render_histogram(lines, name, labels, histogram):
+    """Các dòng _bucket/_sum/_count của một histogram; labels: chuỗi nhãn đã định dạng (có thể rỗng)."""
+    cumulative, total, count = histogram.snapshot()
+    prefix = labels + ',' if labels else ''
+    for bound, bucket_count in zip(histogram.buckets, cumulative):
+        lines.append(f'{name}_bucket{{{prefix}le="{_number(bound)}"}} {bucket_count}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative[-1]}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {_number(total)}')
+    lines.append(f'{name}_count{suffix} {count}')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if not isinstance(value, int) or isinstance(value, bool) else str(value)
+
+
+# Bộ số liệu dùng chung của tiến trình
+metrics = MetricsRegistry()
+
+
+def stage_timer():
+    """Đồng hồ đo các giai đoạn của một lần xử lý (đối tượng không làm gì nếu METRICS_ENABLED=0)."""
+    if METRICS_ENABLED:
+        return StageTimer(metrics)
+    return _NULL_TIMER
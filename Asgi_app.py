@@ -0,0 +1,276 @@
+# Asgi_app.py - Chế độ phục vụ ASGI (uvicorn): dự đoán không giữ luồng worker, có giới hạn hàng đợi
+#
+# - /predict, /predict/batch, /predict/ai-adjust (POST) được xử lý trực tiếp trên vòng lặp sự kiện:
+#   phần tính toán (kiểm tra, mã hóa, model.predict, tạo JSON) chạy trong một pool luồng có giới hạn,
+#   lời gọi Gemini AI (I/O) được await, nên một yêu cầu chậm không chiếm một luồng trong lúc chờ.
+# - Kiểm soát quá tải (backpressure): khi số công việc đang chờ + đang chạy trong pool đạt ASGI_MAX_PENDING,
+#   hoặc một công việc đã chờ quá ASGI_QUEUE_TIMEOUT giây mới tới lượt, yêu cầu bị từ chối ngay bằng 503
+#   (kèm Retry-After) thay vì xếp hàng đến khi client hết thời gian chờ.
+# - Mọi đường dẫn khác (trang chủ, file tĩnh, /api/*, /admin/*, /healthz, /metrics...) được chuyển cho ứng dụng
+#   Flask qua bộ chuyển đổi WSGI -> ASGI của asgiref, nên hành vi không đổi.
+# Nội dung phản hồi và thông báo lỗi giống hệt các view Flask tương ứng (dùng chung các hàm dựng kết quả của Main).
+# Chạy (thay cho gunicorn): python Asgi_app.py, hoặc uvicorn Asgi_app:app --host 0.0.0.0 --port 5000 --workers 4
+# Mỗi worker của uvicorn là một tiến trình tự tải mô hình (không có preload/copy-on-write như gunicorn).
+
+import asyncio
+import os
+import sys
+import threading # Khóa bộ đếm số yêu cầu bị từ chối (tăng từ cả vòng lặp sự kiện và luồng của pool)
+import time # Đo thời gian xử lý và thời gian chờ trong hàng đợi
+import uuid # Tạo mã định danh (request ID) cho từng yêu cầu
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.wsgi import WsgiToAsgi # Chạy ứng dụng Flask (WSGI) dưới server ASGI
+
+import Main
+from Main import app as flask_app, prediction_engine, logger, init_model, start_retrain_scheduler
+from App_logging import should_log_request
+from App_metrics import metrics, METRICS_ENABLED
+from Ai_adjust import get_adjuster, AiConfigurationError
+
+# Số luồng tính toán dự đoán (mặc định: số lõi CPU)
+ASGI_PREDICT_THREADS = int(os.getenv('ASGI_PREDICT_THREADS', str(os.cpu_count() or 1)))
+# Số công việc dự đoán tối đa (đang chờ + đang chạy) trong một tiến trình; vượt quá thì trả 503 ngay
+ASGI_MAX_PENDING = int(os.getenv('ASGI_MAX_PENDING', str(ASGI_PREDICT_THREADS * 16)))
+# Thời gian chờ tối đa trong hàng đợi (giây): công việc tới lượt muộn hơn thì bị bỏ (client có lẽ đã bỏ cuộc)
+ASGI_QUEUE_TIMEOUT = float(os.getenv('ASGI_QUEUE_TIMEOUT', '5'))
+# Số kết nối đồng thời tối đa của uvicorn (0: không giới hạn); vượt quá thì uvicorn trả 503 trước khi đọc yêu cầu
+ASGI_LIMIT_CONCURRENCY = int(os.getenv('ASGI_LIMIT_CONCURRENCY', '0'))
+
+OVERLOADED_MESSAGE = "Máy chủ đang quá tải, vui lòng thử lại sau."
+
+
+class Overloaded(Exception):
+    """Pool dự đoán đã đầy hoặc công việc chờ quá lâu: yêu cầu bị từ chối (503)."""
+
+
+class BoundedExecutor:
+    """
+    Pool luồng có giới hạn số công việc đang chờ + đang chạy. run() chỉ được gọi từ vòng lặp sự kiện,
+    nên bộ đếm pending không cần khóa.
+    """
+
+    def __init__(self, workers=ASGI_PREDICT_THREADS, max_pending=ASGI_MAX_PENDING, queue_timeout=ASGI_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.pending = 0
+        self.rejected = {'queue_full': 0, 'queue_timeout': 0} # Số công việc bị từ chối theo lý do
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='predict')
+        self._lock = threading.Lock()
+
+    def _reject(self, reason):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise Overloaded(reason)
+
+    def _call(self, enqueued, fn, args):
+        # Chạy trong luồng của pool: bỏ công việc đã chờ quá lâu thay vì làm một việc không còn ai đợi
+        if time.perf_counter() - enqueued > self.queue_timeout:
+            self._reject('queue_timeout')
+        return fn(*args)
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self._reject('queue_full')
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._call, time.perf_counter(), fn, args)
+        finally:
+            self.pending -= 1
+
+    def gauges(self):
+        """Gauges cho /metrics (App_metrics.add_gauge_source)."""
+        gauges = [
+            ('asgi_predict_pending', "Số công việc dự đoán đang chờ hoặc đang chạy trong pool", 'gauge', None, self.pending),
+            ('asgi_predict_max_pending', "Giới hạn số công việc dự đoán đang chờ hoặc đang chạy", 'gauge', None,
+             self.max_pending),
+            ('asgi_predict_threads', "Số luồng của pool dự đoán", 'gauge', None, self.workers),
+        ]
+        with self._lock:
+            rejected = dict(self.rejected)
+        for reason, count in rejected.items():
+            gauges.append(('asgi_rejected_total', "Số yêu cầu bị từ chối vì quá tải (503)", 'counter',
+                           {'reason': reason}, count))
+        return gauges
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Pool dự đoán dùng chung của tiến trình
+predict_pool = BoundedExecutor()
+
+
+# --- Các endpoint xử lý trực tiếp (cùng nội dung phản hồi với view Flask tương ứng) ---
+
+def _predict_job(data):
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON format. Expected a JSON object.")
+    fields, predicted_salary = prediction_engine.predict_record(data)
+    return _json_body(Main.prediction_result(fields, predicted_salary))
+
+
+def _batch_job(data):
+    records = Main.batch_records(data)
+    return _json_body(Main.batch_result(prediction_engine.predict_batch(records)))
+
+
+async def predict(data):
+    return 200, await predict_pool.run(_predict_job, data)
+
+
+async def predict_batch(data):
+    return 200, await predict_pool.run(_batch_job, data)
+
+
+async def predict_ai_adjust(data):
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON format. Expected a JSON object.")
+    # Kiểm tra đầy đủ (cả phạm vi và danh mục) trước khi gọi AI, như view Flask
+    snapshot, fields, features = prediction_engine.encode_record(data)
+    ai_prompt = str(data.get('ai_prompt') or '').strip()
+
+    # Bắt đầu gọi AI (trên vòng lặp nền của Ai_adjust), dự đoán ML trong pool, rồi await kết quả AI
+    adjustment_future = get_adjuster().submit(fields, ai_prompt) if ai_prompt else None
+    try:
+        predicted_salary_ml = await predict_pool.run(prediction_engine.predict_encoded, snapshot, features)
+    except BaseException:
+        if adjustment_future is not None:
+            adjustment_future.cancel()
+        raise
+    adjustment = Main.NO_AI_ADJUSTMENT
+    if adjustment_future is not None:
+        adjustment = await asyncio.wrap_future(adjustment_future)
+    return 200, _json_body(Main.ai_adjust_result(fields, ai_prompt, predicted_salary_ml, adjustment))
+
+
+# Đường dẫn (POST) -> (tên endpoint như của Flask, hàm xử lý, thông báo lỗi chung, mã trạng thái của lỗi chung)
+ROUTES = {
+    '/predict': ('predict', predict, "Đã xảy ra lỗi trong quá trình dự đoán", 500),
+    '/predict/batch': ('predict_batch', predict_batch, "Đã xảy ra lỗi trong quá trình dự đoán", 500),
+    '/predict/ai-adjust': ('predict_ai_adjust', predict_ai_adjust,
+                           "Đã xảy ra lỗi trong quá trình điều chỉnh lương bằng AI", 502),
+}
+
+
+def _json_body(obj):
+    return flask_app.json.dumps(obj).encode('utf-8') # orjson nếu đã cài (Request_schema.json_provider)
+
+
+def _error_body(message):
+    return _json_body({'success': False, 'error': message})
+
+
+def _is_json(content_type):
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _handle(scope, receive, send, route):
+    endpoint, handler, error_message, error_status = route
+    start = time.perf_counter()
+    headers = {key.decode('latin-1'): value.decode('latin-1') for key, value in scope['headers']}
+    request_id = headers.get('x-request-id') or uuid.uuid4().hex[:16]
+    body = await _read_body(receive)
+    if body is None: # Client đã ngắt kết nối
+        return
+
+    extra_headers = []
+    try:
+        if not _is_json(headers.get('content-type', '')):
+            raise ValueError("Invalid Content-Type. Expected application/json.")
+        try:
+            data = flask_app.json.loads(body)
+        except ValueError: # JSONDecodeError (json, orjson), UnicodeDecodeError: cùng thông báo với Main.request_json
+            raise ValueError("Invalid JSON format. Expected a JSON object.") from None
+        if not prediction_engine.is_trained:
+            await predict_pool.run(init_model) # Như Main.ensure_model: chỉ tốn chi phí ở yêu cầu đầu tiên
+        status, payload = await handler(data)
+    except Overloaded:
+        status, payload = 503, _error_body(OVERLOADED_MESSAGE)
+        extra_headers.append((b'retry-after', b'1'))
+    except (ValueError, TypeError) as e:
+        status, payload = 400, _error_body(f"Dữ liệu đầu vào không hợp lệ: {e}")
+    except AiConfigurationError as e:
+        status, payload = 503, _error_body(str(e))
+    except Exception as e:
+        logger.exception("ASGI prediction error", extra={'fields': {'request_id': request_id, 'endpoint': endpoint}})
+        status, payload = error_status, _error_body(f"{error_message}: {e}")
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode()),
+        (b'x-request-id', request_id.encode('latin-1')),
+        *extra_headers,
+    ]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+    # Số liệu và log có cấu trúc giống Main.log_request
+    duration_ms = (time.perf_counter() - start) * 1000
+    if METRICS_ENABLED:
+        metrics.observe_request(endpoint, status, duration_ms / 1000)
+    if should_log_request(status, duration_ms):
+        fields = {
+            'request_id': request_id,
+            'method': scope['method'],
+            'path': scope['path'],
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+            'content_type': headers.get('content-type'),
+            'content_length': len(body),
+        }
+        if status >= 400:
+            fields['body_fields'] = Main.request_field_names(body) # Như Main.log_request: không ghi nội dung yêu cầu
+        logger.info('request', extra={'fields': fields})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Tải/huấn luyện mô hình trước khi nhận yêu cầu (uvicorn chỉ mở cổng sau bước này)
+            await asyncio.get_running_loop().run_in_executor(None, init_model)
+            start_retrain_scheduler()
+            metrics.add_gauge_source(predict_pool.gauges)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            predict_pool.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+_flask_asgi = WsgiToAsgi(flask_app)
+
+
+async def app(scope, receive, send):
+    """Ứng dụng ASGI: các endpoint dự đoán xử lý trực tiếp, còn lại chuyển cho Flask."""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'POST':
+        route = ROUTES.get(scope['path'])
+        if route is not None:
+            return await _handle(scope, receive, send, route)
+    return await _flask_asgi(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # Cùng biến môi trường với gunicorn.conf.py: BIND (host:port), WEB_CONCURRENCY (số tiến trình worker)
+    host, _, port = os.getenv('BIND', '0.0.0.0:5000').rpartition(':')
+    workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+    print(f"🚀 Khởi động ứng dụng (ASGI, {workers} worker x {ASGI_PREDICT_THREADS} luồng dự đoán)...", file=sys.stderr)
+    uvicorn.run('Asgi_app:app', host=host or '0.0.0.0', port=int(port), workers=workers,
+                limit_concurrency=ASGI_LIMIT_CONCURRENCY or None, log_level='warning')
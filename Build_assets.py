@@ -0,0 +1,208 @@
+# Build_assets.py - Bước build giao diện: biên dịch sẵn CSS (Tailwind) và JavaScript thành các file tĩnh có phiên bản
+#
+# Nguồn nằm trong static/src (app.css, app.js, tailwind.config.js), kết quả được ghi vào static/dist:
+# - app.<mã băm>.css: Tailwind CLI chỉ sinh các lớp tiện ích thật sự được dùng trong templates/ và app.js, đã rút gọn
+#   (trình duyệt không còn phải tải Tailwind CDN và biên dịch CSS trước khi hiển thị trang)
+# - app.<mã băm>.js: JavaScript đã bỏ chú thích và khoảng trắng thừa
+# - Bản nén sẵn .gz (và .br nếu cài gói brotli) của từng file, để Flask gửi thẳng mà không phải nén lúc phục vụ
+# - manifest.json: tên logic -> tên file có mã băm; Main.py đọc file này khi khởi động để dựng thẻ <link>/<script>
+# Tên file chứa mã băm nội dung nên mỗi nội dung mới có URL mới, cho phép cache vĩnh viễn (immutable).
+# Chạy từ thư mục gốc của dự án sau mỗi lần sửa giao diện (hoặc trong bước build của bản triển khai):
+#     python Build_assets.py
+# Cần Tailwind CLI: file thực thi độc lập (standalone) "tailwindcss" trong PATH, hoặc Node.js (npx tailwindcss@3);
+# có thể chỉ định lệnh bằng biến môi trường TAILWIND_CLI, ví dụ TAILWIND_CLI="/opt/tailwindcss-linux-x64".
+
+import argparse # Đọc tham số dòng lệnh
+import gzip # Bản nén sẵn .gz
+import hashlib # Mã băm nội dung cho tên file
+import json
+import os
+import shlex # Tách lệnh Tailwind CLI trong biến môi trường
+import shutil # Tìm file thực thi Tailwind CLI trong PATH
+import subprocess # Chạy Tailwind CLI
+import sys
+
+try:
+    import brotli # Tùy chọn: bản nén sẵn .br (nhỏ hơn gzip khoảng 15-20% với CSS/JS)
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'static', 'src')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_FILE = 'manifest.json'
+
+# Các định dạng nén sẵn: (tên trong Accept-Encoding/Content-Encoding, đuôi file), theo thứ tự ưu tiên khi phục vụ
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Bản nén sẵn chỉ được giữ lại nếu nhỏ hơn bản gốc ít nhất chừng này byte
+MIN_COMPRESSION_SAVING = 256
+
+# Thời gian tối đa cho một lần chạy Tailwind CLI (giây); lần đầu dùng npx còn phải tải gói về
+TAILWIND_TIMEOUT = int(os.getenv('TAILWIND_TIMEOUT', '300'))
+
+# Phiên bản Tailwind dùng qua npx khi không có file thực thi độc lập (khớp với cú pháp của static/src/app.css)
+TAILWIND_NPX_PACKAGE = 'tailwindcss@3'
+
+
+def tailwind_command():
+    """Lệnh chạy Tailwind CLI: TAILWIND_CLI, rồi "tailwindcss" trong PATH, rồi npx; None nếu không có cách nào."""
+    configured = os.getenv('TAILWIND_CLI')
+    if configured:
+        return shlex.split(configured)
+    standalone = shutil.which('tailwindcss')
+    if standalone:
+        return [standalone]
+    npx = shutil.which('npx')
+    if npx:
+        return [npx, '--yes', TAILWIND_NPX_PACKAGE]
+    return None
+
+
+def build_css():
+    """Biên dịch static/src/app.css bằng Tailwind CLI (chỉ các lớp được dùng, đã rút gọn); trả về bytes."""
+    command = tailwind_command()
+    if command is None:
+        raise RuntimeError("Không tìm thấy Tailwind CLI: cài file thực thi 'tailwindcss' vào PATH, cài Node.js (npx) "
+                           "hoặc đặt biến môi trường TAILWIND_CLI")
+    command = command + ['--config', os.path.join(SOURCE_DIR, 'tailwind.config.js'),
+                         '--input', os.path.join(SOURCE_DIR, 'app.css'), '--minify']
+    # Chạy từ thư mục gốc: các đường dẫn "content" trong tailwind.config.js được tính từ thư mục hiện tại
+    try:
+        result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, timeout=TAILWIND_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Tailwind CLI không chạy xong sau {TAILWIND_TIMEOUT} giây: {' '.join(command)}")
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"Tailwind CLI lỗi (mã {result.returncode}): "
+                           f"{result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+def minify_js(source):
+    """
+    Rút gọn JavaScript một cách thận trọng: bỏ chú thích, khoảng trắng đầu/cuối dòng và dòng trống.
+    Nội dung chuỗi ('...', "...", `...`) được giữ nguyên; vẫn giữ xuống dòng giữa các câu lệnh để không
+    phụ thuộc vào việc tự chèn dấu chấm phẩy. Không hỗ trợ biểu thức chính quy dạng /.../ (app.js không dùng).
+    """
+    out = []
+    line = []
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch in '\'"`':
+            # Chép nguyên chuỗi, kể cả ký tự thoát và xuống dòng bên trong template literal
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == '\\' else 1
+            line.append(source[i:j + 1])
+            i = j + 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif ch == '\n':
+            text = ''.join(line).strip()
+            if text:
+                out.append(text)
+            line = []
+            i += 1
+        else:
+            line.append(ch)
+            i += 1
+    text = ''.join(line).strip()
+    if text:
+        out.append(text)
+    return ('\n'.join(out) + '\n').encode('utf-8')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write_asset(name, data, dist_dir=DIST_DIR):
+    """Ghi file name (ví dụ app.css) thành <tên>.<mã băm>.<đuôi> kèm các bản nén sẵn; trả về tên file đã ghi."""
+    stem, ext = os.path.splitext(name)
+    filename = f"{stem}.{content_hash(data)}{ext}"
+    path = os.path.join(dist_dir, filename)
+    with open(path, 'wb') as f:
+        f.write(data)
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)} # mtime=0: cùng nội dung cho cùng bản nén
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        compressed = variants.get(encoding)
+        if compressed is not None and len(compressed) + MIN_COMPRESSION_SAVING <= len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+    return filename
+
+
+def build(dist_dir=DIST_DIR):
+    """
+    Build toàn bộ giao diện vào dist_dir; trả về manifest (tên logic -> tên file có mã băm).
+    File của các lần build trước không bị xóa: server đang chạy (đã đọc manifest cũ) vẫn phục vụ được chúng.
+    """
+    css = build_css()
+    with open(os.path.join(SOURCE_DIR, 'app.js'), encoding='utf-8') as f:
+        js = minify_js(f.read())
+
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {'app.css': write_asset('app.css', css, dist_dir),
+                'app.js': write_asset('app.js', js, dist_dir)}
+    path = os.path.join(dist_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path) # Thay thế nguyên tử: server khởi động cùng lúc không đọc phải manifest dở dang
+    return manifest
+
+
+class AssetManifest:
+    """
+    URL của các file giao diện cho template. Nếu đã build (có static/dist/manifest.json): URL của file có mã băm
+    trong static/dist; nếu chưa: URL của file nguồn trong static/src (template khi đó dùng thêm Tailwind CDN).
+    """
+
+    def __init__(self, files=None, static_url='/static'):
+        self.files = files or {}
+        self.built = bool(self.files)
+        self.static_url = static_url
+
+    @classmethod
+    def load(cls, dist_dir=DIST_DIR, static_url='/static'):
+        try:
+            with open(os.path.join(dist_dir, MANIFEST_FILE), encoding='utf-8') as f:
+                return cls(json.load(f), static_url)
+        except FileNotFoundError:
+            return cls(None, static_url)
+
+    def url(self, name):
+        if self.built:
+            return f"{self.static_url}/dist/{self.files[name]}"
+        return f"{self.static_url}/src/{name}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build giao diện: CSS/JS biên dịch sẵn, có mã băm và bản nén sẵn")
+    parser.add_argument('--output', default=DIST_DIR, help="Thư mục kết quả (mặc định: static/dist)")
+    args = parser.parse_args()
+
+    try:
+        manifest = build(args.output)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    for name, filename in manifest.items():
+        path = os.path.join(args.output, filename)
+        sizes = [f"{os.path.getsize(path):,} B"]
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if os.path.exists(path + suffix):
+                sizes.append(f"{encoding} {os.path.getsize(path + suffix):,} B")
+        print(f"✅ {name} -> {filename} ({', '.join(sizes)})")
+    if brotli is None:
+        print("ℹ️ Chưa cài gói brotli: chỉ tạo bản nén sẵn .gz", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,33 +3,50 @@
 # Tái nhập các thư viện cần thiết để đảm bảo môi trường chạy lại sạch
 import pandas as pd # Thư viện mạnh mẽ để xử lý và phân tích dữ liệu dạng bảng (DataFrame)
 import numpy as np  # Thư viện cơ bản cho các phép toán số học trên mảng và ma trận, cũng như tạo số ngẫu nhiên
+import hashlib # Băm các tham số tạo dữ liệu để nhận biết mô hình đã lưu có còn khớp với dữ liệu hay không
+import json # Chuẩn hóa các tham số thành chuỗi trước khi băm
+import threading # Khóa để đảm bảo bộ dữ liệu chỉ được tạo một lần khi nhiều luồng truy cập cùng lúc
+import os # Đọc số dòng dữ liệu huấn luyện từ biến môi trường
 
-# Thiết lập seed cho trình tạo số ngẫu nhiên để đảm bảo rằng kết quả có thể lặp lại
-# Khi sử dụng cùng một seed, mỗi lần chạy script sẽ tạo ra cùng một bộ dữ liệu ngẫu nhiên
-np.random.seed(42)
+# Tham số mặc định để tạo bộ dữ liệu huấn luyện
+# Khi sử dụng cùng một seed, mỗi lần chạy sẽ tạo ra cùng một bộ dữ liệu ngẫu nhiên
+DEFAULT_N_SAMPLES = int(os.getenv('TRAIN_ROWS', '300')) # Số dòng dữ liệu huấn luyện (biến môi trường TRAIN_ROWS)
+DEFAULT_SEED = 42
+
+# Bộ dữ liệu lớn được sinh theo từng khối DATASET_CHUNK_ROWS dòng, mỗi khối có luồng số ngẫu nhiên riêng,
+# nên có thể sinh (và huấn luyện) từng khối độc lập, song song, mà không cần giữ toàn bộ dữ liệu trong RAM.
+# Đây là một phần định nghĩa của bộ dữ liệu: thay đổi giá trị này sẽ tạo ra dữ liệu khác với cùng seed.
+DATASET_CHUNK_ROWS = 1_000_000
+
+# Phiên bản của bộ sinh dữ liệu: tăng giá trị này mỗi khi công thức lương hoặc phân phối thay đổi
+# để các mô hình đã lưu trước đó bị coi là lỗi thời và được huấn luyện lại
+GENERATOR_VERSION = 1
 
 # Định nghĩa hàm để tạo một mẫu dữ liệu lương ngẫu nhiên cho một cá nhân
-def generate_sample():
+# rng: np.random.Generator dùng để sinh số ngẫu nhiên (None: tạo Generator mới, không dùng RNG toàn cục)
+def generate_sample(rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
     # Các yếu tố đã có từ trước (Đặc trưng cơ bản của nhân viên)
-    exp = np.random.randint(0, 11)  # 'Kinh nghiệm': số năm kinh nghiệm (0-10)
-    edu = np.random.choice(['THCS', 'THPT', 'CĐ', 'ĐH']) # 'Trình độ': THCS, THPT, CĐ (Cao đẳng), ĐH (Đại học)
-    cert = np.random.choice([0, 1])  # 'Chứng chỉ': 0 (không có), 1 (có)
-    night = np.random.choice([0, 1])  # 'Ca đêm': 0 (không), 1 (có)
-    overtime = np.random.choice([0, 1])  # 'Làm thêm': 0 (không có), 1 (có)
+    exp = rng.integers(0, 11)  # 'Kinh nghiệm': số năm kinh nghiệm (0-10)
+    edu = rng.choice(['THCS', 'THPT', 'CĐ', 'ĐH']) # 'Trình độ': THCS, THPT, CĐ (Cao đẳng), ĐH (Đại học)
+    cert = rng.choice([0, 1])  # 'Chứng chỉ': 0 (không có), 1 (có)
+    night = rng.choice([0, 1])  # 'Ca đêm': 0 (không), 1 (có)
+    overtime = rng.choice([0, 1])  # 'Làm thêm': 0 (không có), 1 (có)
 
     # --- Bổ sung các yếu tố mới dựa trên phân tích hình ảnh (Đặc trưng bổ sung) ---
     # 6. Chức vụ: 'Nhân viên', 'Tổ trưởng', 'Đội trưởng' với xác suất tương ứng để tạo phân phối thực tế hơn
-    position = np.random.choice(['Nhân viên', 'Tổ trưởng', 'Đội trưởng'], p=[0.7, 0.2, 0.1])
+    position = rng.choice(['Nhân viên', 'Tổ trưởng', 'Đội trưởng'], p=[0.7, 0.2, 0.1])
     # 7. Loại hợp đồng: 'Thời vụ', 'Chính thức'
-    contract_type = np.random.choice(['Thời vụ', 'Chính thức'])
+    contract_type = rng.choice(['Thời vụ', 'Chính thức'])
     # 8. Kỹ năng đặc thù (0: Không, 1: Có) - Ví dụ: Kỹ năng võ thuật, PCCC, sơ cứu...
-    special_skills = np.random.choice([0, 1])
+    special_skills = rng.choice([0, 1])
     # 9. Khu vực làm việc (dựa trên vùng lương tối thiểu ở Việt Nam để tạo sự đa dạng)
-    work_area = np.random.choice(['Vùng I (TP.HCM, Hà Nội)', 'Vùng II (TP. Đà Nẵng, Hải Phòng)', 'Vùng III (TP. Buôn Ma Thuột, Huế)', 'Vùng IV (Nông thôn)'])
+    work_area = rng.choice(['Vùng I (TP.HCM, Hà Nội)', 'Vùng II (TP. Đà Nẵng, Hải Phòng)', 'Vùng III (TP. Buôn Ma Thuột, Huế)', 'Vùng IV (Nông thôn)'])
     # 10. Loại hình mục tiêu (khách hàng/địa điểm làm việc) - Ảnh hưởng đến tính chất công việc và mức lương
-    client_type = np.random.choice(['Ngân hàng', 'Khách sạn 5 sao', 'Trường học', 'Nhà máy', 'VIP'])
+    client_type = rng.choice(['Ngân hàng', 'Khách sạn 5 sao', 'Trường học', 'Nhà máy', 'VIP'])
     # 11. Phụ cấp, phúc lợi công ty (tỷ lệ phần trăm trên lương cơ bản) - Mô phỏng các khoản phúc lợi khác
-    allowances_percentage = np.random.uniform(0.0, 0.30) # Từ 0% đến 30%
+    allowances_percentage = rng.uniform(0.0, 0.30) # Từ 0% đến 30%
 
     # --- Tính toán lương cơ bản ban đầu dựa trên Khu vực làm việc (tương ứng lương tối thiểu vùng) ---
     # Đây là điểm khởi đầu cho việc tính toán lương, phản ánh chi phí sinh hoạt và quy định vùng
@@ -64,9 +81,9 @@ def generate_sample():
 
     # 6. Chức vụ: Áp dụng tỷ lệ tăng lương dựa trên chức vụ (có một khoảng ngẫu nhiên để tăng tính đa dạng)
     if position == 'Tổ trưởng':
-        current_salary *= np.random.uniform(1.10, 1.15) # Tổ trưởng: tăng từ 10-15%
+        current_salary *= rng.uniform(1.10, 1.15) # Tổ trưởng: tăng từ 10-15%
     elif position == 'Đội trưởng':
-        current_salary *= np.random.uniform(1.20, 1.30) # Đội trưởng: tăng từ 20-30%
+        current_salary *= rng.uniform(1.20, 1.30) # Đội trưởng: tăng từ 20-30%
 
     # 7. Loại hợp đồng: Hợp đồng thời vụ có thể có lương thấp hơn hợp đồng chính thức
     if contract_type == 'Thời vụ':
@@ -74,7 +91,7 @@ def generate_sample():
 
     # 8. Kỹ năng đặc thù: Cộng thêm một khoản tiền cố định nếu có kỹ năng đặc biệt
     if special_skills:
-        current_salary += np.random.uniform(2_000_000, 5_000_000) # Thêm 2-5 triệu VND
+        current_salary += rng.uniform(2_000_000, 5_000_000) # Thêm 2-5 triệu VND
 
     # 10. Loại hình mục tiêu (khách hàng/địa điểm làm việc): Lương có thể cao hơn tùy loại mục tiêu
     if client_type == 'Ngân hàng':
@@ -99,19 +116,286 @@ def generate_sample():
     return [exp, edu, cert, night, overtime, position, contract_type,
             special_skills, work_area, client_type, allowances_percentage, current_salary]
 
-# Tạo một danh sách gồm 300 mẫu dữ liệu (có thể tăng lên để có nhiều dữ liệu hơn cho mô hình học)
-data = [generate_sample() for _ in range(300)]
-# Chuyển đổi danh sách dữ liệu này thành một DataFrame của pandas với các tên cột rõ ràng
-df_data = pd.DataFrame(data, columns=[
+# --- Bảng tra cứu (lookup tables) dùng cho bộ sinh dữ liệu vector hóa ---
+# Thứ tự các mức trong mỗi danh sách phải khớp với generate_sample() để giữ nguyên phân phối
+EDUCATION_LEVELS = np.array(['THCS', 'THPT', 'CĐ', 'ĐH'], dtype=object)
+EDUCATION_MULTIPLIERS = np.array([1.0, 1.0, 1.10, 1.15])  # THCS, THPT: không đổi; CĐ: +10%; ĐH: +15%
+
+POSITION_LEVELS = np.array(['Nhân viên', 'Tổ trưởng', 'Đội trưởng'], dtype=object)
+POSITION_PROBABILITIES = [0.7, 0.2, 0.1]
+# Khoảng hệ số ngẫu nhiên [thấp, cao) cho từng chức vụ (Nhân viên: luôn bằng 1)
+POSITION_MULTIPLIER_LOW = np.array([1.0, 1.10, 1.20])
+POSITION_MULTIPLIER_HIGH = np.array([1.0, 1.15, 1.30])
+
+CONTRACT_TYPES = np.array(['Thời vụ', 'Chính thức'], dtype=object)
+CONTRACT_MULTIPLIERS = np.array([0.80, 1.0])  # Thời vụ: giảm 20%
+
+WORK_AREAS = np.array(['Vùng I (TP.HCM, Hà Nội)', 'Vùng II (TP. Đà Nẵng, Hải Phòng)',
+                       'Vùng III (TP. Buôn Ma Thuột, Huế)', 'Vùng IV (Nông thôn)'], dtype=object)
+REGIONAL_BASE_SALARIES = np.array([5_000_000, 4_500_000, 4_000_000, 3_500_000], dtype=np.float64)
+
+CLIENT_TYPES = np.array(['Ngân hàng', 'Khách sạn 5 sao', 'Trường học', 'Nhà máy', 'VIP'], dtype=object)
+CLIENT_MULTIPLIERS = np.array([1.08, 1.05, 1.0, 1.0, 1.15])
+
+# Tên các cột của bộ dữ liệu (dùng chung cho cả generate_sample() và generate_dataset())
+COLUMNS = [
     "Kinh nghiệm", "Trình độ", "Chứng chỉ", "Ca đêm", "Làm thêm",
     "Chức vụ", "Loại hợp đồng", "Kỹ năng đặc thù", "Khu vực làm việc",
     "Loại hình mục tiêu", "Tỷ lệ phụ cấp", "Lương"
-])
-
-# In ra 5 dòng đầu tiên của DataFrame để kiểm tra nhanh cấu trúc và nội dung dữ liệu
-print("5 dòng đầu tiên của dữ liệu lương:")
-print(df_data.head())
-print("\nThông tin tóm tắt về dữ liệu (số lượng bản ghi, kiểu dữ liệu, non-null counts):")
-print(df_data.info())
-print("\nThống kê mô tả dữ liệu (mean, std, min, max, quartiles):")
-print(df_data.describe(include='all')) # include='all' để hiển thị cả thống kê cho cột object (phân loại)
+]
+
+def generate_dataset(n, seed=None):
+    """
+    Tạo n mẫu dữ liệu lương theo cách vector hóa (mỗi cột được sinh thành một mảng NumPy).
+    Dùng cùng công thức tính lương và cùng phân phối với generate_sample(), nhưng thay vì
+    vòng lặp từng dòng với các nhánh if/elif, các hệ số được áp dụng qua bảng tra cứu và mặt nạ.
+    n: số lượng mẫu cần tạo (lớn hơn DATASET_CHUNK_ROWS thì được ghép từ các khối của iter_dataset_chunks).
+    seed: seed cho np.random.Generator cục bộ (None: ngẫu nhiên), không ảnh hưởng RNG toàn cục.
+    """
+    if n <= DATASET_CHUNK_ROWS:
+        return _generate_rows(n, np.random.default_rng(seed))
+    return pd.concat(iter_dataset_chunks(n, seed), ignore_index=True)
+
+def _chunk_seed_sequence(seed, index):
+    """SeedSequence của khối thứ index: khối 0 dùng chính seed (giống generate_dataset khi n nhỏ), các khối sau dùng nhánh con."""
+    base = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    if index == 0:
+        return base
+    return np.random.SeedSequence(base.entropy, spawn_key=(index,))
+
+def dataset_chunk_count(n):
+    """Số khối của bộ dữ liệu n dòng."""
+    return max(1, -(-n // DATASET_CHUNK_ROWS))
+
+def generate_chunk(n, seed, index):
+    """
+    Sinh riêng khối thứ index của bộ dữ liệu (n, seed), không cần sinh các khối trước đó.
+    Với seed=None, dùng chung một SeedSequence cho mọi khối để các khối vẫn độc lập với nhau.
+    """
+    start = index * DATASET_CHUNK_ROWS
+    if not (0 <= start < max(n, 1)):
+        raise IndexError(f"Khối {index} nằm ngoài bộ dữ liệu {n} dòng")
+    rows = min(DATASET_CHUNK_ROWS, n - start)
+    return _generate_rows(rows, np.random.default_rng(_chunk_seed_sequence(seed, index)))
+
+def iter_dataset_chunks(n, seed=None):
+    """Sinh lần lượt các khối (DataFrame tối đa DATASET_CHUNK_ROWS dòng) của bộ dữ liệu (n, seed)."""
+    seed = np.random.SeedSequence(seed) # Cố định entropy cho mọi khối khi seed=None
+    for index in range(dataset_chunk_count(n)):
+        yield generate_chunk(n, seed, index)
+
+def _generate_rows(n, rng):
+    """Sinh n dòng dữ liệu lương bằng Generator rng (thân của generate_dataset cho một khối)."""
+
+    # Sinh toàn bộ các cột đặc trưng dưới dạng mảng (chỉ số cho các biến phân loại)
+    exp = rng.integers(0, 11, size=n)
+    edu_idx = rng.integers(0, len(EDUCATION_LEVELS), size=n)
+    cert = rng.integers(0, 2, size=n)
+    night = rng.integers(0, 2, size=n)
+    overtime = rng.integers(0, 2, size=n)
+    position_idx = rng.choice(len(POSITION_LEVELS), size=n, p=POSITION_PROBABILITIES)
+    contract_idx = rng.integers(0, len(CONTRACT_TYPES), size=n)
+    special_skills = rng.integers(0, 2, size=n)
+    area_idx = rng.integers(0, len(WORK_AREAS), size=n)
+    client_idx = rng.integers(0, len(CLIENT_TYPES), size=n)
+    allowances_percentage = rng.uniform(0.0, 0.30, size=n)
+
+    # Các thành phần ngẫu nhiên phụ thuộc vào từng dòng (hệ số chức vụ, khoản cộng kỹ năng đặc thù)
+    position_low = POSITION_MULTIPLIER_LOW[position_idx]
+    position_high = POSITION_MULTIPLIER_HIGH[position_idx]
+    position_multiplier = position_low + (position_high - position_low) * rng.random(n)
+    skills_bonus = np.where(special_skills == 1, rng.uniform(2_000_000, 5_000_000, size=n), 0.0)
+
+    # Áp dụng công thức lương theo đúng thứ tự như generate_sample()
+    salary = REGIONAL_BASE_SALARIES[area_idx] + (exp // 3) * 1_000_000
+    salary *= EDUCATION_MULTIPLIERS[edu_idx]
+    salary *= np.where(cert == 1, 1.07, 1.0)
+    salary *= position_multiplier
+    salary *= CONTRACT_MULTIPLIERS[contract_idx]
+    salary += skills_bonus
+    salary *= CLIENT_MULTIPLIERS[client_idx]
+    salary *= np.where(night == 1, 1.30, 1.0)
+    salary *= np.where(overtime == 1, 1.50, 1.0)
+    salary *= (1 + allowances_percentage)
+
+    # Cột phân loại dạng category (mã int8 + danh sách mức dùng chung) thay vì mảng chuỗi Python,
+    # cột cờ 0/1 và kinh nghiệm dạng int8 (giá trị không đổi, bộ nhớ giảm nhiều lần)
+    def category(levels, idx):
+        return pd.Categorical.from_codes(idx.astype(np.int8), categories=list(levels))
+
+    return pd.DataFrame({
+        "Kinh nghiệm": exp.astype(np.int8),
+        "Trình độ": category(EDUCATION_LEVELS, edu_idx),
+        "Chứng chỉ": cert.astype(np.int8),
+        "Ca đêm": night.astype(np.int8),
+        "Làm thêm": overtime.astype(np.int8),
+        "Chức vụ": category(POSITION_LEVELS, position_idx),
+        "Loại hợp đồng": category(CONTRACT_TYPES, contract_idx),
+        "Kỹ năng đặc thù": special_skills.astype(np.int8),
+        "Khu vực làm việc": category(WORK_AREAS, area_idx),
+        "Loại hình mục tiêu": category(CLIENT_TYPES, client_idx),
+        "Tỷ lệ phụ cấp": allowances_percentage,
+        "Lương": salary,
+    }, columns=COLUMNS)
+
+# --- Bộ cung cấp dữ liệu lười (lazy) có bộ nhớ đệm ---
+# Dữ liệu chỉ được tạo khi có yêu cầu lần đầu, thay vì ngay khi import module
+_dataset_cache = {}
+_dataset_lock = threading.Lock()
+
+def get_dataset(n=DEFAULT_N_SAMPLES, seed=DEFAULT_SEED, verbose=False):
+    """
+    Trả về bộ dữ liệu lương gồm n mẫu, tạo bằng generate_dataset() ở lần truy cập đầu tiên
+    và lưu lại để các lần gọi sau với cùng (n, seed) dùng lại ngay.
+    verbose: True để in thông tin chẩn đoán (head, info, describe) của bộ dữ liệu.
+    """
+    key = (n, seed)
+    df = _dataset_cache.get(key)
+    if df is None:
+        with _dataset_lock:
+            df = _dataset_cache.get(key)
+            if df is None: # Kiểm tra lại sau khi có khóa, tránh tạo dữ liệu hai lần
+                df = generate_dataset(n, seed=seed)
+                _dataset_cache[key] = df
+    if verbose:
+        print_summary(df)
+    return df
+
+def dataset_fingerprint(n=DEFAULT_N_SAMPLES, seed=DEFAULT_SEED):
+    """
+    Trả về mã băm SHA-256 của các tham số tạo dữ liệu (phiên bản bộ sinh, n, seed).
+    Dùng để kiểm tra mô hình đã lưu có được huấn luyện trên cùng bộ dữ liệu hay không, mà không cần tạo dữ liệu.
+    """
+    params = {'generator_version': GENERATOR_VERSION, 'n': n, 'seed': seed}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+# --- Lưu/đọc bộ dữ liệu dạng cột (Parquet hoặc Arrow IPC, cần pyarrow) ---
+# Các cột phân loại được lưu dạng dictionary (category), các cột cờ 0/1 và kinh nghiệm dạng int8,
+# tỷ lệ phụ cấp dạng float32. File Arrow IPC không nén nên có thể memory-map và đọc gần như không sao chép.
+CATEGORICAL_LEVELS = {
+    "Trình độ": EDUCATION_LEVELS,
+    "Chức vụ": POSITION_LEVELS,
+    "Loại hợp đồng": CONTRACT_TYPES,
+    "Khu vực làm việc": WORK_AREAS,
+    "Loại hình mục tiêu": CLIENT_TYPES,
+}
+COMPACT_DTYPES = {
+    "Kinh nghiệm": 'int8', "Chứng chỉ": 'int8', "Ca đêm": 'int8', "Làm thêm": 'int8', "Kỹ năng đặc thù": 'int8',
+    "Tỷ lệ phụ cấp": 'float32', "Lương": 'float64',
+}
+# Phần mở rộng của file Arrow IPC (các phần mở rộng khác: Parquet)
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+# Phiên bản định dạng lưu trữ (đưa vào mã băm của file: dữ liệu đã ép kiểu gọn khác dữ liệu sinh trong bộ nhớ)
+STORAGE_VERSION = 1
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("Cần cài đặt pyarrow để đọc/ghi dữ liệu Parquet hoặc Arrow (pip install pyarrow).")
+    return pyarrow
+
+def is_arrow_file(path):
+    """File Arrow IPC (theo phần mở rộng); các file khác được coi là Parquet."""
+    return os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS
+
+def compact_frame(df):
+    """Bản sao của df với các cột phân loại dạng category (mức cố định) và các cột số ở kiểu gọn (COMPACT_DTYPES)."""
+    columns = {}
+    for col in COLUMNS:
+        if col in CATEGORICAL_LEVELS:
+            columns[col] = pd.Categorical(df[col], categories=list(CATEGORICAL_LEVELS[col]))
+        else:
+            columns[col] = df[col].to_numpy(dtype=COMPACT_DTYPES[col])
+    return pd.DataFrame(columns, columns=COLUMNS)
+
+def export_dataset(path, n=DEFAULT_N_SAMPLES, seed=DEFAULT_SEED):
+    """
+    Sinh bộ dữ liệu (n, seed) theo từng khối và ghi ra file Parquet hoặc Arrow IPC (theo phần mở rộng của path),
+    mỗi khối là một row group/record batch, nên không cần giữ toàn bộ dữ liệu trong RAM.
+    Mã băm dữ liệu được lưu trong metadata của file (đọc lại bằng dataset_file_fingerprint).
+    """
+    pa = _pyarrow()
+    fingerprint = hashlib.sha256(json.dumps({'dataset': dataset_fingerprint(n, seed), 'storage': STORAGE_VERSION},
+                                            sort_keys=True).encode('utf-8')).hexdigest()
+    metadata = {b'dataset_fingerprint': fingerprint.encode('ascii'), b'n': str(n).encode('ascii'),
+                b'seed': str(seed).encode('ascii'), b'generator_version': str(GENERATOR_VERSION).encode('ascii')}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    writer = None
+    try:
+        for chunk in iter_dataset_chunks(n, seed):
+            table = pa.Table.from_pandas(compact_frame(chunk), preserve_index=False)
+            if writer is None:
+                schema = table.schema.with_metadata(metadata)
+                if is_arrow_file(path):
+                    writer = pa.ipc.new_file(tmp_path, schema)
+                else:
+                    writer = pa.parquet.ParquetWriter(tmp_path, schema, compression='zstd')
+            writer.write_table(table.replace_schema_metadata(metadata))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path) # Không để lại file dở dang nếu bị ngắt khi đang ghi
+    return path
+
+def open_dataset_file(path):
+    """Bảng pyarrow của file dữ liệu; file Arrow IPC được memory-map (không đọc vào RAM)."""
+    pa = _pyarrow()
+    if is_arrow_file(path):
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return pa.parquet.read_table(path, memory_map=True)
+
+def load_dataset_file(path):
+    """
+    Đọc bộ dữ liệu từ file Parquet hoặc Arrow IPC thành DataFrame (cột phân loại dạng category, cột số kiểu gọn).
+    Với Arrow IPC, các cột số được tham chiếu thẳng vào vùng nhớ memory-map thay vì sao chép.
+    """
+    return open_dataset_file(path).to_pandas(split_blocks=True)
+
+def dataset_file_fingerprint(path):
+    """Mã băm dữ liệu ghi trong metadata của file (export_dataset); None nếu file không có."""
+    pa = _pyarrow()
+    if is_arrow_file(path):
+        schema = pa.ipc.open_file(pa.memory_map(path, 'r')).schema
+    else:
+        schema = pa.parquet.read_schema(path)
+    value = (schema.metadata or {}).get(b'dataset_fingerprint')
+    return value.decode('ascii') if value else None
+
+def clear_dataset_cache():
+    """Xóa các bộ dữ liệu đã lưu trong bộ nhớ đệm (lần truy cập sau sẽ tạo lại)."""
+    with _dataset_lock:
+        _dataset_cache.clear()
+
+def print_summary(df):
+    """In ra các thông tin chẩn đoán của bộ dữ liệu (chỉ gọi khi được yêu cầu)."""
+    # In ra 5 dòng đầu tiên của DataFrame để kiểm tra nhanh cấu trúc và nội dung dữ liệu
+    print("5 dòng đầu tiên của dữ liệu lương:")
+    print(df.head())
+    print("\nThông tin tóm tắt về dữ liệu (số lượng bản ghi, kiểu dữ liệu, non-null counts):")
+    df.info() # df.info() tự in ra stdout
+    print("\nThống kê mô tả dữ liệu (mean, std, min, max, quartiles):")
+    print(df.describe(include='all')) # include='all' để hiển thị cả thống kê cho cột object (phân loại)
+
+def __getattr__(name):
+    # Giữ tương thích với `from Create_data import df_data`: dữ liệu chỉ được tạo khi thuộc tính được truy cập
+    if name == 'df_data':
+        return get_dataset()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == '__main__':
+    # Chạy trực tiếp file này để tạo dữ liệu và xem các thông tin chẩn đoán, hoặc ghi dữ liệu ra file:
+    #     python Create_data.py --rows 10000000 --export data/salaries.arrow
+    import argparse
+    parser = argparse.ArgumentParser(description="Tạo dữ liệu lương tổng hợp")
+    parser.add_argument('--rows', type=int, default=DEFAULT_N_SAMPLES)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--export', help="Ghi dữ liệu ra file Parquet (.parquet) hoặc Arrow IPC (.arrow)")
+    args = parser.parse_args()
+    if args.export:
+        print(f"Đã ghi {args.rows} dòng vào {export_dataset(args.export, args.rows, args.seed)}")
+    else:
+        get_dataset(args.rows, args.seed, verbose=True)
@@ -0,0 +1,101 @@
+# Forest_evaluator.py - Bộ đánh giá rừng cây quyết định đã "làm phẳng" bằng NumPy thuần
+#
+# Tất cả các cây của RandomForestRegressor được nối thành các mảng nút liên tục
+# (feature, threshold, left, right, value). Việc dự đoán duyệt đồng thời mọi cây cho mọi dòng
+# bằng các phép toán vector hóa, tránh chi phí kiểm tra đầu vào và điều phối joblib của sklearn
+# khi chỉ dự đoán vài dòng. Không cần GPU, numba hay dịch vụ bên ngoài.
+
+import numpy as np
+
+# Tên các mảng khi lưu/tải bộ đánh giá (ví dụ: trong gói mô hình, để memory-map và chia sẻ giữa các tiến trình)
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = feature      # Chỉ số đặc trưng dùng để rẽ nhánh tại mỗi nút (0 tại nút lá)
+        self.threshold = threshold  # Ngưỡng rẽ nhánh: đi sang trái nếu X[feature] <= threshold
+        self.left = left            # Chỉ số toàn cục của nút con trái (nút lá trỏ về chính nó)
+        self.right = right          # Chỉ số toàn cục của nút con phải (nút lá trỏ về chính nó)
+        self.value = value          # Giá trị dự đoán tại mỗi nút (chỉ dùng ở nút lá)
+        self.roots = roots          # Chỉ số nút gốc của từng cây trong các mảng nối
+        self.max_depth = int(max_depth) # Độ sâu lớn nhất: số bước duyệt cần thiết để mọi dòng chạm tới lá
+        self.n_features = None      # Số đặc trưng đầu vào (gán khi tạo từ mô hình)
+
+    @classmethod
+    def from_estimator(cls, model):
+        """
+        Làm phẳng một rừng cây hồi quy của sklearn (RandomForestRegressor, ExtraTreesRegressor)
+        hoặc một DecisionTreeRegressor. Ném TypeError nếu mô hình không được hỗ trợ.
+        """
+        trees = [est.tree_ for est in getattr(model, 'estimators_', [model]) if hasattr(est, 'tree_')]
+        if not trees or len(trees) != len(getattr(model, 'estimators_', [model])):
+            raise TypeError(f"Không hỗ trợ làm phẳng mô hình {type(model).__name__}")
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise TypeError("Chỉ hỗ trợ mô hình hồi quy một đầu ra")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1 # sklearn đánh dấu nút lá bằng TREE_LEAF (-1)
+            # Nút lá trỏ về chính nó để việc duyệt dừng lại tại lá dù vẫn tiếp tục lặp
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        forest = cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+        )
+        forest.n_features = getattr(model, 'n_features_in_', None)
+        return forest
+
+    def to_arrays(self):
+        """Trả về dict các mảng NumPy (kèm max_depth) để lưu vào gói mô hình."""
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES}
+        arrays['max_depth'] = self.max_depth
+        arrays['n_features'] = self.n_features
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Tạo lại bộ đánh giá từ dict của to_arrays() (các mảng có thể là memory-map, không bị sao chép)."""
+        forest = cls(max_depth=arrays['max_depth'], **{name: arrays[name] for name in ARRAY_NAMES})
+        forest.n_features = arrays.get('n_features')
+        return forest
+
+    def predict(self, X, chunk_size=4096):
+        """
+        Dự đoán cho ma trận X (n_dòng x n_đặc_trưng). Trả về mảng float64 n_dòng phần tử,
+        bằng trung bình giá trị lá của các cây (giống RandomForestRegressor.predict trong sai số dấu phẩy động).
+        X được xử lý theo từng khối chunk_size dòng để giới hạn bộ nhớ tạm (n_dòng x n_cây chỉ số nút).
+        """
+        # sklearn so sánh X (float32) với ngưỡng (float64); ép kiểu X về float32 để kết quả rẽ nhánh giống hệt
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError("X phải là ma trận 2 chiều")
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise ValueError(f"X có {X.shape[1]} đặc trưng, cần {self.n_features}")
+
+        n = X.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        for start in range(0, n, chunk_size):
+            block = X[start:start + chunk_size]
+            rows = np.arange(block.shape[0])[:, None]
+            nodes = np.broadcast_to(self.roots, (block.shape[0], self.roots.shape[0]))
+            # Mỗi bước đưa mọi (dòng, cây) xuống một tầng; nút lá giữ nguyên vị trí
+            for _ in range(self.max_depth):
+                go_left = block[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            out[start:start + block.shape[0]] = self.value[nodes].mean(axis=1)
+        return out
@@ -1,11 +1,23 @@
 # Main.py - Flask Web Application cho ứng dụng dự đoán lương nhân viên
 
 # Import các module cần thiết từ Flask và các file Python tùy chỉnh
-from flask import Flask, render_template, request, jsonify # Flask: Framework web; render_template: để render HTML; request: xử lý yêu cầu HTTP; jsonify: trả về JSON
+from flask import Flask, render_template, request, jsonify, g, Response, send_file, abort # Flask: Framework web; render_template: để render HTML; request: xử lý yêu cầu HTTP; jsonify: trả về JSON; g: dữ liệu riêng của từng yêu cầu
 import os # Thư viện để tương tác với hệ điều hành (ví dụ: kiểm tra/tạo thư mục, biến môi trường)
 from Predict_engine import prediction_engine # Import đối tượng engine dự đoán lương đã khởi tạo từ Predict_engine.py
-from Create_templates import create_html_template # Import hàm để tạo file HTML template
 import sys # Thư viện để truy cập các tham số và hàm hệ thống (sử dụng cho sys.stderr)
+import threading # Khóa để tránh huấn luyện mô hình nhiều lần khi có nhiều yêu cầu đồng thời
+import time # Đo thời gian xử lý từng yêu cầu bằng đồng hồ đơn điệu
+import uuid # Tạo mã định danh (request ID) cho từng yêu cầu
+import hmac # So sánh token quản trị trong thời gian hằng số
+from App_logging import setup_logging, should_log_request # Ghi log có cấu trúc qua hàng đợi, có lấy mẫu
+from App_metrics import metrics, stage_timer, METRICS_ENABLED, CONTENT_TYPE as METRICS_CONTENT_TYPE # Số liệu Prometheus
+from Request_schema import prediction_schema, json_provider # Lược đồ hồ sơ dự đoán (một lượt duyệt), JSON bằng orjson
+from Response_cache import ResponseCache # Trang chủ và /api/model-info dựng sẵn theo phiên bản mô hình (ETag/304)
+from Build_assets import AssetManifest, DIST_DIR, PRECOMPRESSED_ENCODINGS # CSS/JS biên dịch sẵn (python Build_assets.py)
+from werkzeug.security import safe_join # Ghép đường dẫn file tĩnh an toàn (chặn ../)
+from werkzeug.exceptions import BadRequest # Lỗi của request.get_json() khi nội dung không phải JSON hợp lệ
+from Ai_adjust import get_adjuster, AiConfigurationError # Gọi Gemini AI từ phía server (có pool kết nối và bộ nhớ đệm)
+from Retrain_scheduler import get_scheduler, make_labelled_record, RETRAIN_ENABLED # Huấn luyện lại nền với dữ liệu thực tế
 from dotenv import load_dotenv # Import hàm để tải biến môi trường từ file .env
 
 # Tải các biến môi trường từ file .env
@@ -13,20 +25,236 @@ load_dotenv()
 
 # Khởi tạo ứng dụng Flask
 app = Flask(__name__) # __name__ giúp Flask tìm đúng thư mục resources
+app.json = json_provider(app) # request.get_json() và jsonify dùng orjson nếu đã cài
 
-# --- Khởi tạo và huấn luyện mô hình khi ứng dụng bắt đầu ---
-# Sử dụng ngữ cảnh ứng dụng để đảm bảo mô hình được huấn luyện một lần duy nhất khi server khởi động
-with app.app_context():
-    print("🔄 Đang khởi tạo và huấn luyện mô hình...", file=sys.stderr)
-    # Gọi phương thức train_model của prediction_engine
-    success = prediction_engine.train_model()
-    if success:
-        performance = prediction_engine.get_model_performance()
-        print(f"✅ Mô hình đã được huấn luyện thành công!", file=sys.stderr)
-        print(f"📊 Sai số tuyệt đối trung bình (MAE): {performance['mae']:.2f} VND", file=sys.stderr)
-        print(f"📊 Hệ số xác định (R2): {performance['r2']:.4f}", file=sys.stderr)
+# Logger có cấu trúc của ứng dụng (ghi qua hàng đợi, không chặn luồng xử lý yêu cầu)
+logger = setup_logging()
+
+# Số ký tự tối đa của danh sách tên trường được ghi vào log khi yêu cầu bị lỗi
+LOG_FIELD_NAMES_CHARS = 200
+
+def request_field_names(body):
+    """
+    Tên các trường (không kèm giá trị) trong nội dung JSON của một yêu cầu lỗi, để ghi log mà không ghi
+    dữ liệu lương/hồ sơ của người dùng. Trường của từng hồ sơ trong 'records' có dạng records.<tên>.
+    """
+    if not body:
+        return '(trống)'
+    try:
+        data = app.json.loads(body)
+    except ValueError:
+        return '(không phải JSON)'
+    if not isinstance(data, dict):
+        return f"(JSON {type(data).__name__})"
+    names = set(data)
+    records = data.get('records')
+    if isinstance(records, list):
+        names.update(f"records.{name}" for record in records if isinstance(record, dict) for name in record)
+    return ','.join(sorted(map(str, names)))[:LOG_FIELD_NAMES_CHARS]
+
+@app.before_request
+def start_request():
+    # Gán request ID (dùng lại header X-Request-ID nếu client gửi lên) và ghi thời điểm bắt đầu
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    # Ghi một dòng log có cấu trúc cho yêu cầu: luôn ghi nếu lỗi hoặc chậm, còn lại chỉ ghi theo tỷ lệ lấy mẫu
+    duration_ms = (time.perf_counter() - g.get('start_time', time.perf_counter())) * 1000
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    if METRICS_ENABLED:
+        # Nhãn là tên endpoint (không phải đường dẫn) để số chuỗi số liệu không tăng theo URL lạ
+        metrics.observe_request(request.endpoint or 'unmatched', response.status_code, duration_ms / 1000)
+    if should_log_request(response.status_code, duration_ms):
+        fields = {
+            'request_id': g.get('request_id'),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'content_type': request.content_type,
+            'content_length': request.content_length,
+        }
+        if response.status_code >= 400:
+            # Khi bị lỗi chỉ ghi tên các trường (không ghi nội dung yêu cầu), đủ để debug yêu cầu sai định dạng
+            fields['body_fields'] = request_field_names(request.get_data())
+        logger.info('request', extra={'fields': fields})
+    return response
+
+# --- Khởi tạo mô hình (tải gói mô hình đã lưu hoặc huấn luyện) ---
+# Việc import Main không tạo dữ liệu hay huấn luyện mô hình; mô hình được khởi tạo khi server khởi động
+# (khối __main__ bên dưới) hoặc lười ở yêu cầu HTTP đầu tiên.
+# Mô hình chỉ được huấn luyện lại khi gói mô hình đã lưu bị thiếu hoặc lỗi thời.
+_model_init_lock = threading.Lock()
+
+def init_model():
+    """
+    Tải hoặc huấn luyện mô hình nếu chưa sẵn sàng (chỉ một lần, an toàn khi nhiều luồng gọi cùng lúc).
+    Trả về True nếu mô hình sẵn sàng để dự đoán.
+    """
+    if prediction_engine.is_trained:
+        return True
+    with _model_init_lock:
+        if prediction_engine.is_trained: # Một luồng khác đã khởi tạo xong trong lúc chờ khóa
+            return True
+        logger.info("Đang tải hoặc huấn luyện mô hình...")
+        # Tải gói mô hình đã lưu; chỉ huấn luyện lại khi gói bị thiếu hoặc lỗi thời
+        start = time.perf_counter()
+        success = prediction_engine.load_or_train()
+        if success:
+            performance = prediction_engine.get_model_performance()
+            logger.info("Mô hình đã sẵn sàng", extra={'fields': {
+                'mae': round(performance['mae'], 2),
+                'r2': round(performance['r2'], 4),
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            }})
+        else:
+            logger.error("Lỗi khi khởi tạo hoặc huấn luyện mô hình!")
+        return success
+
+@app.before_request
+def ensure_model():
+    # Đảm bảo mô hình đã sẵn sàng trước khi xử lý yêu cầu (chỉ tốn chi phí ở yêu cầu đầu tiên).
+    # Các endpoint kiểm tra sức khỏe và /metrics phải trả lời ngay nên không kích hoạt việc tải/huấn luyện mô hình
+    if not prediction_engine.is_trained and request.endpoint not in HEALTH_ENDPOINTS:
+        init_model()
+
+def create_app(load_model=True):
+    """
+    App factory cho chế độ production (gunicorn, xem wsgi.py và gunicorn.conf.py).
+    load_model=True: tải (hoặc huấn luyện) mô hình ngay, để khi gunicorn chạy với preload_app
+    mô hình được nạp một lần trong tiến trình master rồi chia sẻ cho các worker qua copy-on-write.
+    """
+    if load_model:
+        init_model()
+    return app
+
+def start_retrain_scheduler():
+    """
+    Khởi động luồng nền huấn luyện lại (RETRAIN_ENABLED=1). Phải gọi trong tiến trình phục vụ yêu cầu
+    (với gunicorn: mỗi worker sau khi fork, xem post_worker_init trong gunicorn.conf.py).
+    """
+    if RETRAIN_ENABLED:
+        get_scheduler(prediction_engine).start()
+
+# --- Kiểm tra sức khỏe (health check) cho bộ cân bằng tải / orchestrator ---
+# (cùng với /metrics: không kích hoạt việc tải/huấn luyện mô hình)
+HEALTH_ENDPOINTS = ('liveness', 'readiness', 'prometheus_metrics')
+
+@app.route('/healthz')
+def liveness():
+    """Liveness: tiến trình còn sống và trả lời được yêu cầu."""
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/readyz')
+def readiness():
+    """Readiness: chỉ sẵn sàng nhận lưu lượng khi mô hình đã được tải hoặc huấn luyện."""
+    ready = prediction_engine.is_trained
+    return jsonify({'status': 'ready' if ready else 'not_ready', 'is_trained': ready,
+                    'model_version': prediction_engine.model_version, 'pid': os.getpid()}), (200 if ready else 503)
+
+# --- Quản trị: tải lại mô hình nóng (hot reload) ---
+# Các endpoint quản trị chỉ mở khi đặt ADMIN_TOKEN (yêu cầu header X-Admin-Token); nếu không đặt, luôn trả về 403.
+# ADMIN_ALLOW_LOCAL=1 (chỉ dùng khi phát triển, không có reverse proxy): chấp nhận thêm yêu cầu từ localhost
+# không kèm token. Sau một reverse proxy trên cùng máy, mọi client bên ngoài đều có địa chỉ 127.0.0.1.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+ADMIN_ALLOW_LOCAL = os.getenv('ADMIN_ALLOW_LOCAL', '0') == '1'
+
+def is_admin_request():
+    """Kiểm tra quyền gọi các endpoint quản trị."""
+    if ADMIN_TOKEN and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return True
+    return ADMIN_ALLOW_LOCAL and request.remote_addr in ('127.0.0.1', '::1')
+
+def retrain_disabled_response():
+    """Phản hồi 409 của các endpoint cần bộ lập lịch huấn luyện lại khi RETRAIN_ENABLED=0."""
+    return jsonify({
+        'success': False,
+        'error': "Chức năng huấn luyện lại đang tắt (RETRAIN_ENABLED=0): "
+                 "không nhận dữ liệu lương thực tế và yêu cầu huấn luyện lại."
+    }), 409
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """
+    POST: tải lại mô hình trên luồng nền và trả về 202 ngay; các yêu cầu dự đoán đang xử lý không bị chặn,
+    mô hình mới được thay vào bằng một phép gán khi đã sẵn sàng. Nội dung JSON tùy chọn: {"retrain": true}
+    để huấn luyện lại (trong tiến trình con của Retrain_scheduler, gồm cả dữ liệu thực tế) thay vì đọc lại
+    gói mô hình (MODEL_PATH). GET: trạng thái lần tải lại và lần huấn luyện lại gần nhất.
+    Lưu ý: với gunicorn nhiều worker, yêu cầu chỉ tải lại worker nhận nó; các worker khác tự nạp gói mô hình
+    mới ở vòng kiểm tra kế tiếp của bộ lập lịch huấn luyện lại (hoặc gửi SIGHUP cho master).
+    {"retrain": true} trả về 409 nếu chức năng huấn luyện lại đang tắt (RETRAIN_ENABLED=0).
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': "Không có quyền truy cập."}), 403
+
+    if request.method == 'GET':
+        return jsonify({'success': True, 'model_version': prediction_engine.model_version,
+                        'reload': prediction_engine.get_reload_status(),
+                        'retrain': get_scheduler(prediction_engine).get_status()})
+
+    data = request.get_json(silent=True) or {}
+    retrain = bool(data.get('retrain', False)) if isinstance(data, dict) else False
+    if retrain:
+        if not RETRAIN_ENABLED:
+            return retrain_disabled_response()
+        # Không bao giờ huấn luyện trên tiến trình phục vụ: giao cho bộ lập lịch (tiến trình con)
+        scheduler = get_scheduler(prediction_engine).start()
+        scheduler.request_retrain()
+        logger.info("Yêu cầu huấn luyện lại", extra={'fields': {'request_id': g.request_id}})
+        return jsonify({'success': True, 'model_version': prediction_engine.model_version,
+                        'retrain': scheduler.get_status()}), 202
+    if not prediction_engine.reload_async():
+        return jsonify({'success': False, 'error': "Đang tải lại mô hình, vui lòng thử lại sau.",
+                        'reload': prediction_engine.get_reload_status()}), 409
+    logger.info("Bắt đầu tải lại mô hình", extra={'fields': {'request_id': g.request_id}})
+    return jsonify({'success': True, 'model_version': prediction_engine.model_version,
+                    'reload': prediction_engine.get_reload_status()}), 202
+
+# --- Phản hồi dựng sẵn theo phiên bản mô hình ---
+# Trang chủ và phần thông tin mô hình của /api/model-info chỉ đổi khi mô hình được thay,
+# nên được dựng một lần cho mỗi phiên bản mô hình
+response_cache = ResponseCache()
+
+def serve_cached(name, build, content_type):
+    """
+    Trả về phản hồi name đã dựng sẵn cho phiên bản mô hình hiện tại (build() dựng nội dung khi cần),
+    kèm ETag và Cache-Control; trả về 304 nếu client gửi If-None-Match trùng ETag.
+    """
+    entry = response_cache.get(name, prediction_engine.model_version, build, content_type)
+    headers = {'ETag': f'"{entry.etag}"', 'Cache-Control': entry.cache_control}
+    if request.if_none_match.contains_weak(entry.etag):
+        return Response(status=304, headers=headers)
+    return Response(entry.body, content_type=entry.content_type, headers=headers)
+
+# --- Giao diện biên dịch sẵn (static/dist) ---
+# Manifest được đọc một lần khi khởi động; chạy lại Build_assets.py thì cần khởi động lại server để dùng bản mới
+assets = AssetManifest.load(static_url=app.static_url_path)
+
+# File trong static/dist có mã băm nội dung trong tên: nội dung của một URL không bao giờ đổi
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    """
+    Phục vụ CSS/JS đã build với Cache-Control immutable; gửi thẳng bản nén sẵn (.br/.gz) nếu client chấp nhận,
+    nên server không phải nén lại mỗi lần.
+    """
+    path = safe_join(DIST_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript' if filename.endswith('.js') else None
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            response = send_file(path + suffix, mimetype=mimetype, conditional=True)
+            response.headers['Content-Encoding'] = encoding
+            break
     else:
-        print("❌ Lỗi khi khởi tạo hoặc huấn luyện mô hình!", file=sys.stderr)
+        response = send_file(path, mimetype=mimetype, conditional=True)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 # --- Định nghĩa các Routes (đường dẫn URL) của ứng dụng ---
 
@@ -35,29 +263,110 @@ def home():
     """
     Route cho trang chủ của ứng dụng.
     Hiển thị form dự đoán lương và thông tin về hiệu suất mô hình.
+    HTML được render một lần cho mỗi phiên bản mô hình (serve_cached).
+    """
+    def render():
+        # Lấy danh sách các trình độ học vấn từ prediction_engine để hiển thị trong dropdown
+        education_levels = prediction_engine.get_categorical_levels('Trình độ')
+        position_levels = prediction_engine.get_categorical_levels('Chức vụ')
+        contract_types = prediction_engine.get_categorical_levels('Loại hợp đồng')
+        work_areas = prediction_engine.get_categorical_levels('Khu vực làm việc')
+        client_types = prediction_engine.get_categorical_levels('Loại hình mục tiêu')
+
+        # Lấy thông tin hiệu suất mô hình để hiển thị trên trang
+        performance = prediction_engine.get_model_performance()
+
+        # Render file index.html và truyền các biến vào template
+        # (API key của Gemini không còn được gửi xuống trình duyệt; AI được gọi qua /predict/ai-adjust)
+        return render_template('index.html',
+                               education_levels=education_levels,
+                               position_levels=position_levels,
+                               contract_types=contract_types,
+                               work_areas=work_areas,
+                               client_types=client_types,
+                               performance=performance,
+                               assets=assets)
+
+    return serve_cached('home', render, 'text/html; charset=utf-8')
+
+# Số hồ sơ tối đa trong một yêu cầu dự đoán theo lô (có thể thay đổi qua biến môi trường)
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '50000'))
+
+def prediction_result(fields, predicted_salary):
+    """Nội dung phản hồi của /predict (chỉ lương dự đoán cơ bản từ ML)."""
+    return {
+        'success': True, # Cờ thành công
+        'data': {
+            **fields,
+            'predicted_salary': round(predicted_salary, 0), # Làm tròn lương dự đoán
+            'predicted_salary_year': round(predicted_salary * 12, 0) # Lương dự đoán hàng năm
+        }
+    }
+
+def request_json():
+    """
+    Nội dung JSON của yêu cầu; ném ValueError (400, cùng thông báo với Asgi_app) nếu sai Content-Type
+    hoặc nội dung không phải JSON hợp lệ.
     """
-    # Lấy danh sách các trình độ học vấn từ prediction_engine để hiển thị trong dropdown
-    education_levels = prediction_engine.get_categorical_levels('Trình độ')
-    position_levels = prediction_engine.get_categorical_levels('Chức vụ')
-    contract_types = prediction_engine.get_categorical_levels('Loại hợp đồng')
-    work_areas = prediction_engine.get_categorical_levels('Khu vực làm việc')
-    client_types = prediction_engine.get_categorical_levels('Loại hình mục tiêu')
-
-    # Lấy thông tin hiệu suất mô hình để hiển thị trên trang
-    performance = prediction_engine.get_model_performance()
-
-    # Lấy API Key từ biến môi trường để truyền cho frontend
-    gemini_api_key = os.getenv('GEMINI_API_KEY', '') # Lấy GEMINI_API_KEY, nếu không có thì trả về chuỗi rỗng
-
-    # Render file index.html và truyền các biến vào template
-    return render_template('index.html',
-                           education_levels=education_levels,
-                           position_levels=position_levels,
-                           contract_types=contract_types,
-                           work_areas=work_areas,
-                           client_types=client_types,
-                           performance=performance,
-                           gemini_api_key=gemini_api_key) # Truyền API key tới template
+    if not request.is_json:
+        raise ValueError("Invalid Content-Type. Expected application/json.")
+    try:
+        return request.get_json()
+    except BadRequest:
+        raise ValueError("Invalid JSON format. Expected a JSON object.") from None
+
+def batch_records(data):
+    """Danh sách hồ sơ trong JSON dạng {"records": [...]}; ném ValueError nếu sai định dạng hoặc quá MAX_BATCH_SIZE."""
+    records = data.get('records') if isinstance(data, dict) else None
+    if not isinstance(records, list):
+        raise ValueError("Invalid JSON format. Expected a JSON object with a 'records' list.")
+    if len(records) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many records: {len(records)} (maximum {MAX_BATCH_SIZE}).")
+    return records
+
+def batch_result(outcomes):
+    """Nội dung phản hồi của /predict/batch từ kết quả của prediction_engine.predict_batch."""
+    results = [None] * len(outcomes)
+    for i, outcome in enumerate(outcomes):
+        if 'error' in outcome:
+            results[i] = {'index': i, 'success': False, 'error': f"Dữ liệu đầu vào không hợp lệ: {outcome['error']}"}
+        else:
+            predicted_salary = outcome['predicted_salary']
+            results[i] = {
+                'index': i,
+                'success': True,
+                'predicted_salary': round(predicted_salary, 0),
+                'predicted_salary_year': round(predicted_salary * 12, 0)
+            }
+
+    succeeded = sum(1 for r in results if r['success'])
+    return {
+        'success': True,
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    }
+
+# Kết quả điều chỉnh khi yêu cầu không có ai_prompt
+NO_AI_ADJUSTMENT = {'adjustment_percentage': 0.0, 'insight_text': "Không có gợi ý AI nào được cung cấp.", 'cached': False}
+
+def ai_adjust_result(fields, ai_prompt, predicted_salary_ml, adjustment):
+    """Nội dung phản hồi của /predict/ai-adjust: lương dự đoán bằng ML và lương sau khi điều chỉnh theo AI."""
+    final_salary = predicted_salary_ml * (1 + adjustment['adjustment_percentage'])
+    return {
+        'success': True,
+        'data': {
+            **fields,
+            'ai_prompt': ai_prompt,
+            'predicted_salary_ml': round(predicted_salary_ml, 0),
+            'ai_adjustment_percentage': adjustment['adjustment_percentage'],
+            'ai_insight_text': adjustment['insight_text'],
+            'ai_cached': adjustment['cached'],
+            'predicted_salary': round(final_salary, 0),
+            'predicted_salary_year': round(final_salary * 12, 0)
+        }
+    }
 
 @app.route('/predict', methods=['POST'])
 def predict(): # Đây là hàm đồng bộ, chỉ xử lý dự đoán ML cơ bản
@@ -65,124 +374,245 @@ def predict(): # Đây là hàm đồng bộ, chỉ xử lý dự đoán ML cơ
     API endpoint để nhận dữ liệu từ form và trả về dự đoán lương cơ bản (từ mô hình ML).
     Chỉ chấp nhận yêu cầu POST.
     """
+    timer = stage_timer() # Histogram thời gian của các giai đoạn: parse_json, predict, serialize
     try:
-        # Ghi log thông tin request để debug
-        print(f"Incoming request headers: {request.headers}", file=sys.stderr)
-        print(f"Is JSON: {request.is_json}", file=sys.stderr)
-        print(f"Raw data: {request.get_data(as_text=True)}", file=sys.stderr)
-
         # Lấy dữ liệu gửi từ frontend (dạng JSON)
-        if not request.is_json:
-            print("Request is not JSON. Expected Content-Type: application/json", file=sys.stderr)
-            raise ValueError("Invalid Content-Type. Expected application/json.")
-
-        data = request.get_json()
+        # (header và nội dung yêu cầu chỉ được ghi log trong log_request khi yêu cầu bị lỗi)
+        data = request_json()
 
         if not isinstance(data, dict):
-            print(f"Received data is not a dictionary: {data}", file=sys.stderr)
             raise ValueError("Invalid JSON format. Expected a JSON object.")
+        timer.mark('parse_json')
 
-        # Trích xuất và chuyển đổi dữ liệu từ yêu cầu JSON
-        # Đảm bảo chuyển đổi đúng kiểu dữ liệu và kiểm tra các trường bắt buộc
-        experience = float(data.get('experience'))
-        education = data.get('education', '').strip().upper() # .strip().upper() để chuẩn hóa dữ liệu
-        certificate = int(data.get('certificate', 0)) # Mặc định là 0 nếu không có
-        night_shift = int(data.get('night_shift', 0))
-        overtime = int(data.get('overtime', 0))
-
-        # Các yếu tố bổ sung
-        position = data.get('position', '').strip()
-        contract_type = data.get('contract_type', '').strip()
-        special_skills = int(data.get('special_skills', 0))
-        work_area = data.get('work_area', '').strip()
-        client_type = data.get('client_type', '').strip()
-        allowances_percentage = float(data.get('allowances_percentage', 0.0))
-        
-        # ai_prompt không được xử lý ở đây, nó được xử lý trực tiếp ở frontend JS
-
-        # Gọi phương thức predict_salary từ prediction_engine để nhận dự đoán lương cơ bản từ mô hình ML
-        predicted_salary = prediction_engine.predict_salary(
-            experience, education, certificate, night_shift, overtime,
-            position, contract_type, special_skills, work_area, client_type, allowances_percentage
-        )
+        # Chuyển kiểu, kiểm tra, mã hóa (một lượt duyệt theo lược đồ) và dự đoán lương cơ bản từ mô hình ML
+        # ai_prompt không được xử lý ở đây (xem /predict/ai-adjust)
+        fields, predicted_salary = prediction_engine.predict_record(data)
+        timer.mark('predict')
 
         # Chuẩn bị dữ liệu kết quả để gửi về client dưới dạng JSON
-        # Chỉ trả về lương dự đoán cơ bản từ ML
-        result = {
-            'success': True, # Cờ thành công
-            'data': {
-                'experience': experience,
-                'education': education,
-                'certificate': certificate,
-                'night_shift': night_shift,
-                'overtime': overtime,
-                'position': position,
-                'contract_type': contract_type,
-                'special_skills': special_skills,
-                'work_area': work_area,
-                'client_type': client_type,
-                'allowances_percentage': allowances_percentage,
-                'predicted_salary': round(predicted_salary, 0), # Làm tròn lương dự đoán
-                'predicted_salary_year': round(predicted_salary * 12, 0) # Lương dự đoán hàng năm
-            }
-        }
-        return jsonify(result) # Trả về kết quả JSON
+        response = jsonify(prediction_result(fields, predicted_salary)) # Trả về kết quả JSON
+        timer.mark('serialize')
+        return response
 
     except (ValueError, TypeError) as e:
         # Xử lý lỗi khi dữ liệu đầu vào không hợp lệ (ví dụ: sai kiểu, thiếu trường)
-        print(f"Input data error: {e}", file=sys.stderr)
+        logger.debug("Input data error", extra={'fields': {'request_id': g.request_id, 'error': e}})
         return jsonify({
             'success': False,
             'error': f"Dữ liệu đầu vào không hợp lệ: {e}"
         }), 400 # Mã trạng thái HTTP 400 Bad Request
 
     except Exception as e:
-        # Xử lý các lỗi chung khác
-        print(f"General prediction error: {e}", file=sys.stderr)
+        # Xử lý các lỗi chung khác (ghi kèm traceback)
+        logger.exception("General prediction error", extra={'fields': {'request_id': g.request_id}})
         return jsonify({
             'success': False,
             'error': f"Đã xảy ra lỗi trong quá trình dự đoán: {e}"
         }), 500 # Mã trạng thái HTTP 500 Internal Server Error
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    API endpoint dự đoán lương cho nhiều hồ sơ trong một yêu cầu.
+    Nhận JSON dạng {"records": [ {...}, {...} ]} (mỗi phần tử có cùng các trường như /predict).
+    Các dòng không hợp lệ được trả về lỗi riêng mà không làm hỏng cả lô.
+    """
+    try:
+        records = batch_records(request_json())
+
+        # Kiểm tra và mã hóa từng dòng theo cùng lược đồ với /predict (dòng nào lỗi thì ghi nhận lỗi cho dòng đó),
+        # rồi dự đoán toàn bộ các dòng hợp lệ trong một lần gọi mô hình
+        return jsonify(batch_result(prediction_engine.predict_batch(records)))
+
+    except (ValueError, TypeError) as e:
+        logger.debug("Batch input error", extra={'fields': {'request_id': g.request_id, 'error': e}})
+        return jsonify({
+            'success': False,
+            'error': f"Dữ liệu đầu vào không hợp lệ: {e}"
+        }), 400
+
+    except Exception as e:
+        logger.exception("General batch prediction error", extra={'fields': {'request_id': g.request_id}})
+        return jsonify({
+            'success': False,
+            'error': f"Đã xảy ra lỗi trong quá trình dự đoán: {e}"
+        }), 500
+
+@app.route('/api/confirmed-salaries', methods=['POST'])
+def confirmed_salaries():
+    """
+    API endpoint nhận các mức lương thực tế đã xác nhận để dùng khi huấn luyện lại (cần quyền quản trị).
+    Nhận JSON dạng {"records": [ {...các trường như /predict..., "salary": 6500000}, ... ]}.
+    Các dòng hợp lệ được ghi nối vào kho dữ liệu; mô hình được huấn luyện lại ở nền khi đến lịch hoặc đủ số dòng.
+    Trả về 409 nếu chức năng huấn luyện lại đang tắt (RETRAIN_ENABLED=0).
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': "Không có quyền truy cập."}), 403
+    if not RETRAIN_ENABLED:
+        # Không nhận dữ liệu khi không có bộ lập lịch nào dùng đến (tránh báo pending_rows không bao giờ được xử lý)
+        return retrain_disabled_response()
+    try:
+        records = batch_records(request_json())
+
+        labelled, errors = [], []
+        for i, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("Invalid record format. Expected a JSON object.")
+                labelled.append(make_labelled_record(prediction_schema.normalize(record), record.get('salary')))
+            except (ValueError, TypeError) as e:
+                errors.append({'index': i, 'error': f"Dữ liệu đầu vào không hợp lệ: {e}"})
+
+        scheduler = get_scheduler(prediction_engine)
+        scheduler.store.append(labelled)
+        return jsonify({
+            'success': True,
+            'accepted': len(labelled),
+            'failed': len(errors),
+            'errors': errors,
+            'pending_rows': scheduler.pending_rows()
+        })
+
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': f"Dữ liệu đầu vào không hợp lệ: {e}"
+        }), 400
+
+@app.route('/predict/ai-adjust', methods=['POST'])
+def predict_ai_adjust():
+    """
+    API endpoint dự đoán lương bằng mô hình ML rồi điều chỉnh theo đề xuất của Gemini AI.
+    Nhận cùng các trường như /predict cộng thêm 'ai_prompt'. Lời gọi AI được bắt đầu trước trên vòng lặp nền
+    và chạy song song với dự đoán ML; không có ai_prompt thì chỉ trả về dự đoán ML.
+    """
+    try:
+        data = request_json()
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON format. Expected a JSON object.")
+
+        # Kiểm tra đầy đủ (cả phạm vi và danh mục) trước khi gọi AI: dữ liệu không hợp lệ không tốn một lần gọi AI
+        snapshot, fields, features = prediction_engine.encode_record(data)
+        ai_prompt = str(data.get('ai_prompt') or '').strip()
+
+        # Bắt đầu gọi AI (không chặn), rồi dự đoán ML trong lúc chờ phản hồi
+        adjustment_future = get_adjuster().submit(fields, ai_prompt) if ai_prompt else None
+        predicted_salary_ml = prediction_engine.predict_encoded(snapshot, features)
+
+        adjustment = adjustment_future.result() if adjustment_future is not None else NO_AI_ADJUSTMENT
+        return jsonify(ai_adjust_result(fields, ai_prompt, predicted_salary_ml, adjustment))
+
+    except (ValueError, TypeError) as e:
+        logger.debug("AI adjust input error", extra={'fields': {'request_id': g.request_id, 'error': e}})
+        return jsonify({
+            'success': False,
+            'error': f"Dữ liệu đầu vào không hợp lệ: {e}"
+        }), 400
+
+    except AiConfigurationError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+
+    except Exception as e:
+        logger.exception("AI adjust error", extra={'fields': {'request_id': g.request_id}})
+        return jsonify({
+            'success': False,
+            'error': f"Đã xảy ra lỗi trong quá trình điều chỉnh lương bằng AI: {e}"
+        }), 502
+
 @app.route('/api/model-info')
 def model_info():
     """
     API endpoint để lấy thông tin về mô hình (hiệu suất, trình độ học vấn, v.v.).
+    JSON được dựng một lần cho mỗi phiên bản mô hình và trả về nguyên vẹn kèm ETag (304 nếu không đổi);
+    các bộ đếm thay đổi liên tục của bộ nhớ đệm kết quả dự đoán nằm ở /api/cache-stats (và /metrics).
     """
-    performance = prediction_engine.get_model_performance()
-    
-    # Lấy tất cả các mức độ của các biến phân loại để hiển thị qua API
-    education_levels = prediction_engine.get_categorical_levels('Trình độ')
-    position_levels = prediction_engine.get_categorical_levels('Chức vụ')
-    contract_types = prediction_engine.get_categorical_levels('Loại hợp đồng')
-    work_areas = prediction_engine.get_categorical_levels('Khu vực làm việc')
-    client_types = prediction_engine.get_categorical_levels('Loại hình mục tiêu')
+    def build():
+        performance = prediction_engine.get_model_performance()
+
+        # Lấy tất cả các mức độ của các biến phân loại để hiển thị qua API
+        education_levels = prediction_engine.get_categorical_levels('Trình độ')
+        position_levels = prediction_engine.get_categorical_levels('Chức vụ')
+        contract_types = prediction_engine.get_categorical_levels('Loại hợp đồng')
+        work_areas = prediction_engine.get_categorical_levels('Khu vực làm việc')
+        client_types = prediction_engine.get_categorical_levels('Loại hình mục tiêu')
 
+        return app.json.dumps({
+            'performance': performance,
+            'education_levels': education_levels,
+            'position_levels': position_levels,
+            'contract_types': contract_types,
+            'work_areas': work_areas,
+            'client_types': client_types,
+            'is_trained': prediction_engine.is_trained,
+            'model': prediction_engine.get_model_info(),
+        })
+
+    return serve_cached('model_info', build, 'application/json')
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Các bộ đếm của bộ nhớ đệm kết quả dự đoán và bộ nhớ đệm phản hồi (không lưu đệm)."""
     return jsonify({
-        'performance': performance,
-        'education_levels': education_levels,
-        'position_levels': position_levels,
-        'contract_types': contract_types,
-        'work_areas': work_areas,
-        'client_types': client_types,
-        'is_trained': prediction_engine.is_trained
+        'prediction_cache': prediction_engine.get_cache_stats(),
+        'response_cache': response_cache.stats(),
     })
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """
+    Số liệu theo định dạng văn bản của Prometheus: histogram thời gian từng giai đoạn dự đoán và từng endpoint,
+    số yêu cầu theo mã trạng thái, phiên bản/thời gian huấn luyện của mô hình và bộ đếm của bộ nhớ đệm.
+    Trả về 404 khi số liệu bị tắt (METRICS_ENABLED=0).
+    """
+    if not METRICS_ENABLED:
+        return jsonify({'success': False, 'error': "Số liệu đã bị tắt (METRICS_ENABLED=0)."}), 404
+
+    info = prediction_engine.get_model_info() or {}
+    performance = prediction_engine.get_model_performance() or {}
+    cache = prediction_engine.get_cache_stats()
+    gauges = [
+        ('model_trained', "1 nếu mô hình đã sẵn sàng dự đoán", 'gauge', None, int(prediction_engine.is_trained)),
+        ('model_version', "Phiên bản ảnh chụp mô hình đang phục vụ", 'gauge', None, info.get('version')),
+        ('model_info', "Nguồn gốc của mô hình đang phục vụ (train/load/retrain)", 'gauge',
+         {'source': info['source']} if info else None, 1 if info else None),
+        ('model_created_timestamp_seconds', "Thời điểm tạo ảnh chụp mô hình (Unix time)", 'gauge', None,
+         info.get('created_at')),
+        ('model_training_duration_seconds', "Thời gian huấn luyện mô hình đang phục vụ", 'gauge', None,
+         info.get('training_duration')),
+        ('model_labelled_rows', "Số dòng dữ liệu thực tế dùng khi huấn luyện mô hình", 'gauge', None,
+         info.get('labelled_rows')),
+        ('model_mae', "MAE của mô hình trên tập kiểm tra (VND)", 'gauge', None, performance.get('mae')),
+        ('model_r2', "R² của mô hình trên tập kiểm tra", 'gauge', None, performance.get('r2')),
+        ('prediction_cache_size', "Số phần tử trong bộ nhớ đệm kết quả dự đoán", 'gauge', None, cache['size']),
+    ]
+    for counter in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        gauges.append((f"prediction_cache_{counter}_total", f"Bộ nhớ đệm kết quả dự đoán: {counter}", 'counter',
+                       None, cache[counter]))
+    return Response(metrics.render(gauges), content_type=METRICS_CONTENT_TYPE)
+
 # --- Khởi chạy ứng dụng Flask ---
 if __name__ == '__main__':
-    # Tạo thư mục 'templates' nếu nó chưa tồn tại.
-    # Điều này đảm bảo rằng file HTML template có thể được lưu đúng chỗ.
-    if not os.path.exists('templates'):
-        os.makedirs('templates')
+    # templates/index.html và static/ là file tĩnh của dự án: khởi động không ghi file nào.
+    # CSS/JS được biên dịch sẵn bằng: python Build_assets.py (chưa build thì trang dùng Tailwind CDN)
+    if not assets.built:
+        print("ℹ️ Chưa build giao diện (python Build_assets.py): đang dùng Tailwind CDN", file=sys.stderr)
+
+    # Server phát triển (Werkzeug). Với production, dùng: gunicorn -c gunicorn.conf.py wsgi:app
+    # FLASK_DEBUG=0 để tắt chế độ debug (tự động tải lại khi code thay đổi, hiển thị lỗi chi tiết)
+    debug = os.getenv('FLASK_DEBUG', '1') == '1'
 
-    # Tạo (hoặc cập nhật) file HTML template index.html
-    # Bước này sẽ tạo ra file HTML với logic AI và yêu cầu API key ở JS
-    create_html_template()
+    # Tải/huấn luyện mô hình trước khi nhận yêu cầu để yêu cầu đầu tiên không phải chờ.
+    # Ở chế độ debug, tiến trình cha chỉ theo dõi file để tự tải lại; chỉ tiến trình con (WERKZEUG_RUN_MAIN) phục vụ yêu cầu
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_model()
+        start_retrain_scheduler()
 
     print("🚀 Khởi động ứng dụng Flask...", file=sys.stderr)
     print("📱 Truy cập ứng dụng tại: http://localhost:5000", file=sys.stderr)
     # Chạy ứng dụng Flask
-    # debug=True: Bật chế độ debug (tự động tải lại khi code thay đổi, hiển thị lỗi chi tiết)
     # host='0.0.0.0': Cho phép truy cập từ mọi địa chỉ IP (cần cho môi trường container/cloud)
     # port=5000: Ứng dụng sẽ chạy trên cổng 5000
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=debug, host='0.0.0.0', port=5000)
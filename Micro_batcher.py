@@ -0,0 +1,166 @@
+# Micro_batcher.py - Gộp các yêu cầu dự đoán một dòng đồng thời thành một lần gọi predict theo lô
+#
+# Mỗi lần gọi RandomForestRegressor.predict (hoặc FlatForest.predict) tốn một chi phí cố định (kiểm tra đầu vào,
+# joblib, duyệt từng cây) gần như không phụ thuộc số dòng. Khi nhiều yêu cầu /predict đến cùng lúc, MicroBatcher
+# gom các dòng đã mã hóa trong tối đa MICRO_BATCH_WAIT_MS mili giây (hoặc đến khi đủ MICRO_BATCH_MAX_ROWS dòng),
+# gọi mô hình một lần cho cả nhóm rồi trả kết quả về từng luồng đang chờ.
+# - Một luồng gom lô riêng cho mỗi tiến trình, khởi động lười ở lần dự đoán đầu tiên (và khởi động lại sau fork,
+#   vì gunicorn nạp ứng dụng trong master rồi mới fork worker).
+# - Các dòng thuộc các ảnh chụp mô hình khác nhau (mô hình vừa được thay) được dự đoán riêng theo từng ảnh chụp.
+# - Số liệu: histogram số dòng mỗi lô (salary_micro_batch_size) và thời gian chờ gom lô của từng yêu cầu
+#   (giai đoạn micro_batch_queue trong salary_stage_duration_seconds).
+# Tắt mặc định; bật bằng MICRO_BATCH_ENABLED=1. Chỉ có lợi khi có nhiều luồng dự đoán đồng thời trong một tiến trình
+# (gunicorn gthread, pool dự đoán của Asgi_app); với một luồng, mỗi yêu cầu chỉ chờ thêm tối đa MICRO_BATCH_WAIT_MS.
+# MICRO_BATCH_WAIT_MS=0: không chờ thêm, chỉ gộp các dòng đã xếp hàng trong lúc lô trước đang được dự đoán.
+# Lỗi bất kỳ khi xử lý một lô được trả về cho mọi luồng đang chờ trong lô đó; luồng gom lô đã dừng (lỗi ngoài dự kiến)
+# được khởi động lại ở lần dự đoán sau, và mỗi luồng chờ tối đa MICRO_BATCH_TIMEOUT_MS.
+# Số liệu được đăng ký một lần cho cả module và cộng dồn các bộ gộp lô còn tồn tại; luồng gom lô không giữ
+# tham chiếu tới bộ gộp lô khi đang chờ, nên bộ gộp lô bị thay được thu hồi và luồng của nó tự kết thúc.
+
+import os
+import queue # Hàng đợi các dòng chờ dự đoán
+import threading # Luồng gom lô, khóa khởi động
+import weakref # Danh sách các bộ gộp lô cho /metrics, luồng gom lô không giữ bộ gộp lô
+from concurrent.futures import Future, InvalidStateError, TimeoutError # Kết quả trả về cho từng luồng đang chờ
+from time import perf_counter # Đo thời gian chờ gom lô
+import numpy as np
+from App_metrics import metrics, METRICS_ENABLED
+
+MICRO_BATCH_ENABLED = os.getenv('MICRO_BATCH_ENABLED', '0') == '1'
+# Thời gian tối đa chờ thêm dòng sau dòng đầu tiên của một lô (mili giây)
+MICRO_BATCH_WAIT_MS = float(os.getenv('MICRO_BATCH_WAIT_MS', '2'))
+# Số dòng tối đa của một lô
+MICRO_BATCH_MAX_ROWS = int(os.getenv('MICRO_BATCH_MAX_ROWS', '64'))
+# Thời gian tối đa một yêu cầu chờ kết quả (gom lô + dự đoán, mili giây)
+MICRO_BATCH_TIMEOUT_MS = float(os.getenv('MICRO_BATCH_TIMEOUT_MS', '5000'))
+
+# Ngưỡng của histogram số dòng mỗi lô
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+# Các bộ gộp lô còn tồn tại trong tiến trình (tham chiếu yếu)
+_batchers = weakref.WeakSet()
+
+
+def gauges():
+    """Gauges cho /metrics (App_metrics.add_gauge_source): tổng của các bộ gộp lô còn tồn tại."""
+    batchers = list(_batchers)
+    return [
+        ('micro_batch_batches_total', "Số lần gọi mô hình của bộ gộp lô", 'counter', None,
+         sum(b.batches for b in batchers)),
+        ('micro_batch_rows_total', "Số dòng đã dự đoán qua bộ gộp lô", 'counter', None, sum(b.rows for b in batchers)),
+    ]
+
+
+if METRICS_ENABLED:
+    metrics.register_histogram('micro_batch_size', "Số dòng trong mỗi lần gọi mô hình của bộ gộp lô",
+                               BATCH_SIZE_BUCKETS)
+    metrics.add_gauge_source(gauges)
+
+
+def _collector(ref, pending):
+    """Vòng lặp của luồng gom lô; kết thúc khi bộ gộp lô đã bị thu hồi (finalize đưa None vào hàng đợi)."""
+    while True:
+        first = pending.get()
+        batcher = ref() if first is not None else None
+        if batcher is None:
+            return
+        batcher._process(first, pending)
+        batcher = None # Không giữ bộ gộp lô trong lúc chờ dòng tiếp theo
+
+
+def _resolve(setter, value):
+    """Gán kết quả/lỗi cho một Future; bỏ qua nếu đã có kết quả hoặc luồng chờ đã hủy (hết thời gian chờ)."""
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass
+
+
+class MicroBatcher:
+    def __init__(self, max_rows=MICRO_BATCH_MAX_ROWS, wait_ms=MICRO_BATCH_WAIT_MS, timeout_ms=MICRO_BATCH_TIMEOUT_MS):
+        if max_rows < 1:
+            raise ValueError(f"Số dòng tối đa của một lô phải >= 1 (nhận được {max_rows})")
+        self.max_rows = max_rows
+        self.wait = wait_ms / 1000
+        self.timeout = wait_ms / 1000 + timeout_ms / 1000
+        self.batches = 0 # Số lần gọi mô hình
+        self.rows = 0    # Số dòng đã dự đoán
+        self._queue = None
+        self._thread = None
+        self._pid = None # Tiến trình đã khởi động luồng gom lô (luồng không tồn tại sau fork)
+        self._lock = threading.Lock()
+        _batchers.add(self)
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return self._queue
+        with self._lock:
+            if self._pid != pid or not self._thread.is_alive():
+                # Sau fork: hàng đợi mới. Luồng đã dừng: giữ hàng đợi để luồng mới xử lý các dòng đang chờ
+                if self._pid != pid:
+                    self._queue = queue.SimpleQueue()
+                    weakref.finalize(self, self._queue.put, None) # Dừng luồng gom lô khi bộ gộp lô bị thu hồi
+                self._thread = threading.Thread(target=_collector, args=(weakref.ref(self), self._queue),
+                                                name='micro-batcher', daemon=True)
+                self._thread.start()
+                self._pid = pid
+        return self._queue
+
+    def predict(self, snapshot, features):
+        """Dự đoán một dòng (tuple đặc trưng đã mã hóa) bằng snapshot, gộp với các dòng đồng thời khác."""
+        future = Future()
+        self._ensure_started().put((snapshot, features, future, perf_counter()))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Bộ gộp lô không trả kết quả sau {self.timeout:g} giây") from None
+
+    def _collect(self, first, pending):
+        """Lấy một lô bắt đầu từ dòng first: gom thêm đến khi đủ max_rows hoặc hết thời gian chờ."""
+        batch = [first]
+        deadline = perf_counter() + self.wait
+        while len(batch) < self.max_rows:
+            remaining = deadline - perf_counter()
+            try:
+                batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, first, pending):
+        batch = [first]
+        try:
+            batch = self._collect(first, pending)
+            start = perf_counter()
+            # Gom theo ảnh chụp mô hình: các dòng gửi trước và sau khi thay mô hình không dùng chung một lần gọi
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                try:
+                    self._predict_group(items, start)
+                except BaseException as e: # Lỗi của một nhóm không ảnh hưởng các nhóm khác trong lô
+                    self._fail(items, e)
+        except BaseException as e:
+            # Không để luồng gom lô dừng: mọi luồng còn chờ trong lô nhận lỗi thay vì chờ mãi
+            self._fail(batch, e)
+
+    @staticmethod
+    def _fail(items, error):
+        for item in items:
+            _resolve(item[2].set_exception, error)
+
+    def _predict_group(self, items, start):
+        snapshot = items[0][0]
+        predictions = snapshot.predict_array(np.array([item[1] for item in items], dtype=np.float32))
+        self.batches += 1
+        self.rows += len(items)
+        if METRICS_ENABLED:
+            metrics.observe('micro_batch_size', len(items))
+            for item in items:
+                metrics.observe_stage('micro_batch_queue', start - item[3])
+        for item, value in zip(items, predictions):
+            _resolve(item[2].set_result, value)
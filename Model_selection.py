@@ -0,0 +1,288 @@
+# Model_selection.py - Tìm siêu tham số bằng K-fold cross-validation song song, có bộ nhớ đệm trên đĩa
+#
+# - Không gian tìm kiếm: dict {mô hình: {tham số: [các giá trị]}} cho RandomForest, ExtraTrees và
+#   HistGradientBoosting (tên tham số là các trường của TrainingConfig); đọc từ file JSON cùng cấu trúc nếu có.
+# - Mỗi cặp (cấu hình, fold) là một tác vụ chạy trong một nhóm tiến trình; mỗi tiến trình tự tạo và mã hóa
+#   bộ dữ liệu một lần khi khởi động nên không phải truyền dữ liệu qua pickle cho từng tác vụ.
+# - Kết quả từng fold được ghi ngay vào .cache/model_selection/<mã băm dữ liệu>/<mã băm cấu hình+fold>.json;
+#   chạy lại sau khi bị ngắt chỉ tính các fold còn thiếu.
+# - Bảng xếp hạng: MAE, R², thời gian huấn luyện và độ trễ dự đoán một dòng (p50/p99) của từng cấu hình,
+#   đánh dấu cấu hình nằm trong ngân sách độ trễ.
+#
+# Chạy từ thư mục gốc của dự án:
+#     python Model_selection.py --rows 20000 --folds 5 --workers 4 --latency-budget-ms 5
+#     python Model_selection.py --space search_space.json --output leaderboard.json
+
+import argparse # Đọc tham số dòng lệnh
+import concurrent.futures # Nhóm tiến trình chạy các fold song song
+import hashlib # Khóa bộ nhớ đệm: mã băm của cấu hình + fold
+import itertools # Tích Descartes các giá trị tham số
+import json
+import multiprocessing # Ngữ cảnh 'spawn' cho các tiến trình con
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+from Training_pipeline import TrainingConfig, GeneratedChunks, dataset_source, encode_frame, fit_category_encoders
+
+CACHE_DIR = os.getenv('MODEL_SELECTION_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'model_selection'))
+
+# Không gian tìm kiếm mặc định (tên tham số là các trường của TrainingConfig)
+DEFAULT_SEARCH_SPACE = {
+    'random_forest': {'n_estimators': [100, 200], 'max_depth': [None, 16], 'min_samples_leaf': [1, 5]},
+    'extra_trees': {'n_estimators': [100, 200], 'max_depth': [None, 16], 'min_samples_leaf': [1, 5]},
+    'hist_gradient_boosting': {'n_estimators': [200, 500], 'learning_rate': [0.05, 0.1], 'max_depth': [None, 8]},
+}
+
+# Số dòng dùng để đo độ trễ dự đoán từng dòng trên mỗi fold
+LATENCY_SAMPLES = 200
+# Các trường của TrainingConfig không ảnh hưởng kết quả của một fold (không đưa vào khóa bộ nhớ đệm)
+_NON_RESULT_FIELDS = ('n_jobs', 'out_of_core_rows')
+
+
+def build_candidates(space=None):
+    """Danh sách TrainingConfig cho mọi tổ hợp tham số trong không gian tìm kiếm (mỗi mô hình huấn luyện bằng 1 lõi)."""
+    space = DEFAULT_SEARCH_SPACE if space is None else space
+    candidates = []
+    for estimator, grid in space.items():
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            try:
+                candidates.append(TrainingConfig(estimator=estimator, n_jobs=1, **dict(zip(names, values))))
+            except TypeError as e:
+                raise ValueError(f"Tham số không hợp lệ cho '{estimator}': {e}")
+    return candidates
+
+
+def load_search_space(path):
+    """Đọc không gian tìm kiếm từ file JSON {mô hình: {tham số: [giá trị, ...]}}."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def candidate_params(config):
+    """Các tham số xác định kết quả của một cấu hình (bỏ n_jobs, out_of_core_rows)."""
+    return {key: value for key, value in config.to_dict().items() if key not in _NON_RESULT_FIELDS}
+
+
+def changed_params(config):
+    """Các tham số khác giá trị mặc định của TrainingConfig (dùng trong bảng xếp hạng, bỏ estimator)."""
+    defaults = TrainingConfig()
+    return {key: value for key, value in candidate_params(config).items()
+            if key != 'estimator' and value != getattr(defaults, key)}
+
+
+def fold_key(config, fold, n_folds, cv_seed):
+    """Khóa bộ nhớ đệm của một fold: mã băm của tham số, số fold và seed chia fold."""
+    payload = json.dumps({'params': candidate_params(config), 'fold': fold, 'n_folds': n_folds, 'cv_seed': cv_seed},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+# Dữ liệu đã mã hóa của tiến trình con (tạo một lần bởi _init_worker)
+_worker_data = {}
+
+
+def _init_worker(source):
+    """Khởi tạo tiến trình con: tải và mã hóa bộ dữ liệu một lần (float64, ép kiểu theo từng cấu hình khi huấn luyện)."""
+    X, y = encode_frame(source.load_all(), fit_category_encoders(), 'float64')
+    _worker_data['X'], _worker_data['y'] = X, y
+
+
+def _measure_latency(model, X):
+    """Độ trễ dự đoán từng dòng (p50/p99, ms) và chi phí mỗi dòng khi dự đoán theo lô (µs)."""
+    rows = X[:LATENCY_SAMPLES]
+    model.predict(rows[:1]) # Khởi động (bỏ qua lần gọi đầu)
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict(X)
+    batch_us = (time.perf_counter() - start) / len(X) * 1e6
+    timings = np.array(timings) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99)), batch_us
+
+
+def run_fold(config, fold, n_folds, cv_seed):
+    """Huấn luyện và đánh giá config trên một fold (chạy trong tiến trình con). Trả về dict kết quả."""
+    X, y = _worker_data['X'], _worker_data['y']
+    train_idx, test_idx = list(KFold(n_splits=n_folds, shuffle=True, random_state=cv_seed).split(X))[fold]
+    X_test = X[test_idx].astype(config.dtype)
+
+    start = time.perf_counter()
+    model = config.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+
+    y_pred = model.predict(X_test)
+    p50, p99, batch_us = _measure_latency(model, X_test)
+    return {
+        'fold': fold,
+        'mae': float(mean_absolute_error(y[test_idx], y_pred)),
+        'r2': float(r2_score(y[test_idx], y_pred)),
+        'fit_time_s': fit_time,
+        'latency_p50_ms': p50,
+        'latency_p99_ms': p99,
+        'batch_us_per_row': batch_us,
+        'train_rows': int(len(train_idx)),
+    }
+
+
+def _read_cached(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None # Chưa có hoặc file hỏng (bị ngắt khi đang ghi): tính lại
+
+
+def _write_cached(path, result):
+    """Ghi kết quả một fold (ghi file tạm rồi đổi tên để không để lại file dở dang)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def run_search(candidates=None, source=None, n_folds=5, workers=None, cv_seed=42, cache_dir=CACHE_DIR, verbose=True):
+    """
+    Chạy K-fold CV cho mọi cấu hình trong candidates trên source (mặc định: dataset_source(), tức file
+    DATASET_PATH nếu có, nếu không là bộ dữ liệu tổng hợp mặc định).
+    Kết quả từng fold được lưu trong cache_dir theo mã băm dữ liệu; các fold đã có được dùng lại.
+    Trả về danh sách (config, [kết quả các fold]).
+    """
+    candidates = build_candidates() if candidates is None else candidates
+    source = source or dataset_source()
+    dataset_dir = os.path.join(cache_dir, source.fingerprint()[:16])
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    results = {i: [] for i in range(len(candidates))}
+    pending = []
+    for i, config in enumerate(candidates):
+        for fold in range(n_folds):
+            path = os.path.join(dataset_dir, f"{fold_key(config, fold, n_folds, cv_seed)}.json")
+            cached = _read_cached(path)
+            if cached is not None:
+                results[i].append(cached)
+            else:
+                pending.append((i, fold, path))
+
+    total = len(candidates) * n_folds
+    if verbose:
+        print(f"{len(candidates)} cấu hình x {n_folds} fold: {total - len(pending)} fold có sẵn trong bộ nhớ đệm, "
+              f"cần tính {len(pending)} fold")
+
+    if pending:
+        context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context,
+                                                    initializer=_init_worker, initargs=(source,)) as pool:
+            futures = {pool.submit(run_fold, candidates[i], fold, n_folds, cv_seed): (i, path)
+                       for i, fold, path in pending}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                i, path = futures[future]
+                result = future.result()
+                _write_cached(path, result) # Ghi ngay để có thể tiếp tục nếu bị ngắt
+                results[i].append(result)
+                if verbose:
+                    print(f"[{done}/{len(pending)}] {candidates[i].estimator} fold {result['fold']}: "
+                          f"MAE={result['mae']:,.0f} ({result['fit_time_s']:.2f}s)")
+
+    return [(config, sorted(results[i], key=lambda r: r['fold'])) for i, config in enumerate(candidates)]
+
+
+def build_leaderboard(search_results, latency_budget_ms=None):
+    """
+    Tổng hợp kết quả các fold thành bảng xếp hạng (DataFrame) theo MAE trung bình.
+    latency_budget_ms: đánh dấu within_budget cho các cấu hình có độ trễ p99 một dòng không vượt ngân sách.
+    """
+    rows = []
+    for config, folds in search_results:
+        frame = pd.DataFrame(folds)
+        rows.append({
+            'estimator': config.estimator,
+            'params': json.dumps(changed_params(config), sort_keys=True),
+            'mae_mean': frame['mae'].mean(),
+            'mae_std': frame['mae'].std(ddof=0),
+            'r2_mean': frame['r2'].mean(),
+            'fit_time_s': frame['fit_time_s'].mean(),
+            'latency_p50_ms': frame['latency_p50_ms'].median(),
+            'latency_p99_ms': frame['latency_p99_ms'].median(),
+            'batch_us_per_row': frame['batch_us_per_row'].median(),
+            'folds': len(frame),
+        })
+    board = pd.DataFrame(rows).sort_values('mae_mean', kind='stable').reset_index(drop=True)
+    board['within_budget'] = True if latency_budget_ms is None else board['latency_p99_ms'] <= latency_budget_ms
+    board.insert(0, 'rank', range(1, len(board) + 1))
+    return board
+
+
+def best_config(leaderboard, latency_budget_ms=None):
+    """TrainingConfig có MAE thấp nhất (trong ngân sách độ trễ nếu có); None nếu không cấu hình nào đạt."""
+    board = leaderboard
+    if latency_budget_ms is not None:
+        board = board[board['latency_p99_ms'] <= latency_budget_ms]
+    if board.empty:
+        return None
+    best = board.iloc[0]
+    return TrainingConfig(estimator=best['estimator'], **json.loads(best['params']))
+
+
+def write_leaderboard(leaderboard, path):
+    """Ghi bảng xếp hạng ra CSV hoặc JSON (theo phần mở rộng của path)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith('.json'):
+        leaderboard.to_json(path, orient='records', indent=2, force_ascii=False)
+    else:
+        leaderboard.to_csv(path, index=False)
+
+
+def _env_lines(config):
+    """Các biến môi trường TRAIN_* để huấn luyện mô hình phục vụ với cấu hình đã chọn."""
+    lines = [f"TRAIN_ESTIMATOR={config.estimator}"]
+    for key, value in changed_params(config).items():
+        if key != 'random_state':
+            lines.append(f"TRAIN_{key.upper()}={'none' if value is None else value}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tìm siêu tham số bằng K-fold cross-validation song song")
+    parser.add_argument('--rows', type=int, default=None, help="Số dòng dữ liệu tổng hợp (mặc định: TRAIN_ROWS)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed của dữ liệu tổng hợp")
+    parser.add_argument('--dataset', help="File dữ liệu Parquet/Arrow (mặc định: DATASET_PATH)")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="Số tiến trình (mặc định: số lõi CPU)")
+    parser.add_argument('--space', help="File JSON không gian tìm kiếm {mô hình: {tham số: [giá trị]}}")
+    parser.add_argument('--latency-budget-ms', type=float, default=None, help="Ngân sách độ trễ p99 một dòng (ms)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--output', default=None, help="File bảng xếp hạng (.csv hoặc .json)")
+    args = parser.parse_args()
+
+    candidates = build_candidates(load_search_space(args.space) if args.space else None)
+    if args.rows is not None or args.seed is not None:
+        source = GeneratedChunks(args.rows, args.seed)
+    else:
+        source = dataset_source(args.dataset)
+    search_results = run_search(candidates, source, n_folds=args.folds, workers=args.workers, cache_dir=args.cache_dir)
+    leaderboard = build_leaderboard(search_results, args.latency_budget_ms)
+
+    output = args.output or os.path.join(args.cache_dir, 'leaderboard.csv')
+    write_leaderboard(leaderboard, output)
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 60, 'display.float_format', '{:,.3f}'.format):
+        print(leaderboard.drop(columns=['folds']).to_string(index=False))
+    print(f"Đã ghi bảng xếp hạng: {output}")
+
+    best = best_config(leaderboard, args.latency_budget_ms)
+    if best is None:
+        print("Không có cấu hình nào nằm trong ngân sách độ trễ.")
+    else:
+        print("Cấu hình tốt nhất (biến môi trường để huấn luyện mô hình phục vụ):")
+        for line in _env_lines(best):
+            print(f"    {line}")
+
+
+if __name__ == '__main__':
+    main()
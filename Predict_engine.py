@@ -1,116 +1,605 @@
 # Predict_engine.py - Engine dự đoán lương nhân viên (chỉ xử lý logic ML, không gọi AI trực tiếp)
 
 # Import các thư viện cần thiết cho việc xử lý dữ liệu và huấn luyện mô hình
-import pandas as pd # Thư viện để làm việc với cấu trúc dữ liệu DataFrame
+import numpy as np # Mảng đặc trưng khi dự đoán (một dòng và theo lô)
 from sklearn.model_selection import train_test_split # Hàm để chia tập dữ liệu thành tập huấn luyện và tập kiểm tra
-from sklearn.ensemble import RandomForestRegressor # Mô hình học máy Random Forest Regression
 from sklearn.preprocessing import LabelEncoder # Đối tượng để mã hóa các biến phân loại (như trình độ học vấn, chức vụ,...) thành dạng số
 from sklearn.metrics import mean_absolute_error, r2_score # Các độ đo để đánh giá hiệu suất của mô hình hồi quy
+import os # Tạo thư mục và thay thế file mô hình một cách nguyên tử
+import threading # Bộ đệm hàng đặc trưng riêng cho từng luồng khi dự đoán, luồng nền tải lại mô hình
+import itertools # Bộ đếm phiên bản của các ảnh chụp mô hình
+import time # Thời điểm tạo ảnh chụp, đo thời gian huấn luyện/tải lại
+from dataclasses import dataclass, field, replace # Ảnh chụp mô hình bất biến (frozen dataclass)
+import joblib # Lưu/tải gói mô hình (hỗ trợ memory-map các mảng NumPy khi tải)
+import logging # Ghi log qua logger của ứng dụng (App_logging)
+from Forest_evaluator import FlatForest # Bộ đánh giá rừng cây đã làm phẳng (backend dự đoán tùy chọn)
+from Prediction_cache import PredictionCache # Bộ nhớ đệm kết quả dự đoán (LRU/TTL)
+from Prediction_grid import PredictionGrid # Lưới dự đoán tính sẵn cho không gian đặc trưng rời rạc ("grid mode")
+from Request_schema import prediction_schema # Kiểm tra và mã hóa hồ sơ dự đoán trong một lượt duyệt
+from Micro_batcher import MicroBatcher, MICRO_BATCH_ENABLED # Gộp các dự đoán một dòng đồng thời (MICRO_BATCH_ENABLED=1)
+from App_metrics import stage_timer # Đo thời gian từng giai đoạn dự đoán (tắt bằng METRICS_ENABLED=0)
+from App_logging import LOGGER_NAME
+from Training_pipeline import TrainingConfig, dataset_source, fit_chunked, fit_category_encoders, encode_frame # Cấu hình huấn luyện, huấn luyện theo khối
+
+logger = logging.getLogger(f'{LOGGER_NAME}.engine')
+
+# Các cột phân loại (kiểu object/string) cần mã hóa thành dạng số
+CATEGORICAL_COLUMNS = ["Trình độ", "Chức vụ", "Loại hợp đồng", "Khu vực làm việc", "Loại hình mục tiêu"]
+
+# Thứ tự các cột đặc trưng đưa vào mô hình (phải giống nhau khi huấn luyện, lưu/tải và dự đoán)
+FEATURE_COLUMNS = [
+    "Kinh nghiệm", "Trình độ_encoded", "Chứng chỉ", "Ca đêm", "Làm thêm",
+    "Chức vụ_encoded", "Loại hợp đồng_encoded", "Kỹ năng đặc thù",
+    "Khu vực làm việc_encoded", "Loại hình mục tiêu_encoded", "Tỷ lệ phụ cấp"
+]
+
+# Ánh xạ toàn bộ tham số của predict_salary sang cột tương ứng của bộ dữ liệu (dùng khi ghép dữ liệu thực tế)
+FIELD_COLUMNS = {
+    'experience': "Kinh nghiệm",
+    'education': "Trình độ",
+    'certificate': "Chứng chỉ",
+    'night_shift': "Ca đêm",
+    'overtime': "Làm thêm",
+    'position': "Chức vụ",
+    'contract_type': "Loại hợp đồng",
+    'special_skills': "Kỹ năng đặc thù",
+    'work_area': "Khu vực làm việc",
+    'client_type': "Loại hình mục tiêu",
+    'allowances_percentage': "Tỷ lệ phụ cấp",
+}
+
+# Phiên bản định dạng của gói mô hình đã lưu: tăng khi cấu trúc gói thay đổi
+MODEL_BUNDLE_VERSION = 2 # 2: mô hình được huấn luyện trên mảng float32 (không kèm tên cột)
+
+# Backend dự đoán mặc định (biến môi trường PREDICT_BACKEND):
+# 'sklearn' - gọi model.predict của sklearn; 'flat' - dùng FlatForest (các cây được làm phẳng, duyệt bằng NumPy)
+INFERENCE_BACKENDS = ('sklearn', 'flat')
+DEFAULT_INFERENCE_BACKEND = os.getenv('PREDICT_BACKEND', 'sklearn')
+
+# Cấu hình bộ nhớ đệm kết quả dự đoán (PREDICTION_CACHE_SIZE=0 để tắt)
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', '3600'))
+# Bước lượng tử hóa cho hai đặc trưng liên tục khi tạo khóa bộ nhớ đệm
+EXPERIENCE_QUANTUM = 0.01   # 0.01 năm kinh nghiệm
+ALLOWANCE_QUANTUM = 0.0001  # 0.01% tỷ lệ phụ cấp
+
+# Bật "grid mode" (PREDICT_GRID=1): tính sẵn dự đoán trên lưới sau khi huấn luyện/tải mô hình
+DEFAULT_USE_GRID = os.getenv('PREDICT_GRID', '0') == '1'
+
+# Đường dẫn mặc định của gói mô hình (có thể thay đổi qua biến môi trường MODEL_PATH)
+DEFAULT_MODEL_PATH = os.getenv('MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'salary_model.joblib'))
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    Ảnh chụp bất biến của mọi thứ cần để dự đoán: mô hình, các LabelEncoder, bảng tra cứu dựng sẵn,
+    độ đo MAE/R2 và các bộ đánh giá tùy chọn (FlatForest, lưới dự đoán).
+    Engine chỉ thay ảnh chụp bằng một phép gán tham chiếu duy nhất, nên một yêu cầu đang xử lý luôn thấy
+    trọn vẹn ảnh chụp cũ hoặc trọn vẹn ảnh chụp mới, không bao giờ thấy mô hình mới đi với encoder cũ.
+    Các dict bên trong không được sửa sau khi tạo ảnh chụp.
+    """
+    model: object
+    encoders: dict
+    mae: float
+    r2: float
+    data_hash: str
+    lookups: dict                    # {cột: {giá trị: mã}} dựng sẵn từ encoders
+    category_choices: dict           # Chuỗi liệt kê các giá trị hợp lệ của từng cột (dùng trong thông báo lỗi)
+    flat_forest: object = None       # FlatForest (chỉ có khi inference_backend == 'flat')
+    grid: object = None              # PredictionGrid (chỉ có khi grid mode bật)
+    version: int = 0                 # Số phiên bản tăng dần trong tiến trình (dùng trong khóa bộ nhớ đệm)
+    source: str = 'train'            # 'train': vừa huấn luyện; 'load': tải từ gói mô hình
+    training_duration: float = None  # Thời gian huấn luyện (giây), None nếu không rõ (gói mô hình cũ)
+    labelled_rows: int = 0           # Số dòng dữ liệu thực tế (Retrain_scheduler) đã dùng khi huấn luyện
+    training_config: dict = None     # Cấu hình huấn luyện (TrainingConfig.to_dict()) của mô hình
+    created_at: float = field(default_factory=time.time)
+
+    def encode(self, col, value):
+        """Mã hóa một giá trị phân loại bằng bảng tra cứu; ném ValueError nếu giá trị không hợp lệ."""
+        code = self.lookups[col].get(value)
+        if code is None:
+            raise ValueError(f"{col} '{value}' không hợp lệ! Chọn: {self.category_choices[col]}")
+        return code
+
+    def predict_array(self, X):
+        """Dự đoán cho ma trận đặc trưng float32 đã mã hóa (FlatForest nếu có, ngược lại model.predict của sklearn)."""
+        if self.flat_forest is not None:
+            return self.flat_forest.predict(X)
+        return self.model.predict(X)
 
 class SalaryPredictionEngine:
-    def __init__(self):
+    def __init__(self, inference_backend=None, use_grid=None, training_config=None, data_source=None, micro_batch=None):
         # Khởi tạo các thuộc tính của lớp
-        self.model = None          # Đối tượng mô hình học máy (ban đầu là None)
-        self.encoders = {}         # Dictionary để lưu trữ các LabelEncoder cho từng biến phân loại
-                                   # Mỗi biến phân loại (Trình độ, Chức vụ,...) sẽ có một encoder riêng
-        self.mae = None            # Sai số tuyệt đối trung bình của mô hình (ban đầu là None)
-        self.r2 = None             # Hệ số xác định R-squared của mô hình (ban đầu là None)
-        self.is_trained = False    # Cờ trạng thái cho biết mô hình đã được huấn luyện hay chưa
+        self.inference_backend = inference_backend or DEFAULT_INFERENCE_BACKEND # 'sklearn' hoặc 'flat'
+        if self.inference_backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Backend dự đoán '{self.inference_backend}' không hợp lệ! Chọn: {', '.join(INFERENCE_BACKENDS)}")
+        self.use_grid = DEFAULT_USE_GRID if use_grid is None else use_grid # Có dùng lưới dự đoán tính sẵn hay không
+        self.grid_axes = (None, None) # Lưới kinh nghiệm và phụ cấp (None: dùng lưới mặc định của Prediction_grid)
+        # Cấu hình huấn luyện (mô hình, n_jobs, max_samples, độ sâu, kiểu dữ liệu; mặc định đọc từ biến môi trường TRAIN_*)
+        self.training_config = training_config or TrainingConfig.from_env()
+        # Nguồn dữ liệu huấn luyện (mặc định: file Parquet/Arrow trong DATASET_PATH nếu có,
+        # nếu không là bộ dữ liệu tổng hợp của Create_data, TRAIN_ROWS dòng)
+        self.data_source = data_source or dataset_source()
+        # Ảnh chụp mô hình đang phục vụ (None: chưa huấn luyện/tải). Chỉ được thay bằng _publish()
+        self._snapshot = None
+        self._versions = itertools.count(1) # Bộ đếm phiên bản ảnh chụp
+        self._local = threading.local() # Bộ đệm hàng đặc trưng float32 cấp phát sẵn cho mỗi luồng
+        # Bộ nhớ đệm kết quả dự đoán, khóa là (phiên bản ảnh chụp, vector đặc trưng đã mã hóa và lượng tử hóa)
+        self.cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+        # Bộ gộp các dự đoán một dòng đồng thời thành một lần gọi mô hình (None: mỗi yêu cầu tự gọi mô hình)
+        use_micro_batch = MICRO_BATCH_ENABLED if micro_batch is None else micro_batch
+        self.batcher = MicroBatcher() if use_micro_batch else None
+        # Trạng thái lần tải lại mô hình chạy nền gần nhất (xem reload_async)
+        self._reload_lock = threading.Lock()
+        self._reload_status = {'state': 'idle'}
+
+    # --- Truy cập ảnh chụp đang phục vụ (chỉ đọc) ---
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def is_trained(self):
+        return self._snapshot is not None
+
+    @property
+    def model_version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
 
-    def load_and_prepare_data(self):
+    @property
+    def model(self):
+        snapshot = self._snapshot
+        return snapshot.model if snapshot is not None else None
+
+    @property
+    def encoders(self):
+        snapshot = self._snapshot
+        return snapshot.encoders if snapshot is not None else {}
+
+    @property
+    def mae(self):
+        snapshot = self._snapshot
+        return snapshot.mae if snapshot is not None else None
+
+    @property
+    def r2(self):
+        snapshot = self._snapshot
+        return snapshot.r2 if snapshot is not None else None
+
+    @property
+    def data_hash(self):
+        snapshot = self._snapshot
+        return snapshot.data_hash if snapshot is not None else None
+
+    @property
+    def flat_forest(self):
+        snapshot = self._snapshot
+        return snapshot.flat_forest if snapshot is not None else None
+
+    @property
+    def grid(self):
+        snapshot = self._snapshot
+        return snapshot.grid if snapshot is not None else None
+
+    def load_and_prepare_data(self, encoders=None, dtype=None):
         """
         Tải và chuẩn bị dữ liệu từ Create_data.py để huấn luyện mô hình.
         Phương thức này sẽ mã hóa các biến phân loại và chia thành X (đặc trưng) và y (mục tiêu).
+        Bộ dữ liệu nguồn không bị thay đổi: các mã phân loại được ghi thẳng vào một ma trận đặc trưng
+        liên tục duy nhất (không thêm các cột *_encoded vào DataFrame dùng chung).
+        encoders: dict nhận các LabelEncoder đã fit (mặc định một dict mới, không đụng tới ảnh chụp đang phục vụ).
+        dtype: kiểu của ma trận đặc trưng (mặc định theo cấu hình huấn luyện, float32).
+        Trả về (X, y): mảng NumPy (số dòng, len(FEATURE_COLUMNS)) và vector lương float64.
         """
+        if encoders is None:
+            encoders = {}
         try:
-            # Import DataFrame df_data từ file Create_data.py
-            # Lưu ý: Điều này giả định Create_data.py đã chạy và tạo ra df_data global
-            from Create_data import df_data
-
-            # Định nghĩa các cột phân loại (kiểu object/string) cần mã hóa thành dạng số
-            categorical_cols = ["Trình độ", "Chức vụ", "Loại hợp đồng", "Khu vực làm việc", "Loại hình mục tiêu"]
-
-            # Vòng lặp qua từng cột phân loại để khởi tạo và áp dụng LabelEncoder
-            for col in categorical_cols:
-                if col not in self.encoders: # Nếu encoder cho cột này chưa được tạo, hãy tạo mới
-                    self.encoders[col] = LabelEncoder()
-                # Áp dụng LabelEncoder: fit (học các nhãn duy nhất) và transform (chuyển đổi sang số)
-                df_data[f"{col}_encoded"] = self.encoders[col].fit_transform(df_data[col])
-
-            # Chuẩn bị các đặc trưng (features - X) và biến mục tiêu (target - y) cho mô hình
-            # X bao gồm tất cả các cột đặc trưng (đã mã hóa nếu là phân loại) sẽ được dùng để dự đoán
-            X = df_data[[
-                "Kinh nghiệm", "Trình độ_encoded", "Chứng chỉ", "Ca đêm", "Làm thêm",
-                "Chức vụ_encoded", "Loại hợp đồng_encoded", "Kỹ năng đặc thù",
-                "Khu vực làm việc_encoded", "Loại hình mục tiêu_encoded", "Tỷ lệ phụ cấp"
-            ]]
-            # y là cột mà mô hình sẽ cố gắng dự đoán (mức lương)
-            y = df_data["Lương"]
-
-            return X, y
+            # Lấy bộ dữ liệu từ nguồn dữ liệu (file Parquet/Arrow được memory-map; dữ liệu tổng hợp của Create_data.py
+            # được tạo lười ở lần truy cập đầu tiên và lưu đệm)
+            df_data = self.data_source.load_all()
+
+            # Học các nhãn của từng cột phân loại (cột category: chỉ duyệt mã số, không duyệt từng chuỗi)
+            for col in CATEGORICAL_COLUMNS:
+                if col not in encoders: # Nếu encoder cho cột này chưa được tạo, hãy tạo mới
+                    encoders[col] = LabelEncoder()
+                encoders[col].fit(np.asarray(df_data[col].unique(), dtype=object))
+
+            # X: ma trận đặc trưng theo thứ tự FEATURE_COLUMNS (đã mã hóa), y: mức lương cần dự đoán
+            return encode_frame(df_data, encoders, dtype or self.training_config.dtype)
         except Exception as e:
             # Xử lý nếu có lỗi trong quá trình tải hoặc chuẩn bị dữ liệu
             raise Exception(f"Lỗi khi load hoặc chuẩn bị dữ liệu: {e}")
 
-    def train_model(self):
+    def train_model(self, force=False):
         """
         Huấn luyện mô hình dự đoán lương.
         Phương thức này sẽ tải dữ liệu, chia thành tập huấn luyện/kiểm tra,
         huấn luyện mô hình Random Forest, và đánh giá hiệu suất.
+        Mô hình mới chỉ được đưa vào phục vụ (một phép gán) sau khi mọi bước thành công;
+        nếu huấn luyện lỗi, ảnh chụp đang phục vụ (nếu có) được giữ nguyên.
+        force: Huấn luyện lại kể cả khi đã có mô hình.
         """
         # Kiểm tra nếu mô hình đã được huấn luyện rồi thì không huấn luyện lại
         # Điều này giúp tránh lãng phí tài nguyên khi ứng dụng khởi động lại hoặc khi route được gọi nhiều lần
-        if self.is_trained:
-            print("Mô hình đã được huấn luyện. Bỏ qua huấn luyện lại.")
+        if self.is_trained and not force:
+            logger.info("Mô hình đã được huấn luyện. Bỏ qua huấn luyện lại.")
             return True
 
         try:
-            # Tải và chuẩn bị dữ liệu bằng cách gọi phương thức nội bộ load_and_prepare_data
-            X, y = self.load_and_prepare_data()
-
-            # Tách dữ liệu thành tập huấn luyện (80%) và tập kiểm tra (20%)
-            # X_train, y_train: dữ liệu dùng để huấn luyện mô hình
-            # X_test, y_test: dữ liệu dùng để đánh giá hiệu suất mô hình sau khi huấn luyện
-            # test_size=0.2: 20% dữ liệu sẽ được dùng để kiểm tra
-            # random_state=42: đảm bảo việc tách dữ liệu là cố định và có thể lặp lại (quan trọng cho tính nhất quán)
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-            # Khởi tạo mô hình Random Forest Regressor
-            # n_estimators=100: số lượng cây quyết định trong "rừng" (số cây càng nhiều thường càng chính xác, nhưng tốn thời gian hơn)
-            # random_state=42: đảm bảo quá trình huấn luyện mô hình có thể lặp lại
-            self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-            # Huấn luyện mô hình sử dụng dữ liệu huấn luyện
-            self.model.fit(X_train, y_train)
-
-            # Đánh giá hiệu suất của mô hình trên tập kiểm tra
-            y_pred = self.model.predict(X_test)
-            # Tính Sai số tuyệt đối trung bình (Mean Absolute Error - MAE)
-            # MAE đo lường độ lớn trung bình của sai số giữa giá trị dự đoán và giá trị thực tế
-            self.mae = mean_absolute_error(y_test, y_pred)
-            # Tính Hệ số xác định R-squared (R2 Score)
-            # R2 cho biết mức độ phù hợp của mô hình với dữ liệu, giá trị càng gần 1 càng tốt
-            self.r2 = r2_score(y_test, y_pred)
-
-            self.is_trained = True # Đặt cờ trạng thái là True sau khi huấn luyện thành công
+            self._publish(self._train_snapshot())
             return True
+        except Exception:
+            # Ghi log lỗi (kèm traceback) nếu có vấn đề trong quá trình huấn luyện
+            logger.exception("Lỗi khi huấn luyện mô hình")
+            return False
+
+    def prepare_training_data(self, labelled_data=None):
+        """
+        Chuẩn bị dữ liệu huấn luyện và tập kiểm tra (holdout) dạng mảng float32 theo thứ tự FEATURE_COLUMNS.
+        labelled_data: DataFrame các mức lương thực tế đã xác nhận (cùng tên cột với bộ dữ liệu tổng hợp,
+                       kèm cột bool 'holdout' cho biết dòng thuộc tập kiểm tra). Các dòng này được ghép thêm
+                       vào dữ liệu tổng hợp; việc chia tập kiểm tra cố định theo từng dòng, nên mô hình hiện tại
+                       và mô hình ứng viên có thể được so sánh trên cùng một tập kiểm tra.
+        Trả về (encoders, X_train, X_test, y_train, y_test).
+        """
+        # Tải và chuẩn bị dữ liệu bằng cách gọi phương thức nội bộ load_and_prepare_data
+        encoders = {}
+        X, y = self.load_and_prepare_data(encoders)
+
+        # Tách dữ liệu thành tập huấn luyện (80%) và tập kiểm tra (20%)
+        # X_train, y_train: dữ liệu dùng để huấn luyện mô hình
+        # X_test, y_test: dữ liệu dùng để đánh giá hiệu suất mô hình sau khi huấn luyện
+        # test_size=0.2: 20% dữ liệu sẽ được dùng để kiểm tra
+        # random_state=42: đảm bảo việc tách dữ liệu là cố định và có thể lặp lại (quan trọng cho tính nhất quán)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        if labelled_data is not None and len(labelled_data):
+            # Mã hóa dữ liệu thực tế bằng chính các encoder vừa học từ dữ liệu tổng hợp
+            X_labelled, y_labelled = encode_frame(labelled_data, encoders, self.training_config.dtype)
+            holdout = labelled_data['holdout'].to_numpy(dtype=bool)
+            X_train = np.concatenate([X_train, X_labelled[~holdout]])
+            y_train = np.concatenate([y_train, y_labelled[~holdout]])
+            X_test = np.concatenate([X_test, X_labelled[holdout]])
+            y_test = np.concatenate([y_test, y_labelled[holdout]])
+
+        return encoders, X_train, X_test, y_train, y_test
+
+    def _train_snapshot(self, labelled_data=None):
+        """Huấn luyện một mô hình mới và trả về ảnh chụp của nó (chưa đưa vào phục vụ)."""
+        return self.train_candidate(labelled_data)[0]
+
+    def train_candidate(self, labelled_data=None):
+        """
+        Huấn luyện một mô hình mới theo training_config và đánh giá trên tập kiểm tra.
+        Bộ dữ liệu lớn hơn training_config.out_of_core_rows được huấn luyện theo khối (fit_chunked),
+        không tải toàn bộ vào RAM. Trả về (ảnh chụp chưa đưa vào phục vụ, X_test, y_test).
+        """
+        config = self.training_config
+        start = time.perf_counter()
+        if self.data_source.n_rows > config.out_of_core_rows:
+            encoders = fit_category_encoders()
+            extra_train = extra_test = None
+            if labelled_data is not None and len(labelled_data):
+                X_labelled, y_labelled = encode_frame(labelled_data, encoders, config.dtype)
+                holdout = labelled_data['holdout'].to_numpy(dtype=bool)
+                extra_train = (X_labelled[~holdout], y_labelled[~holdout])
+                extra_test = (X_labelled[holdout], y_labelled[holdout])
+            model, encoders, X_test, y_test = fit_chunked(self.data_source, config, encoders, extra_train)
+            if extra_test is not None:
+                X_test = np.concatenate([X_test, extra_test[0]])
+                y_test = np.concatenate([y_test, extra_test[1]])
+        else:
+            encoders, X_train, X_test, y_train, y_test = self.prepare_training_data(labelled_data)
+            # Khởi tạo và huấn luyện mô hình theo cấu hình (mặc định: Random Forest, 100 cây, random_state=42, mọi lõi CPU)
+            # Mô hình được huấn luyện trên mảng theo thứ tự FEATURE_COLUMNS (mặc định float32, kiểu các cây quyết định vốn dùng),
+            # để khi dự đoán có thể truyền thẳng mảng NumPy mà không cần DataFrame và kiểm tra tên cột
+            model = config.fit(X_train, y_train)
+        training_duration = time.perf_counter() - start
+
+        # Đánh giá hiệu suất của mô hình trên tập kiểm tra
+        y_pred = model.predict(X_test)
+        # Tính Sai số tuyệt đối trung bình (Mean Absolute Error - MAE)
+        # MAE đo lường độ lớn trung bình của sai số giữa giá trị dự đoán và giá trị thực tế
+        mae = mean_absolute_error(y_test, y_pred)
+        # Tính Hệ số xác định R-squared (R2 Score)
+        # R2 cho biết mức độ phù hợp của mô hình với dữ liệu, giá trị càng gần 1 càng tốt
+        r2 = r2_score(y_test, y_pred)
+        # Ghi lại mã băm của nguồn dữ liệu để nhận biết gói mô hình lỗi thời khi tải lại
+        snapshot = self._build_snapshot(model, encoders, mae, r2, self.data_source.fingerprint(),
+                                        source='train', training_duration=training_duration,
+                                        labelled_rows=0 if labelled_data is None else len(labelled_data),
+                                        training_config=config.to_dict())
+        return snapshot, X_test, y_test
+
+    def _build_snapshot(self, model, encoders, mae, r2, data_hash, flat_forest=None, grid=None,
+                        source='train', training_duration=None, labelled_rows=0, training_config=None):
+        """
+        Chuẩn bị mọi thứ cho đường dự đoán nhanh và đóng gói thành một ảnh chụp mới:
+        - Kiểm tra thứ tự/số lượng đặc trưng của mô hình khớp với FEATURE_COLUMNS (không kiểm tra lại mỗi lần dự đoán).
+        - Dựng sẵn các bảng tra cứu dict từ các LabelEncoder, để không phải gọi LabelEncoder.transform cho từng giá trị.
+        - Dựng FlatForest (backend 'flat') và lưới dự đoán (grid mode) nếu cần.
+        """
+        if getattr(model, 'n_features_in_', len(FEATURE_COLUMNS)) != len(FEATURE_COLUMNS):
+            raise ValueError(f"Mô hình có {model.n_features_in_} đặc trưng, cần {len(FEATURE_COLUMNS)}")
+        feature_names = getattr(model, 'feature_names_in_', None)
+        if feature_names is not None and list(feature_names) != FEATURE_COLUMNS:
+            raise ValueError("Thứ tự đặc trưng của mô hình không khớp với FEATURE_COLUMNS")
+
+        if self.inference_backend != 'flat':
+            flat_forest = None
+        elif flat_forest is None:
+            try:
+                flat_forest = FlatForest.from_estimator(model)
+            except TypeError as e:
+                # Mô hình không phải rừng cây hồi quy: quay về dùng model.predict của sklearn
+                logger.warning("Không dùng được backend 'flat'. Dùng sklearn.", extra={'fields': {'error': str(e)}})
+
+        if self.use_grid:
+            grid = self._build_grid(model, encoders, grid)
+        else:
+            grid = None
+
+        return ModelSnapshot(
+            model=model,
+            encoders=encoders,
+            mae=mae,
+            r2=r2,
+            data_hash=data_hash,
+            lookups={
+                col: {value: code for code, value in enumerate(encoder.classes_)}
+                for col, encoder in encoders.items()
+            },
+            category_choices={col: ', '.join(encoder.classes_) for col, encoder in encoders.items()},
+            flat_forest=flat_forest,
+            grid=grid,
+            version=next(self._versions),
+            source=source,
+            training_duration=training_duration,
+            labelled_rows=labelled_rows,
+            training_config=training_config,
+        )
+
+    def _publish(self, snapshot):
+        """
+        Đưa ảnh chụp mới vào phục vụ bằng một phép gán tham chiếu (nguyên tử với các luồng đang dự đoán).
+        Các yêu cầu đang xử lý vẫn dùng ảnh chụp cũ mà chúng đã đọc; kết quả chúng ghi vào bộ nhớ đệm
+        mang phiên bản cũ nên không bao giờ được trả cho yêu cầu dùng ảnh chụp mới.
+        """
+        self._snapshot = snapshot
+        self.cache.clear() # Giải phóng các kết quả của mô hình cũ
+
+    @staticmethod
+    def _grid_category_sizes(encoders):
+        """Số mức của 9 đặc trưng rời rạc theo thứ tự FEATURE_COLUMNS (các cờ nhị phân có 2 mức)."""
+        return tuple(
+            len(encoders[col[:-len('_encoded')]].classes_) if col.endswith('_encoded') else 2
+            for col in FEATURE_COLUMNS[1:-1]
+        )
+
+    def _build_grid(self, model, encoders, grid=None):
+        """Dựng lưới dự đoán cho mô hình (dùng lại lưới grid đã có nếu cùng cấu hình)."""
+        experience_grid, allowance_grid = self.grid_axes
+        sizes = self._grid_category_sizes(encoders)
+        if grid is not None and grid.matches(
+                sizes,
+                grid.experience_grid if experience_grid is None else experience_grid,
+                grid.allowance_grid if allowance_grid is None else allowance_grid):
+            return grid
+        # Dùng model.predict của sklearn: hiệu quả hơn FlatForest khi dự đoán hàng triệu dòng
+        return PredictionGrid.build(model.predict, sizes, experience_grid, allowance_grid)
+
+    def enable_grid(self, experience_grid=None, allowance_grid=None):
+        """
+        Bật grid mode với lưới kinh nghiệm/phụ cấp tùy chọn (None: dùng lưới mặc định).
+        Nếu mô hình đã sẵn sàng thì lưới được dựng ngay (rồi thay ảnh chụp); nếu chưa thì dựng sau khi huấn luyện hoặc tải.
+        """
+        self.use_grid = True
+        self.grid_axes = (experience_grid, allowance_grid)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            grid = self._build_grid(snapshot.model, snapshot.encoders, snapshot.grid)
+            self._publish(replace(snapshot, grid=grid, version=next(self._versions)))
+
+    @staticmethod
+    def _flat_forest_arrays(snapshot):
+        """Trả về các mảng của rừng cây đã làm phẳng để lưu vào gói mô hình (None nếu mô hình không hỗ trợ)."""
+        try:
+            forest = snapshot.flat_forest or FlatForest.from_estimator(snapshot.model)
+        except TypeError:
+            return None
+        return forest.to_arrays()
+
+    def _row_buffer(self):
+        """Trả về bộ đệm hàng (1 x số đặc trưng) kiểu float32 của luồng hiện tại, cấp phát một lần cho mỗi luồng."""
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+        return row
+
+    def save_model(self, path=None, snapshot=None):
+        """
+        Lưu gói mô hình (mô hình, các LabelEncoder, MAE/R2, thứ tự đặc trưng và mã băm dữ liệu) xuống đĩa.
+        Gói được ghi vào file tạm rồi đổi tên, nên các tiến trình khác không bao giờ đọc phải file ghi dở.
+        path: Đường dẫn file (mặc định DEFAULT_MODEL_PATH).
+        snapshot: Ảnh chụp cần lưu (mặc định ảnh chụp đang phục vụ).
+        """
+        snapshot = snapshot or self._snapshot
+        if snapshot is None:
+            raise Exception("Mô hình chưa được huấn luyện. Vui lòng huấn luyện mô hình trước.")
+
+        path = path or DEFAULT_MODEL_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        bundle = {
+            'version': MODEL_BUNDLE_VERSION,
+            'model': snapshot.model,
+            'encoders': snapshot.encoders,
+            'mae': snapshot.mae,
+            'r2': snapshot.r2,
+            'feature_columns': list(FEATURE_COLUMNS),
+            'data_hash': snapshot.data_hash,
+            # Các mảng nút của rừng cây đã làm phẳng: được memory-map khi tải, nên các worker dùng chung trang nhớ
+            'flat_forest': self._flat_forest_arrays(snapshot),
+            # Lưới dự đoán tính sẵn (nếu grid mode đang bật), để lần khởi động sau không phải dựng lại
+            'grid': snapshot.grid.to_arrays() if snapshot.grid is not None else None,
+            # Số dòng đầu tiên của kho dữ liệu thực tế đã được dùng khi huấn luyện (0: chỉ dữ liệu tổng hợp)
+            'labelled_rows': snapshot.labelled_rows,
+            'training_config': snapshot.training_config,
+            'training_duration': snapshot.training_duration,
+        }
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        # Không nén (compress=0) để các mảng NumPy có thể được memory-map khi tải
+        joblib.dump(bundle, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+        return path
+
+    def load_model(self, path=None, mmap_mode='r'):
+        """
+        Tải gói mô hình đã lưu và đưa vào phục vụ. Trả về True nếu tải thành công, False nếu file không tồn tại
+        hoặc lỗi thời (khác phiên bản gói, khác thứ tự đặc trưng hoặc khác tham số tạo dữ liệu).
+        mmap_mode: Chế độ memory-map của joblib cho các mảng NumPy ('r': chỉ đọc, các tiến trình dùng chung trang nhớ).
+        """
+        snapshot = self._load_snapshot(path, mmap_mode)
+        if snapshot is None:
+            return False
+        self._publish(snapshot)
+        return True
+
+    def _load_snapshot(self, path=None, mmap_mode='r'):
+        """Đọc gói mô hình thành một ảnh chụp (chưa đưa vào phục vụ); trả về None nếu thiếu hoặc lỗi thời."""
+        path = path or DEFAULT_MODEL_PATH
+        if not os.path.exists(path):
+            logger.warning("Không tìm thấy gói mô hình", extra={'fields': {'path': path}})
+            return None
+
+        try:
+            bundle = joblib.load(path, mmap_mode=mmap_mode)
         except Exception as e:
-            # In ra thông báo lỗi nếu có vấn đề trong quá trình huấn luyện
-            print(f"Lỗi khi huấn luyện mô hình: {e}")
-            self.is_trained = False # Đảm bảo cờ trạng thái là False nếu huấn luyện thất bại
+            logger.error("Lỗi khi tải gói mô hình", extra={'fields': {'path': path, 'error': str(e)}})
+            return None
+
+        if not isinstance(bundle, dict) or bundle.get('version') != MODEL_BUNDLE_VERSION:
+            logger.warning("Gói mô hình có phiên bản không phù hợp. Cần huấn luyện lại.", extra={'fields': {'path': path}})
+            return None
+        if bundle.get('feature_columns') != FEATURE_COLUMNS:
+            logger.warning("Thứ tự đặc trưng trong gói mô hình không khớp. Cần huấn luyện lại.",
+                           extra={'fields': {'path': path}})
+            return None
+        if bundle.get('data_hash') != self.data_source.fingerprint():
+            logger.warning("Gói mô hình được huấn luyện trên dữ liệu khác. Cần huấn luyện lại.",
+                           extra={'fields': {'path': path}})
+            return None
+
+        flat_arrays = bundle.get('flat_forest')
+        grid_arrays = bundle.get('grid')
+        try:
+            return self._build_snapshot(
+                bundle['model'], bundle['encoders'], bundle['mae'], bundle['r2'], bundle['data_hash'],
+                flat_forest=FlatForest.from_arrays(flat_arrays) if flat_arrays is not None else None,
+                grid=PredictionGrid.from_arrays(grid_arrays) if grid_arrays is not None else None,
+                source='load',
+                training_duration=bundle.get('training_duration'),
+                labelled_rows=bundle.get('labelled_rows', 0),
+                training_config=bundle.get('training_config'),
+            )
+        except ValueError as e:
+            logger.warning("Gói mô hình không hợp lệ. Cần huấn luyện lại.",
+                           extra={'fields': {'path': path, 'error': str(e)}})
+            return None
+
+    def load_or_train(self, path=None):
+        """
+        Tải gói mô hình nếu còn hợp lệ; nếu thiếu hoặc lỗi thời thì huấn luyện lại và lưu gói mới.
+        Trả về True nếu mô hình sẵn sàng để dự đoán.
+        """
+        if self.is_trained:
+            return True
+        if self.load_model(path):
+            return True
+        if not self.train_model():
             return False
+        try:
+            self.save_model(path)
+        except Exception as e:
+            # Không lưu được gói mô hình không ảnh hưởng đến việc dự đoán trong tiến trình hiện tại
+            logger.error("Lỗi khi lưu gói mô hình",
+                         extra={'fields': {'path': path or DEFAULT_MODEL_PATH, 'error': str(e)}})
+        return True
+
+    def reload_async(self, path=None, retrain=False):
+        """
+        Tải lại mô hình trên một luồng nền, không chặn các yêu cầu dự đoán đang xử lý:
+        ảnh chụp mới được dựng xong hoàn toàn rồi mới thay vào bằng một phép gán.
+        retrain=False: đọc lại gói mô hình tại path; retrain=True: huấn luyện lại rồi lưu gói mới vào path.
+        Trả về False nếu đang có một lần tải lại khác chạy (chỉ chạy một lần tại một thời điểm).
+        """
+        with self._reload_lock:
+            if self._reload_status['state'] == 'running':
+                return False
+            self._reload_status = {'state': 'running', 'retrain': retrain, 'started_at': time.time()}
+        thread = threading.Thread(target=self._reload, args=(path, retrain), name='model-reload', daemon=True)
+        thread.start()
+        return True
+
+    def _reload(self, path, retrain):
+        """Thân luồng nền của reload_async: dựng ảnh chụp mới, đưa vào phục vụ và ghi lại trạng thái."""
+        status = dict(self._reload_status)
+        try:
+            if retrain:
+                snapshot = self._train_snapshot()
+                self.save_model(path, snapshot)
+            else:
+                snapshot = self._load_snapshot(path)
+                if snapshot is None:
+                    raise Exception("Không tải được gói mô hình hợp lệ.")
+            self._publish(snapshot)
+            status.update(state='succeeded', version=snapshot.version)
+        except Exception as e:
+            status.update(state='failed', error=str(e))
+        status['finished_at'] = time.time()
+        status['duration_s'] = round(status['finished_at'] - status['started_at'], 3)
+        with self._reload_lock:
+            self._reload_status = status
+
+    def get_reload_status(self):
+        """Trả về trạng thái lần tải lại mô hình chạy nền gần nhất ('idle', 'running', 'succeeded', 'failed')."""
+        with self._reload_lock:
+            return dict(self._reload_status)
 
     def get_model_performance(self):
         """
         Trả về thông tin hiệu suất của mô hình (MAE và R2).
         Trả về None nếu mô hình chưa được huấn luyện.
         """
-        if not self.is_trained:
+        snapshot = self._snapshot
+        if snapshot is None:
             return None
         return {
-            'mae': self.mae,
-            'r2': self.r2
+            'mae': snapshot.mae,
+            'r2': snapshot.r2
         }
 
+    def get_model_info(self):
+        """Trả về phiên bản, nguồn gốc và thời điểm tạo của ảnh chụp mô hình đang phục vụ (None nếu chưa có)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return {
+            'version': snapshot.version,
+            'source': snapshot.source,
+            'created_at': snapshot.created_at,
+            'training_duration': snapshot.training_duration,
+            'labelled_rows': snapshot.labelled_rows,
+            'training_config': snapshot.training_config,
+        }
+
+    def get_cache_stats(self):
+        """Trả về các bộ đếm hit/miss/eviction của bộ nhớ đệm kết quả dự đoán."""
+        return self.cache.stats()
+
     def get_categorical_levels(self, category_name):
         """
         Lấy danh sách các mức độ (levels) của một biến phân loại đã được mã hóa.
@@ -126,69 +615,111 @@ class SalaryPredictionEngine:
                        position, contract_type, special_skills, work_area, client_type, allowances_percentage):
         """
         Dự đoán lương với thông tin đã nhập từ người dùng.
-        Thực hiện kiểm tra đầu vào và mã hóa các biến phân loại trước khi dự đoán.
+        Dữ liệu đầu vào được kiểm tra và mã hóa qua lược đồ của Request_schema (xem predict_record).
         """
-        if not self.is_trained:
+        return self.predict_record({
+            'experience': experience, 'education': education, 'certificate': certificate,
+            'night_shift': night_shift, 'overtime': overtime, 'position': position,
+            'contract_type': contract_type, 'special_skills': special_skills, 'work_area': work_area,
+            'client_type': client_type, 'allowances_percentage': allowances_percentage,
+        })[1]
+
+    def predict_record(self, data):
+        """
+        Dự đoán lương cho một hồ sơ dạng dict (JSON của /predict, có các khóa giống tham số của predict_salary).
+        Các trường được chuyển kiểu, chuẩn hóa, kiểm tra và mã hóa trong một lượt duyệt (prediction_schema).
+        Trả về (dict các trường đã chuẩn hóa, lương dự đoán); ném ValueError/TypeError nếu dữ liệu không hợp lệ.
+        Ảnh chụp mô hình được đọc đúng một lần ở đầu, nên cả yêu cầu dùng cùng một cặp mô hình/encoder
+        kể cả khi mô hình được thay trong lúc đang dự đoán.
+        """
+        timer = stage_timer() # Histogram thời gian của các giai đoạn: encode, grid_lookup, cache_lookup, model_predict
+        snapshot, fields, features = self.encode_record(data)
+        timer.mark('encode')
+        return fields, self.predict_encoded(snapshot, features, timer)
+
+    def encode_record(self, data):
+        """
+        Kiểm tra đầy đủ (kiểu, phạm vi, danh mục) và mã hóa một hồ sơ bằng ảnh chụp mô hình hiện tại, không dự đoán.
+        Trả về (ảnh chụp, dict các trường đã chuẩn hóa, tuple đặc trưng) để truyền cho predict_encoded;
+        ném ValueError/TypeError nếu dữ liệu không hợp lệ.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
             # Ném lỗi nếu mô hình chưa được huấn luyện trước khi dự đoán
             raise Exception("Mô hình chưa được huấn luyện. Vui lòng huấn luyện mô hình trước.")
+        # Vector đặc trưng đã mã hóa theo đúng thứ tự FEATURE_COLUMNS (đã được kiểm tra khi tải mô hình)
+        fields, features = prediction_schema.encode(data, snapshot)
+        return snapshot, fields, features
 
-        try:
-            # --- Xác thực và mã hóa dữ liệu đầu vào ---
-            # 1. Kinh nghiệm: Đảm bảo giá trị nằm trong phạm vi hợp lý
-            if not (0 <= experience <= 50):
-                raise ValueError("Kinh nghiệm phải là số và nằm trong khoảng từ 0 đến 50 năm.")
-
-            # 2. Trình độ học vấn: Kiểm tra xem trình độ có hợp lệ không và mã hóa
-            if education not in self.encoders['Trình độ'].classes_:
-                raise ValueError(f"Trình độ '{education}' không hợp lệ! Chọn: {', '.join(self.encoders['Trình độ'].classes_)}")
-            edu_encoded = self.encoders['Trình độ'].transform([education])[0]
-
-            # 6. Chức vụ: Kiểm tra và mã hóa chức vụ
-            if position not in self.encoders['Chức vụ'].classes_:
-                raise ValueError(f"Chức vụ '{position}' không hợp lệ! Chọn: {', '.join(self.encoders['Chức vụ'].classes_)}")
-            position_encoded = self.encoders['Chức vụ'].transform([position])[0]
-
-            # 7. Loại hợp đồng: Kiểm tra và mã hóa loại hợp đồng
-            if contract_type not in self.encoders['Loại hợp đồng'].classes_:
-                raise ValueError(f"Loại hợp đồng '{contract_type}' không hợp lệ! Chọn: {', '.join(self.encoders['Loại hợp đồng'].classes_)}")
-            contract_type_encoded = self.encoders['Loại hợp đồng'].transform([contract_type])[0]
-
-            # 9. Khu vực làm việc: Kiểm tra và mã hóa khu vực
-            if work_area not in self.encoders['Khu vực làm việc'].classes_:
-                raise ValueError(f"Khu vực làm việc '{work_area}' không hợp lệ! Chọn: {', '.join(self.encoders['Khu vực làm việc'].classes_)}")
-            work_area_encoded = self.encoders['Khu vực làm việc'].transform([work_area])[0]
-
-            # 10. Loại hình mục tiêu: Kiểm tra và mã hóa loại hình mục tiêu
-            if client_type not in self.encoders['Loại hình mục tiêu'].classes_:
-                raise ValueError(f"Loại hình mục tiêu '{client_type}' không hợp lệ! Chọn: {', '.join(self.encoders['Loại hình mục tiêu'].classes_)}")
-            client_type_encoded = self.encoders['Loại hình mục tiêu'].transform([client_type])[0]
-
-            # 11. Tỷ lệ phụ cấp: Kiểm tra giá trị tỷ lệ phần trăm hợp lệ (từ 0 đến 30%)
-            if not (0 <= allowances_percentage <= 0.30):
-                raise ValueError("Tỷ lệ phụ cấp phải là số từ 0 đến 30%.")
-
-            # Tạo một DataFrame mới từ dữ liệu đầu vào đã được mã hóa.
-            # Đảm bảo thứ tự các cột phải khớp CHÍNH XÁC với thứ tự các cột đã dùng để huấn luyện mô hình (X_train)
-            new_data = pd.DataFrame([[
-                experience, edu_encoded, certificate, night_shift, overtime,
-                position_encoded, contract_type_encoded, special_skills,
-                work_area_encoded, client_type_encoded, allowances_percentage
-            ]], columns=[
-                "Kinh nghiệm", "Trình độ_encoded", "Chứng chỉ", "Ca đêm", "Làm thêm",
-                "Chức vụ_encoded", "Loại hợp đồng_encoded", "Kỹ năng đặc thù",
-                "Khu vực làm việc_encoded", "Loại hình mục tiêu_encoded", "Tỷ lệ phụ cấp"
-            ])
-
-            # Dự đoán lương sử dụng mô hình đã huấn luyện (đây là mức lương cơ bản từ ML)
-            predicted_salary = self.model.predict(new_data)[0]
-
-            return predicted_salary
-        except ValueError as ve:
-            # Xử lý các lỗi liên quan đến giá trị đầu vào không hợp lệ
-            raise ValueError(f"Lỗi xác thực dữ liệu đầu vào: {ve}")
-        except Exception as e:
-            # Xử lý các lỗi khác trong quá trình dự đoán (ví dụ: mô hình không hợp lệ)
-            raise Exception(f"Lỗi trong quá trình dự đoán: {e}")
+    def predict_encoded(self, snapshot, features, timer=None):
+        """Dự đoán lương cho tuple đặc trưng đã mã hóa bằng snapshot (kết quả của encode_record)."""
+        timer = timer or stage_timer()
+
+        # Grid mode: trả lời bằng phép tính chỉ số và nội suy trên lưới tính sẵn (None nếu nằm ngoài lưới)
+        if snapshot.grid is not None:
+            predicted_salary = snapshot.grid.lookup(features[1:-1], features[0], features[-1])
+            timer.mark('grid_lookup')
+            if predicted_salary is not None:
+                return predicted_salary
+
+        # Khi bộ nhớ đệm được bật, kinh nghiệm và tỷ lệ phụ cấp được lượng tử hóa để dùng làm khóa,
+        # và mô hình cũng dự đoán trên giá trị đã lượng tử hóa để kết quả lưu đệm luôn khớp với khóa
+        if self.cache.enabled:
+            features = (round(features[0] / EXPERIENCE_QUANTUM) * EXPERIENCE_QUANTUM, *features[1:-1],
+                        round(features[-1] / ALLOWANCE_QUANTUM) * ALLOWANCE_QUANTUM)
+            cache_key = (snapshot.version, features)
+            cached = self.cache.get(cache_key)
+            timer.mark('cache_lookup')
+            if cached is not None:
+                return cached
+
+        # Dự đoán lương sử dụng mô hình đã huấn luyện (đây là mức lương cơ bản từ ML)
+        if self.batcher is not None:
+            # Gộp với các yêu cầu đồng thời khác thành một lần gọi mô hình
+            predicted_salary = self.batcher.predict(snapshot, features)
+        else:
+            # Ghi dữ liệu đã mã hóa vào bộ đệm hàng float32 cấp phát sẵn (không tạo DataFrame)
+            row = self._row_buffer()
+            row[0] = features
+            predicted_salary = snapshot.predict_array(row)[0]
+        timer.mark('model_predict')
+        if self.cache.enabled:
+            self.cache.put(cache_key, predicted_salary)
+
+        return predicted_salary
+
+    def predict_batch(self, records):
+        """
+        Dự đoán lương cho nhiều hồ sơ cùng lúc.
+        records: Danh sách dict (JSON) có các khóa giống tham số của predict_salary
+                 (experience, education, certificate, ..., allowances_percentage).
+        Mỗi dòng được kiểm tra và mã hóa bằng cùng lược đồ với predict_record, sau đó mô hình chỉ được gọi
+        một lần trên một mảng duy nhất. Trả về danh sách (cùng thứ tự với records), mỗi phần tử là
+        {'predicted_salary': ...} nếu hợp lệ hoặc {'error': ...} nếu dòng đó không hợp lệ.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise Exception("Mô hình chưa được huấn luyện. Vui lòng huấn luyện mô hình trước.")
+
+        results = []
+        rows, row_index = [], []
+        for i, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("Invalid record format. Expected a JSON object.")
+                rows.append(prediction_schema.encode(record, snapshot)[1])
+            except (ValueError, TypeError) as e:
+                results.append({'error': str(e)})
+                continue
+            results.append(None)
+            row_index.append(i)
+
+        # Ma trận đặc trưng của các dòng hợp lệ theo đúng thứ tự FEATURE_COLUMNS
+        if rows:
+            predictions = snapshot.predict_array(np.array(rows, dtype=np.float32))
+            for i, value in zip(row_index, predictions):
+                results[i] = {'predicted_salary': float(value)}
+        return results
 
 # Khởi tạo một đối tượng SalaryPredictionEngine toàn cục.
 # Đối tượng này sẽ được sử dụng bởi ứng dụng Flask để huấn luyện mô hình và thực hiện dự đoán.
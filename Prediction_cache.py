@@ -0,0 +1,73 @@
+# Prediction_cache.py - Bộ nhớ đệm kết quả dự đoán có giới hạn kích thước (LRU) và thời gian sống (TTL)
+
+import threading # Khóa bảo vệ bộ nhớ đệm khi nhiều luồng dự đoán cùng lúc
+import time # Đồng hồ đơn điệu (monotonic) để tính thời điểm hết hạn
+from collections import OrderedDict # Giữ thứ tự truy cập để loại bỏ phần tử ít dùng gần đây nhất
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, ttl=3600.0):
+        self.maxsize = maxsize     # Số phần tử tối đa (0: tắt bộ nhớ đệm)
+        self.ttl = ttl             # Thời gian sống của mỗi phần tử tính bằng giây (None hoặc 0: không hết hạn)
+        self._data = OrderedDict() # key -> (giá trị, thời điểm hết hạn)
+        self._lock = threading.Lock()
+        # Các bộ đếm thống kê
+        self.hits = 0              # Số lần tìm thấy kết quả trong bộ nhớ đệm
+        self.misses = 0            # Số lần không tìm thấy (phải gọi mô hình)
+        self.evictions = 0         # Số phần tử bị loại vì bộ nhớ đệm đầy
+        self.expirations = 0       # Số phần tử bị loại vì hết hạn
+        self.invalidations = 0     # Số lần toàn bộ bộ nhớ đệm bị xóa (huấn luyện lại hoặc tải mô hình mới)
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, key):
+        """Trả về giá trị đã lưu cho key, hoặc None nếu không có hoặc đã hết hạn."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key) # Đánh dấu vừa được sử dụng
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Lưu giá trị cho key; loại bỏ phần tử ít dùng gần đây nhất nếu vượt quá maxsize."""
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Xóa toàn bộ bộ nhớ đệm (gọi khi mô hình được huấn luyện lại hoặc tải lại)."""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Trả về các bộ đếm thống kê của bộ nhớ đệm."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,119 @@
+# Prediction_grid.py - Lưới dự đoán tính sẵn cho toàn bộ không gian đặc trưng rời rạc ("grid mode")
+#
+# Ngoài kinh nghiệm và tỷ lệ phụ cấp, mọi đặc trưng đều là biến phân loại hoặc nhị phân
+# (4 x 2 x 2 x 2 x 3 x 2 x 2 x 4 x 5 = 7.680 tổ hợp). Sau khi huấn luyện, lưới này tính sẵn dự đoán
+# cho mọi tổ hợp nhân với một lưới giá trị kinh nghiệm/phụ cấp, rồi trả lời yêu cầu bằng phép tính chỉ số
+# và nội suy song tuyến tính trên hai trục liên tục. Truy vấn nằm ngoài lưới trả về None để dùng lại mô hình.
+
+import numpy as np
+
+# Lưới mặc định cho hai trục liên tục
+DEFAULT_EXPERIENCE_GRID = np.arange(0, 51, 1.0)      # 0, 1, ..., 50 năm
+DEFAULT_ALLOWANCE_GRID = np.linspace(0.0, 0.30, 7)   # 0%, 5%, ..., 30%
+
+# Số tổ hợp phân loại được dự đoán trong mỗi lần gọi mô hình khi dựng lưới (giới hạn bộ nhớ tạm)
+BUILD_CHUNK_COMBOS = 256
+
+
+class PredictionGrid:
+    def __init__(self, values, category_sizes, experience_grid, allowance_grid):
+        self.values = values                     # Mảng float32 (số tổ hợp phân loại, số mốc kinh nghiệm, số mốc phụ cấp)
+        self.category_sizes = tuple(int(n) for n in category_sizes) # Số mức của 9 đặc trưng rời rạc theo thứ tự FEATURE_COLUMNS
+        self.experience_grid = np.asarray(experience_grid, dtype=np.float64)
+        self.allowance_grid = np.asarray(allowance_grid, dtype=np.float64)
+        # Bước nhảy (stride) của từng đặc trưng rời rạc khi tính chỉ số phẳng của tổ hợp
+        strides, stride = [], 1
+        for size in reversed(self.category_sizes):
+            strides.append(stride)
+            stride *= size
+        self._strides = tuple(reversed(strides))
+        # Lưu sẵn dạng danh sách Python để tra cứu nhanh ở đường dự đoán đơn lẻ
+        self._exp_points = self.experience_grid.tolist()
+        self._allow_points = self.allowance_grid.tolist()
+
+    @classmethod
+    def build(cls, predict, category_sizes, experience_grid=None, allowance_grid=None):
+        """
+        Dựng lưới bằng cách gọi predict (hàm nhận ma trận float32 theo thứ tự FEATURE_COLUMNS)
+        trên mọi tổ hợp phân loại nhân với lưới kinh nghiệm x phụ cấp.
+        category_sizes: số mức của (Trình độ, Chứng chỉ, Ca đêm, Làm thêm, Chức vụ, Loại hợp đồng,
+                        Kỹ năng đặc thù, Khu vực làm việc, Loại hình mục tiêu).
+        """
+        experience_grid = np.asarray(DEFAULT_EXPERIENCE_GRID if experience_grid is None else experience_grid, dtype=np.float64)
+        allowance_grid = np.asarray(DEFAULT_ALLOWANCE_GRID if allowance_grid is None else allowance_grid, dtype=np.float64)
+        if len(experience_grid) < 2 or len(allowance_grid) < 2:
+            raise ValueError("Mỗi trục liên tục của lưới cần ít nhất 2 mốc")
+        if np.any(np.diff(experience_grid) <= 0) or np.any(np.diff(allowance_grid) <= 0):
+            raise ValueError("Các mốc của lưới phải tăng dần")
+
+        combos = np.indices(category_sizes).reshape(len(category_sizes), -1).T # (số tổ hợp, 9)
+        n_exp, n_allow = len(experience_grid), len(allowance_grid)
+        exp_col = np.repeat(experience_grid, n_allow)   # Mốc kinh nghiệm cho mỗi ô (kinh nghiệm, phụ cấp)
+        allow_col = np.tile(allowance_grid, n_exp)      # Mốc phụ cấp cho mỗi ô
+        cells = n_exp * n_allow
+
+        values = np.empty((len(combos), n_exp, n_allow), dtype=np.float32)
+        for start in range(0, len(combos), BUILD_CHUNK_COMBOS):
+            chunk = combos[start:start + BUILD_CHUNK_COMBOS]
+            X = np.empty((len(chunk) * cells, 11), dtype=np.float32)
+            X[:, 0] = np.tile(exp_col, len(chunk))
+            X[:, 1:10] = np.repeat(chunk, cells, axis=0)
+            X[:, 10] = np.tile(allow_col, len(chunk))
+            values[start:start + len(chunk)] = predict(X).reshape(len(chunk), n_exp, n_allow)
+        return cls(values, category_sizes, experience_grid, allowance_grid)
+
+    def to_arrays(self):
+        """Trả về dict các mảng để lưu vào gói mô hình."""
+        return {
+            'values': self.values,
+            'category_sizes': np.array(self.category_sizes),
+            'experience_grid': self.experience_grid,
+            'allowance_grid': self.allowance_grid,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Tạo lại lưới từ dict của to_arrays() (mảng values có thể là memory-map)."""
+        return cls(arrays['values'], arrays['category_sizes'], arrays['experience_grid'], arrays['allowance_grid'])
+
+    def matches(self, category_sizes, experience_grid, allowance_grid):
+        """Kiểm tra lưới có được dựng với cùng cấu hình hay không (để dùng lại lưới đã lưu)."""
+        return (self.category_sizes == tuple(category_sizes)
+                and np.array_equal(self.experience_grid, experience_grid)
+                and np.array_equal(self.allowance_grid, allowance_grid))
+
+    @staticmethod
+    def _locate(points, x):
+        """Tìm đoạn [points[i], points[i+1]] chứa x; trả về (i, tỷ lệ nội suy) hoặc None nếu x nằm ngoài lưới."""
+        if not (points[0] <= x <= points[-1]):
+            return None
+        # Tìm tuyến tính: lưới chỉ có vài chục mốc nên nhanh hơn np.searchsorted cho một giá trị
+        i = 0
+        last = len(points) - 2
+        while i < last and x >= points[i + 1]:
+            i += 1
+        return i, (x - points[i]) / (points[i + 1] - points[i])
+
+    def lookup(self, codes, experience, allowances_percentage):
+        """
+        Trả về dự đoán nội suy cho một hồ sơ, hoặc None nếu hồ sơ nằm ngoài lưới.
+        codes: 9 mã của các đặc trưng rời rạc theo thứ tự FEATURE_COLUMNS (bỏ kinh nghiệm và phụ cấp).
+        """
+        index = 0
+        for code, size, stride in zip(codes, self.category_sizes, self._strides):
+            if not (0 <= code < size) or code != int(code): # Ví dụ: cờ nhị phân khác 0/1
+                return None
+            index += int(code) * stride
+
+        exp_pos = self._locate(self._exp_points, experience)
+        allow_pos = self._locate(self._allow_points, allowances_percentage)
+        if exp_pos is None or allow_pos is None:
+            return None
+        i, tx = exp_pos
+        j, ta = allow_pos
+
+        # Nội suy song tuyến tính trên hai trục liên tục (chuyển ô 2x2 sang float Python để tính bằng float64)
+        (v00, v01), (v10, v11) = self.values[index, i:i + 2, j:j + 2].tolist()
+        low = v00 * (1 - ta) + v01 * ta
+        high = v10 * (1 - ta) + v11 * ta
+        return low * (1 - tx) + high * tx
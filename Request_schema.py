@@ -0,0 +1,145 @@
+# Request_schema.py - Lược đồ khai báo của một hồ sơ dự đoán và bộ mã hóa/giải mã JSON nhanh (orjson)
+#
+# - PREDICTION_FIELDS khai báo 11 trường của hồ sơ (kiểu, giá trị mặc định, phạm vi hợp lệ, cột phân loại).
+#   Lược đồ được biên dịch một lần khi nạp module thành một bộ các bước (tên, hàm chuyển đổi, mặc định, ...),
+#   rồi mỗi hồ sơ chỉ cần một lượt duyệt: chuyển kiểu, chuẩn hóa, kiểm tra phạm vi và mã hóa biến phân loại.
+#   Cùng một lược đồ được dùng cho /predict, /predict/batch, /predict/ai-adjust và /api/confirmed-salaries.
+# - json_provider(app): bộ JSON của Flask dùng orjson (request.get_json() và jsonify) nếu đã cài,
+#   ngược lại giữ bộ mặc định (module json của Python).
+# Thông báo lỗi giữ nguyên định dạng cũ: lỗi chuyển kiểu là thông báo của float()/int(), lỗi giá trị
+# (ngoài phạm vi, không có trong danh mục) có tiền tố "Lỗi xác thực dữ liệu đầu vào: ".
+
+from dataclasses import dataclass
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson # Tùy chọn: mã hóa/giải mã JSON nhanh hơn nhiều lần so với module json
+except ImportError:
+    orjson = None
+
+VALIDATION_ERROR_PREFIX = "Lỗi xác thực dữ liệu đầu vào: "
+
+
+class ValidationError(ValueError):
+    """Giá trị đúng kiểu nhưng không hợp lệ (ngoài phạm vi, không có trong danh mục)."""
+
+    def __init__(self, message):
+        super().__init__(VALIDATION_ERROR_PREFIX + message)
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str                 # Khóa trong JSON (trùng tên tham số của predict_salary)
+    kind: str                 # 'float', 'int', 'text' (bỏ khoảng trắng hai đầu) hoặc 'upper' (thêm viết hoa)
+    default: object = None    # Giá trị khi thiếu trường (None: bắt buộc, thiếu thì float()/int() báo lỗi)
+    column: str = None        # Cột phân loại: giá trị được mã hóa bằng bảng tra cứu của mô hình
+    bounds: tuple = None      # (nhỏ nhất, lớn nhất) của giá trị hợp lệ
+    bounds_message: str = None
+
+
+# Các trường của một hồ sơ, theo đúng thứ tự đặc trưng của mô hình (FEATURE_COLUMNS của Predict_engine)
+PREDICTION_FIELDS = (
+    FieldSpec('experience', 'float', bounds=(0, 50),
+              bounds_message="Kinh nghiệm phải là số và nằm trong khoảng từ 0 đến 50 năm."),
+    FieldSpec('education', 'upper', '', column="Trình độ"),
+    FieldSpec('certificate', 'int', 0),
+    FieldSpec('night_shift', 'int', 0),
+    FieldSpec('overtime', 'int', 0),
+    FieldSpec('position', 'text', '', column="Chức vụ"),
+    FieldSpec('contract_type', 'text', '', column="Loại hợp đồng"),
+    FieldSpec('special_skills', 'int', 0),
+    FieldSpec('work_area', 'text', '', column="Khu vực làm việc"),
+    FieldSpec('client_type', 'text', '', column="Loại hình mục tiêu"),
+    FieldSpec('allowances_percentage', 'float', 0.0, bounds=(0, 0.30),
+              bounds_message="Tỷ lệ phụ cấp phải là số từ 0 đến 30%."),
+)
+
+
+def _text_converter(name, upper):
+    def convert(value):
+        if not isinstance(value, str):
+            raise TypeError(f"Trường '{name}' phải là chuỗi, không phải '{type(value).__name__}'")
+        return value.strip().upper() if upper else value.strip()
+    return convert
+
+
+def _converter(spec):
+    if spec.kind == 'float':
+        return float
+    if spec.kind == 'int':
+        return int
+    if spec.kind in ('text', 'upper'):
+        return _text_converter(spec.name, spec.kind == 'upper')
+    raise ValueError(f"Kiểu trường '{spec.kind}' không hợp lệ! Chọn: float, int, text, upper")
+
+
+class PredictionSchema:
+    def __init__(self, fields=PREDICTION_FIELDS):
+        self.fields = fields
+        # Biên dịch: mỗi trường thành một bộ giá trị phẳng để vòng lặp không phải tra thuộc tính của FieldSpec
+        self._steps = tuple(
+            (spec.name, _converter(spec), spec.default, spec.column,
+             spec.bounds[0] if spec.bounds else None, spec.bounds[1] if spec.bounds else None, spec.bounds_message)
+            for spec in fields
+        )
+
+    def normalize(self, data):
+        """
+        Chuyển kiểu và chuẩn hóa các trường của hồ sơ data (dict từ JSON), không kiểm tra phạm vi/danh mục.
+        Trả về dict có các khóa giống tham số của predict_salary; ném ValueError/TypeError nếu sai kiểu.
+        """
+        return {name: convert(data.get(name, default)) for name, convert, default, *_ in self._steps}
+
+    def encode(self, data, snapshot):
+        """
+        Một lượt duyệt: chuyển kiểu, chuẩn hóa, kiểm tra phạm vi và mã hóa biến phân loại bằng bảng tra cứu
+        của snapshot (ModelSnapshot). Trả về (dict các trường đã chuẩn hóa, tuple đặc trưng theo thứ tự của mô hình).
+        Ném ValueError/TypeError nếu sai kiểu, ValidationError nếu giá trị không hợp lệ.
+        """
+        fields = {}
+        features = []
+        for name, convert, default, column, low, high, message in self._steps:
+            value = convert(data.get(name, default))
+            fields[name] = value
+            if column is not None:
+                try:
+                    features.append(snapshot.encode(column, value))
+                except ValueError as e:
+                    raise ValidationError(str(e)) from None
+            else:
+                if low is not None and not (low <= value <= high):
+                    raise ValidationError(message)
+                features.append(value)
+        return fields, tuple(features)
+
+
+# Lược đồ dùng chung, biên dịch một lần khi nạp module
+prediction_schema = PredictionSchema()
+
+
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Bộ JSON của Flask dùng orjson; kiểu không hỗ trợ sẵn (ngày giờ, Decimal, ...) xử lý như bộ mặc định."""
+
+        def _option(self):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            return option | orjson.OPT_SORT_KEYS if self.sort_keys else option
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=self._option()).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # Ghi thẳng bytes của orjson vào phản hồi (không giải mã rồi mã hóa lại chuỗi)
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default, option=self._option())
+            return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def json_provider(app):
+    """Bộ JSON cho app.json: orjson nếu đã cài, ngược lại bộ mặc định của Flask."""
+    if orjson is not None:
+        return OrjsonProvider(app)
+    return DefaultJSONProvider(app)
@@ -0,0 +1,60 @@
+# Response_cache.py - Bộ nhớ đệm phản hồi HTTP dựng sẵn theo phiên bản mô hình (trang chủ, /api/model-info)
+#
+# Nội dung các trang này chỉ thay đổi khi mô hình được thay (huấn luyện lại/tải lại), nên mỗi phản hồi được
+# dựng một lần cho mỗi phiên bản mô hình: nội dung đã mã hóa thành bytes, kèm ETag mạnh (mã băm nội dung).
+# Lần truy cập sau chỉ là một phép tra dict; client gửi If-None-Match trùng ETag nhận 304 không kèm nội dung.
+
+import hashlib # ETag: mã băm SHA-256 của nội dung
+import os # Đọc cấu hình từ biến môi trường
+import threading # Khóa khi dựng phản hồi (tránh nhiều luồng dựng cùng một trang)
+from dataclasses import dataclass
+
+# Thời gian client/proxy được dùng lại phản hồi mà không hỏi lại server (giây).
+# 0: luôn hỏi lại (Cache-Control: no-cache) và nhận 304 nếu nội dung không đổi
+RESPONSE_CACHE_MAX_AGE = int(os.getenv('RESPONSE_CACHE_MAX_AGE', '0'))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes         # Nội dung đã mã hóa (UTF-8)
+    content_type: str
+    etag: str           # Giá trị ETag (không có dấu ngoặc kép)
+    cache_control: str
+
+
+class ResponseCache:
+    def __init__(self, max_age=RESPONSE_CACHE_MAX_AGE):
+        self.cache_control = f"public, max-age={max_age}" if max_age > 0 else 'no-cache'
+        self._entries = {} # tên -> (phiên bản, CachedResponse); chỉ giữ phiên bản mới nhất của mỗi tên
+        self._lock = threading.Lock()
+        self.hits = 0      # Số lần dùng lại phản hồi đã dựng
+        self.builds = 0    # Số lần phải dựng phản hồi
+
+    def get(self, name, version, build, content_type):
+        """
+        Trả về CachedResponse của name cho phiên bản version; gọi build() (trả về str hoặc bytes)
+        để dựng nội dung nếu chưa có hoặc phiên bản đã thay đổi.
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version: # Một luồng khác vừa dựng xong
+                self.hits += 1
+                return entry[1]
+            body = build()
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            response = CachedResponse(body, content_type, hashlib.sha256(body).hexdigest()[:32], self.cache_control)
+            self._entries[name] = (version, response)
+            self.builds += 1
+            return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'builds': self.builds}
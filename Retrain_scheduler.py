@@ -0,0 +1,418 @@
+# Retrain_scheduler.py - Huấn luyện lại mô hình định kỳ với dữ liệu lương thực tế đã xác nhận
+#
+# - LabelledStore: kho dữ liệu chỉ ghi nối (append-only, mỗi dòng một bản ghi JSON) chứa các mức lương thực tế.
+# - run_retrain_job: chạy trong một tiến trình con riêng (không bao giờ trên luồng xử lý yêu cầu), huấn luyện mô hình
+#   ứng viên trên dữ liệu tổng hợp + dữ liệu thực tế, chấm điểm cả mô hình ứng viên và mô hình hiện tại trên cùng
+#   một tập kiểm tra, và chỉ công bố (ghi đè gói mô hình) khi MAE của ứng viên không tệ hơn.
+# - RetrainScheduler: luồng nền kích hoạt huấn luyện lại theo lịch hoặc khi đủ số dòng dữ liệu mới, rồi nạp
+#   gói mô hình vừa công bố vào engine (thay ảnh chụp mô hình bằng một phép gán, không chặn các yêu cầu).
+#   Với nhiều tiến trình phục vụ (worker gunicorn/uvicorn), chỉ tiến trình giữ khóa bầu chọn (file
+#   <kho dữ liệu>.scheduler.lock) huấn luyện lại; các tiến trình khác chỉ nạp gói mô hình mới khi file bị thay.
+#   Khóa được nhả khi tiến trình dẫn đầu kết thúc, và một tiến trình khác nhận thay ở vòng kiểm tra kế tiếp.
+
+import concurrent.futures # Chạy công việc huấn luyện trong một tiến trình con
+import contextlib # Khóa file độc quyền dạng context manager
+import json # Định dạng bản ghi của kho dữ liệu
+import logging # Ghi log qua logger của ứng dụng (App_logging)
+import multiprocessing # Ngữ cảnh 'spawn': tiến trình con sạch, không kế thừa luồng của server
+import os
+import threading # Luồng nền của bộ lập lịch, khóa ghi của kho dữ liệu
+import time
+import uuid # Mã định danh của từng bản ghi (dùng để chia tập kiểm tra cố định)
+from dataclasses import replace # Gắn lưới dự đoán vào ảnh chụp ứng viên
+import pandas as pd
+from App_logging import LOGGER_NAME
+
+try:
+    import fcntl # Khóa file giữa các tiến trình (chỉ có trên Unix)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(f'{LOGGER_NAME}.retrain')
+
+# Cấu hình (có thể thay đổi qua biến môi trường)
+LABELLED_DATA_PATH = os.getenv('LABELLED_DATA_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'labelled_salaries.jsonl'))
+# Tắt mặc định. Khi bật, mọi tiến trình phục vụ đều nạp gói mô hình mới, nhưng chỉ một tiến trình huấn luyện lại
+RETRAIN_ENABLED = os.getenv('RETRAIN_ENABLED', '0') == '1'
+RETRAIN_INTERVAL = float(os.getenv('RETRAIN_INTERVAL', '86400'))         # Huấn luyện lại theo lịch (giây) nếu có dữ liệu mới
+RETRAIN_MIN_ROWS = int(os.getenv('RETRAIN_MIN_ROWS', '500'))             # Huấn luyện lại ngay khi có đủ số dòng mới
+RETRAIN_POLL_INTERVAL = float(os.getenv('RETRAIN_POLL_INTERVAL', '30'))  # Chu kỳ kiểm tra của luồng nền (giây)
+RETRAIN_MAE_TOLERANCE = float(os.getenv('RETRAIN_MAE_TOLERANCE', '0'))   # Cho phép MAE ứng viên tệ hơn tối đa bao nhiêu (tỷ lệ)
+
+# Mỗi bản ghi thuộc tập kiểm tra nếu mã định danh của nó rơi vào 1 trong HOLDOUT_BUCKETS nhóm (20%)
+HOLDOUT_BUCKETS = 5
+
+
+def make_labelled_record(fields, salary):
+    """
+    Kiểm tra một hồ sơ (các khóa giống tham số của predict_salary) cùng mức lương thực tế đã xác nhận,
+    và trả về bản ghi để lưu vào kho. Ném ValueError nếu dữ liệu không hợp lệ.
+    """
+    from Create_data import EDUCATION_LEVELS, POSITION_LEVELS, CONTRACT_TYPES, WORK_AREAS, CLIENT_TYPES
+    from Predict_engine import FIELD_COLUMNS
+
+    if not (0 <= fields['experience'] <= 50):
+        raise ValueError("Kinh nghiệm phải là số và nằm trong khoảng từ 0 đến 50 năm.")
+    levels = {
+        'education': EDUCATION_LEVELS, 'position': POSITION_LEVELS, 'contract_type': CONTRACT_TYPES,
+        'work_area': WORK_AREAS, 'client_type': CLIENT_TYPES,
+    }
+    for name, choices in levels.items():
+        if fields[name] not in choices:
+            raise ValueError(f"{FIELD_COLUMNS[name]} '{fields[name]}' không hợp lệ! Chọn: {', '.join(choices)}")
+    for name in ('certificate', 'night_shift', 'overtime', 'special_skills'):
+        if fields[name] not in (0, 1):
+            raise ValueError(f"{FIELD_COLUMNS[name]} phải là 0 hoặc 1.")
+    if not (0 <= fields['allowances_percentage'] <= 0.30):
+        raise ValueError("Tỷ lệ phụ cấp phải là số từ 0 đến 30%.")
+    salary = float(salary)
+    if not (salary > 0):
+        raise ValueError("Mức lương thực tế phải là số dương.")
+
+    return {
+        'id': uuid.uuid4().hex,
+        'received_at': time.time(),
+        **{name: fields[name] for name in FIELD_COLUMNS},
+        'salary': salary,
+    }
+
+
+def records_to_frame(records):
+    """Chuyển các bản ghi của kho sang DataFrame cùng tên cột với bộ dữ liệu tổng hợp, kèm cột 'holdout'."""
+    from Predict_engine import FIELD_COLUMNS
+
+    frame = pd.DataFrame({col: [r[name] for r in records] for name, col in FIELD_COLUMNS.items()})
+    frame["Lương"] = [r['salary'] for r in records]
+    frame['holdout'] = [int(r['id'][:8], 16) % HOLDOUT_BUCKETS == 0 for r in records]
+    return frame
+
+
+class LabelledStore:
+    def __init__(self, path=None):
+        self.path = path or LABELLED_DATA_PATH
+        self._lock = threading.Lock()
+        self._counted_bytes = 0 # Số byte đầu file đã được đếm (để đếm số dòng tăng dần)
+        self._count = 0
+
+    def append(self, records):
+        """
+        Ghi nối các bản ghi vào cuối file trong một lần ghi, dưới khóa file độc quyền,
+        nên các worker/tiến trình khác nhau có thể ghi cùng lúc mà không làm xen lẫn các dòng.
+        """
+        if not records:
+            return 0
+        data = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd) # Đóng file cũng nhả khóa
+        return len(records)
+
+    def count(self):
+        """Số bản ghi hoàn chỉnh trong kho (chỉ đọc phần mới được ghi thêm kể từ lần đếm trước)."""
+        with self._lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(self._counted_bytes)
+                    chunk = f.read()
+            except FileNotFoundError:
+                return 0
+            complete = chunk.rfind(b'\n') + 1 # Bỏ qua dòng cuối đang ghi dở (nếu có)
+            self._count += chunk.count(b'\n', 0, complete)
+            self._counted_bytes += complete
+            return self._count
+
+    def read(self, limit=None):
+        """Đọc tối đa limit bản ghi hoàn chỉnh đầu tiên của kho (bỏ qua các dòng hỏng)."""
+        records = []
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if limit is not None and len(records) >= limit:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Bỏ qua dòng hỏng trong kho dữ liệu", extra={'fields': {'path': self.path}})
+        except FileNotFoundError:
+            pass
+        return records
+
+
+@contextlib.contextmanager
+def _exclusive_lock(path):
+    """Khóa file độc quyền không chờ; trả về False nếu một tiến trình khác đang giữ khóa."""
+    if fcntl is None:
+        yield True
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def run_retrain_job(model_path, labelled_path, use_grid=False, tolerance=0.0, force=False):
+    """
+    Công việc huấn luyện lại (chạy trong tiến trình con). Trả về dict mô tả kết quả:
+    status 'published' (gói mô hình mới đã thay gói cũ), 'rejected' (MAE ứng viên tệ hơn) hoặc 'skipped'.
+    """
+    from sklearn.metrics import mean_absolute_error
+    from Predict_engine import SalaryPredictionEngine
+
+    start = time.perf_counter()
+    with _exclusive_lock(f"{model_path}.lock") as acquired:
+        if not acquired:
+            return {'status': 'skipped', 'reason': "Một tiến trình khác đang huấn luyện lại."}
+
+        # Engine riêng của tiến trình con (không dựng lưới khi chấm điểm; dựng sau nếu ứng viên được công bố)
+        engine = SalaryPredictionEngine(inference_backend='sklearn', use_grid=False)
+        current = engine._load_snapshot(model_path)
+        records = LabelledStore(labelled_path).read()
+        if current is not None and not force and len(records) <= current.labelled_rows:
+            return {'status': 'skipped', 'reason': "Không có dữ liệu mới kể từ lần huấn luyện trước."}
+
+        labelled = records_to_frame(records) if records else None
+        candidate, X_test, y_test = engine.train_candidate(labelled)
+        encoders = candidate.encoders
+
+        # Chấm điểm mô hình hiện tại trên cùng tập kiểm tra (chỉ so sánh được khi cách mã hóa giống nhau)
+        current_mae = None
+        if current is not None and all(
+                list(current.encoders[col].classes_) == list(encoder.classes_) for col, encoder in encoders.items()):
+            current_mae = float(mean_absolute_error(y_test, current.predict_array(X_test)))
+
+        result = {
+            'labelled_rows': len(records),
+            'holdout_rows': len(X_test),
+            'candidate_mae': float(candidate.mae),
+            'current_mae': current_mae,
+        }
+        if current_mae is not None and candidate.mae > current_mae * (1 + tolerance):
+            result['status'] = 'rejected'
+        else:
+            if use_grid:
+                engine.use_grid = True
+                candidate = replace(candidate, grid=engine._build_grid(candidate.model, candidate.encoders))
+            # Ghi gói ứng viên rồi thay gói hiện tại bằng một phép đổi tên nguyên tử
+            candidate_path = f"{model_path}.candidate"
+            engine.save_model(candidate_path, candidate)
+            os.replace(candidate_path, model_path)
+            result['status'] = 'published'
+        result['duration_s'] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def _file_stamp(path):
+    """Dấu hiệu nhận biết file đã bị thay (thời điểm sửa, inode, kích thước); None nếu file không tồn tại."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+class RetrainScheduler:
+    def __init__(self, engine, store=None, model_path=None, interval=None, min_rows=None,
+                 poll_interval=None, tolerance=None):
+        from Predict_engine import DEFAULT_MODEL_PATH
+
+        self.engine = engine
+        self.store = store or LabelledStore()
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self.interval = RETRAIN_INTERVAL if interval is None else interval
+        self.min_rows = RETRAIN_MIN_ROWS if min_rows is None else min_rows
+        self.poll_interval = RETRAIN_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.tolerance = RETRAIN_MAE_TOLERANCE if tolerance is None else tolerance
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._leader_file = None # File khóa bầu chọn đang giữ (tiến trình này là tiến trình huấn luyện lại)
+        self._request_path = f"{self.store.path}.retrain-request" # Yêu cầu huấn luyện lại gửi từ mọi tiến trình
+        self._last_run = time.monotonic() # Lịch huấn luyện lại được tính từ lúc khởi động
+        self._attempted_rows = 0 # Số dòng trong kho ở lần huấn luyện lại gần nhất (kể cả khi ứng viên bị từ chối)
+        self._bundle_stamp = _file_stamp(self.model_path)
+        self._lock = threading.Lock()
+        self._status = {'state': 'idle', 'runs': 0, 'published': 0, 'rejected': 0, 'last_result': None}
+
+    def start(self):
+        """Khởi động luồng nền (một lần)."""
+        if self._thread is None:
+            self._bundle_stamp = _file_stamp(self.model_path)
+            self._try_lead()
+            self._thread = threading.Thread(target=self._run, name='retrain-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Dừng luồng nền (chờ công việc huấn luyện đang chạy kết thúc)."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._leader_file is not None:
+            self._leader_file.close() # Đóng file cũng nhả khóa bầu chọn
+            self._leader_file = None
+
+    @property
+    def leader(self):
+        return self._leader_file is not None or fcntl is None
+
+    def _try_lead(self):
+        """Giành khóa bầu chọn (không chờ); trả về True nếu tiến trình này là tiến trình huấn luyện lại."""
+        if self.leader:
+            return True
+        path = f"{self.store.path}.scheduler.lock"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._leader_file = f # Giữ file mở (và khóa) đến khi tiến trình kết thúc hoặc stop()
+        logger.info("Tiến trình này chạy huấn luyện lại", extra={'fields': {'pid': os.getpid()}})
+        return True
+
+    def request_retrain(self):
+        """
+        Yêu cầu huấn luyện lại ngay ở vòng kiểm tra kế tiếp của tiến trình dẫn đầu (bỏ qua lịch và ngưỡng số dòng).
+        Yêu cầu được ghi thành file nên có thể gửi từ bất kỳ worker nào.
+        """
+        directory = os.path.dirname(self._request_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._request_path, 'a'):
+            pass
+        self._wake.set()
+
+    def _take_retrain_request(self):
+        try:
+            os.remove(self._request_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def pending_rows(self):
+        """Số dòng dữ liệu thực tế chưa được dùng để huấn luyện mô hình đang phục vụ."""
+        snapshot = self.engine.snapshot
+        return max(self.store.count() - (snapshot.labelled_rows if snapshot is not None else 0), 0)
+
+    def get_status(self):
+        with self._lock:
+            status = dict(self._status)
+        status['pending_rows'] = self.pending_rows()
+        status['running'] = self._thread is not None
+        status['leader'] = self.leader
+        return status
+
+    def _set_status(self, **changes):
+        with self._lock:
+            self._status.update(changes)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Lỗi trong bộ lập lịch huấn luyện lại")
+
+    def check(self):
+        """
+        Một vòng kiểm tra: nạp gói mô hình mới (nếu tiến trình khác vừa công bố) và, nếu là tiến trình dẫn đầu,
+        huấn luyện lại khi đến hạn.
+        """
+        self._reload_if_changed()
+        if not self._try_lead():
+            return
+        force = self._take_retrain_request()
+        # Chỉ tính các dòng mới kể từ lần thử gần nhất, để ứng viên bị từ chối không bị huấn luyện lại liên tục
+        snapshot = self.engine.snapshot
+        trained_rows = max(snapshot.labelled_rows if snapshot is not None else 0, self._attempted_rows)
+        new_rows = self.store.count() - trained_rows
+        due = (force
+               or (self.min_rows > 0 and new_rows >= self.min_rows)
+               or (new_rows > 0 and time.monotonic() - self._last_run >= self.interval))
+        if due:
+            self.retrain(force=force)
+
+    def _reload_if_changed(self):
+        """Nạp lại gói mô hình khi file đã bị thay (bởi worker khác hoặc bởi tiến trình huấn luyện)."""
+        stamp = _file_stamp(self.model_path)
+        if stamp is None or stamp == self._bundle_stamp:
+            return
+        self._bundle_stamp = stamp
+        if self.engine.load_model(self.model_path):
+            logger.info("Đã nạp gói mô hình mới", extra={'fields': {
+                'model_version': self.engine.model_version, 'labelled_rows': self.engine.snapshot.labelled_rows}})
+
+    def retrain(self, force=False):
+        """Chạy công việc huấn luyện lại trong tiến trình con và chờ kết quả (chặn luồng gọi, không phải luồng yêu cầu)."""
+        self._last_run = time.monotonic()
+        self._attempted_rows = self.store.count()
+        self._set_status(state='training', started_at=time.time())
+        try:
+            context = multiprocessing.get_context('spawn')
+            # Mỗi lần huấn luyện dùng một tiến trình mới: bộ nhớ huấn luyện được trả lại cho hệ điều hành khi xong
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_retrain_job, self.model_path, self.store.path,
+                                     self.engine.use_grid, self.tolerance, force).result()
+        except Exception as e:
+            logger.exception("Huấn luyện lại thất bại")
+            result = {'status': 'failed', 'error': str(e)}
+
+        logger.info("Kết thúc huấn luyện lại", extra={'fields': result})
+        if result['status'] == 'published':
+            self._reload_if_changed()
+        with self._lock:
+            self._status['runs'] += 1
+            if result['status'] in ('published', 'rejected'):
+                self._status[result['status']] += 1
+            self._status.update(state='idle', last_result=result, finished_at=time.time())
+        return result
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler(engine=None):
+    """
+    Trả về RetrainScheduler dùng chung của tiến trình (tạo lười ở lần gọi đầu tiên, chưa khởi động luồng nền).
+    Sau khi fork, tiến trình con tạo bộ lập lịch mới vì luồng nền của tiến trình cha không tồn tại trong con.
+    """
+    global _scheduler, _scheduler_pid
+    if _scheduler is None or _scheduler_pid != os.getpid():
+        with _scheduler_lock:
+            if _scheduler is None or _scheduler_pid != os.getpid():
+                if engine is None:
+                    from Predict_engine import prediction_engine as engine
+                _scheduler = RetrainScheduler(engine)
+                _scheduler_pid = os.getpid()
+    return _scheduler
@@ -0,0 +1,66 @@
+# Stub_llm_server.py - Server giả lập API generateContent của Gemini để kiểm thử /predict/ai-adjust cục bộ
+#
+# Ví dụ:
+#     python Stub_llm_server.py --port 8765 --reply "+5% vì có kinh nghiệm làm ngân hàng" --delay 0.2
+#     GEMINI_API_URL=http://127.0.0.1:8765/generate GEMINI_API_KEY=test python Main.py
+
+import argparse # Đọc tham số dòng lệnh
+import json # Đọc/ghi nội dung JSON
+import threading # Bộ đếm số yêu cầu an toàn giữa các luồng
+import time # Giả lập độ trễ của API
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(reply, delay, fail_first):
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Giữ kết nối (keep-alive) để kiểm tra connection pooling
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            with lock:
+                counter['requests'] += 1
+                number = counter['requests']
+            time.sleep(delay)
+
+            if number <= fail_first:
+                # Giả lập lỗi tạm thời để kiểm tra cơ chế thử lại
+                self._send(503, {'error': {'message': 'stub: service unavailable'}})
+                return
+            prompt = payload['contents'][0]['parts'][0]['text']
+            self._send(200, {'candidates': [{'content': {'parts': [{'text': reply}], 'role': 'model'}}],
+                             'stub': {'request_number': number, 'prompt_chars': len(prompt)}})
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass # Không ghi log mỗi yêu cầu
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server giả lập Gemini generateContent")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--reply', default='+5% do hồ sơ có nhiều yếu tố tích cực.', help="Nội dung trả lời của AI giả lập")
+    parser.add_argument('--delay', type=float, default=0.0, help="Độ trễ giả lập cho mỗi yêu cầu (giây)")
+    parser.add_argument('--fail-first', type=int, default=0, help="Trả lỗi 503 cho N yêu cầu đầu tiên")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.reply, args.delay, args.fail_first))
+    print(f"Stub Gemini đang chạy tại http://{args.host}:{args.port}/generate")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+# Training_pipeline.py - Cấu hình huấn luyện và huấn luyện theo khối (out-of-core) cho bộ dữ liệu lớn
+#
+# - TrainingConfig: chọn mô hình (RandomForest, ExtraTrees, HistGradientBoosting), n_jobs, max_samples,
+#   độ sâu cây và kiểu dữ liệu; đọc từ biến môi trường TRAIN_*.
+# - Nguồn dữ liệu theo khối: GeneratedChunks (dữ liệu tổng hợp của Create_data), ParquetChunks (các row group
+#   của một file Parquet) và ArrowChunks (các record batch của một file Arrow IPC); chọn bằng DATASET_PATH.
+#   Mỗi khối được tải, mã hóa và huấn luyện riêng nên không cần giữ toàn bộ dữ liệu trong RAM.
+# - fit_chunked: với rừng cây, mỗi khối huấn luyện một nhóm cây trong một tiến trình riêng (song song theo khối,
+#   tăng tốc gần tuyến tính theo số lõi) rồi gộp thành một rừng; với HistGradientBoosting, các khối được
+#   đưa lần lượt vào mô hình warm_start (mỗi khối thêm một số vòng boosting).
+
+import hashlib # Mã băm nội dung file dữ liệu (nhận biết gói mô hình lỗi thời)
+import os # Đọc cấu hình từ biến môi trường
+from dataclasses import dataclass, asdict
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed # Huấn luyện song song các khối trong các tiến trình riêng
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, HistGradientBoostingRegressor
+from sklearn.preprocessing import LabelEncoder
+from threadpoolctl import threadpool_limits # Giới hạn số luồng OpenMP của HistGradientBoosting theo n_jobs
+
+# Các mô hình được hỗ trợ
+ESTIMATORS = ('random_forest', 'extra_trees', 'hist_gradient_boosting')
+FOREST_ESTIMATORS = ('random_forest', 'extra_trees')
+# Kiểu dữ liệu của ma trận đặc trưng khi huấn luyện
+DTYPES = ('float32', 'float64')
+
+# Tỷ lệ dữ liệu giữ lại làm tập kiểm tra và số dòng kiểm tra tối đa khi huấn luyện theo khối
+TEST_SIZE = 0.2
+MAX_HOLDOUT_ROWS = 200_000
+
+
+def _env(name, cast, default):
+    """Đọc biến môi trường name và chuyển kiểu bằng cast (chuỗi rỗng hoặc 'none': None)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ('', 'none'):
+        return None
+    return cast(value)
+
+
+def _max_samples(value):
+    """max_samples: số thực trong (0, 1] là tỷ lệ, số nguyên là số dòng."""
+    number = float(value)
+    return number if number <= 1 else int(number)
+
+
+@dataclass(frozen=True)
+class TrainingConfig:
+    estimator: str = 'random_forest' # Một trong ESTIMATORS
+    n_estimators: int = 100          # Số cây (rừng cây) hoặc số vòng boosting (max_iter của HistGradientBoosting)
+    n_jobs: int = -1                 # Số lõi dùng khi huấn luyện (-1: tất cả); không ảnh hưởng kết quả của rừng cây
+    max_samples: float = None        # Số dòng (hoặc tỷ lệ) bootstrap cho mỗi cây; None: toàn bộ
+    max_depth: int = None            # Độ sâu tối đa của cây; None: không giới hạn
+    min_samples_leaf: int = 1        # Số mẫu tối thiểu ở mỗi lá (tăng lên để giới hạn kích thước rừng trên dữ liệu lớn)
+    dtype: str = 'float32'           # Kiểu dữ liệu của ma trận đặc trưng ('float32' hoặc 'float64')
+    learning_rate: float = 0.1       # Chỉ dùng cho HistGradientBoosting
+    random_state: int = 42
+    out_of_core_rows: int = 1_000_000 # Bộ dữ liệu nhiều dòng hơn thì huấn luyện theo khối (fit_chunked)
+
+    def __post_init__(self):
+        if self.estimator not in ESTIMATORS:
+            raise ValueError(f"Mô hình '{self.estimator}' không hợp lệ! Chọn: {', '.join(ESTIMATORS)}")
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Kiểu dữ liệu '{self.dtype}' không hợp lệ! Chọn: {', '.join(DTYPES)}")
+
+    @classmethod
+    def from_env(cls):
+        """Đọc cấu hình từ các biến môi trường TRAIN_ESTIMATOR, TRAIN_N_ESTIMATORS, TRAIN_N_JOBS, TRAIN_MAX_SAMPLES,
+        TRAIN_MAX_DEPTH, TRAIN_MIN_SAMPLES_LEAF, TRAIN_DTYPE, TRAIN_LEARNING_RATE, TRAIN_OUT_OF_CORE_ROWS."""
+        defaults = cls()
+        return cls(
+            estimator=_env('TRAIN_ESTIMATOR', str, defaults.estimator),
+            n_estimators=_env('TRAIN_N_ESTIMATORS', int, defaults.n_estimators),
+            n_jobs=_env('TRAIN_N_JOBS', int, defaults.n_jobs),
+            max_samples=_env('TRAIN_MAX_SAMPLES', _max_samples, defaults.max_samples),
+            max_depth=_env('TRAIN_MAX_DEPTH', int, defaults.max_depth),
+            min_samples_leaf=_env('TRAIN_MIN_SAMPLES_LEAF', int, defaults.min_samples_leaf),
+            dtype=_env('TRAIN_DTYPE', str, defaults.dtype),
+            learning_rate=_env('TRAIN_LEARNING_RATE', float, defaults.learning_rate),
+            out_of_core_rows=_env('TRAIN_OUT_OF_CORE_ROWS', int, defaults.out_of_core_rows),
+        )
+
+    @property
+    def is_forest(self):
+        return self.estimator in FOREST_ESTIMATORS
+
+    def build_estimator(self, **overrides):
+        """Tạo mô hình sklearn chưa huấn luyện theo cấu hình (overrides: ghi đè tham số của mô hình)."""
+        if self.estimator == 'hist_gradient_boosting':
+            params = dict(max_iter=self.n_estimators, max_depth=self.max_depth, learning_rate=self.learning_rate,
+                          min_samples_leaf=max(self.min_samples_leaf, 1), random_state=self.random_state)
+            params.update(overrides)
+            return HistGradientBoostingRegressor(**params)
+        params = dict(n_estimators=self.n_estimators, n_jobs=self.n_jobs, max_depth=self.max_depth,
+                      min_samples_leaf=self.min_samples_leaf, max_samples=self.max_samples,
+                      random_state=self.random_state)
+        if self.estimator == 'extra_trees' and self.max_samples is not None:
+            params['bootstrap'] = True # ExtraTrees chỉ lấy mẫu dòng khi bật bootstrap
+        params.update(overrides)
+        cls = RandomForestRegressor if self.estimator == 'random_forest' else ExtraTreesRegressor
+        return cls(**params)
+
+    def fit(self, X, y):
+        """Huấn luyện một mô hình mới trên toàn bộ (X, y) trong bộ nhớ và trả về mô hình."""
+        model = self.build_estimator()
+        with threadpool_limits(limits=self._thread_limit(), user_api='openmp'):
+            model.fit(np.asarray(X, dtype=self.dtype), y)
+        return _for_serving(model)
+
+    def _thread_limit(self):
+        """Số luồng OpenMP (HistGradientBoosting) tương ứng với n_jobs (None: không giới hạn)."""
+        if self.n_jobs is None or self.n_jobs < 0:
+            return None
+        return self.n_jobs
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _for_serving(model):
+    """
+    n_jobs chỉ dùng khi huấn luyện: khi phục vụ, mỗi lần dự đoán một dòng mà phải khởi động nhóm luồng
+    của joblib thì chậm hơn nhiều so với dự đoán tuần tự.
+    """
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=None)
+    return model
+
+
+def fit_category_encoders():
+    """LabelEncoder cho từng cột phân loại, học từ danh sách mức của Create_data (không cần đọc dữ liệu)."""
+    from Create_data import EDUCATION_LEVELS, POSITION_LEVELS, CONTRACT_TYPES, WORK_AREAS, CLIENT_TYPES
+    levels = {
+        "Trình độ": EDUCATION_LEVELS,
+        "Chức vụ": POSITION_LEVELS,
+        "Loại hợp đồng": CONTRACT_TYPES,
+        "Khu vực làm việc": WORK_AREAS,
+        "Loại hình mục tiêu": CLIENT_TYPES,
+    }
+    return {col: LabelEncoder().fit(list(values)) for col, values in levels.items()}
+
+
+def encode_frame(df, encoders, dtype='float32'):
+    """
+    Mã hóa một DataFrame (cùng tên cột với bộ dữ liệu) thành ma trận đặc trưng theo thứ tự FEATURE_COLUMNS
+    và vector lương, ghi thẳng vào một mảng cấp phát một lần (không tạo thêm các cột *_encoded).
+    """
+    from Predict_engine import FEATURE_COLUMNS
+
+    X = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=dtype)
+    for j, col in enumerate(FEATURE_COLUMNS):
+        if col.endswith('_encoded'):
+            source = col[:-len('_encoded')]
+            codes = pd.Categorical(df[source], categories=encoders[source].classes_).codes
+            if (codes < 0).any():
+                invalid = df[source][codes < 0].iloc[0]
+                raise ValueError(f"{source} '{invalid}' không hợp lệ! Chọn: {', '.join(encoders[source].classes_)}")
+            X[:, j] = codes
+        else:
+            X[:, j] = df[col].to_numpy()
+    y = df["Lương"].to_numpy(dtype=np.float64)
+    return X, y
+
+
+class GeneratedChunks:
+    """Bộ dữ liệu tổng hợp (n, seed) của Create_data, chia theo khối DATASET_CHUNK_ROWS dòng."""
+
+    def __init__(self, n=None, seed=None):
+        from Create_data import DEFAULT_N_SAMPLES, DEFAULT_SEED
+        self.n = DEFAULT_N_SAMPLES if n is None else n
+        self.seed = DEFAULT_SEED if seed is None else seed
+
+    @property
+    def n_rows(self):
+        return self.n
+
+    def __len__(self):
+        from Create_data import dataset_chunk_count
+        return dataset_chunk_count(self.n)
+
+    def load(self, index):
+        from Create_data import generate_chunk
+        return generate_chunk(self.n, self.seed, index)
+
+    def load_all(self):
+        from Create_data import get_dataset
+        return get_dataset(self.n, self.seed)
+
+    def fingerprint(self):
+        from Create_data import dataset_fingerprint
+        return dataset_fingerprint(self.n, self.seed)
+
+
+class ParquetChunks:
+    """Bộ dữ liệu trong một file Parquet; mỗi row group là một khối (cần pyarrow)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self):
+        from Create_data import _pyarrow
+        return _pyarrow().parquet.ParquetFile(self.path, memory_map=True)
+
+    @property
+    def n_rows(self):
+        return self._file().metadata.num_rows
+
+    def __len__(self):
+        return self._file().num_row_groups
+
+    def load(self, index):
+        return self._file().read_row_group(index).to_pandas()
+
+    def load_all(self):
+        from Create_data import load_dataset_file
+        return load_dataset_file(self.path)
+
+    def fingerprint(self):
+        return _file_fingerprint(self.path)
+
+
+class ArrowChunks:
+    """Bộ dữ liệu trong một file Arrow IPC (memory-map); mỗi record batch là một khối (cần pyarrow)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _reader(self):
+        from Create_data import _pyarrow
+        pa = _pyarrow()
+        return pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+
+    @property
+    def n_rows(self):
+        reader = self._reader()
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+    def __len__(self):
+        return self._reader().num_record_batches
+
+    def load(self, index):
+        return self._reader().get_batch(index).to_pandas()
+
+    def load_all(self):
+        from Create_data import load_dataset_file
+        return load_dataset_file(self.path)
+
+    def fingerprint(self):
+        return _file_fingerprint(self.path)
+
+
+def _file_fingerprint(path):
+    """Mã băm dữ liệu ghi trong metadata của file (export_dataset); nếu không có: SHA-256 nội dung file."""
+    from Create_data import dataset_file_fingerprint
+    fingerprint = dataset_file_fingerprint(path)
+    if fingerprint:
+        return fingerprint
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_source(path=None):
+    """
+    Nguồn dữ liệu huấn luyện: file path (mặc định biến môi trường DATASET_PATH) nếu có, theo phần mở rộng
+    (.arrow/.feather/.ipc: ArrowChunks, còn lại: ParquetChunks); nếu không: dữ liệu tổng hợp (GeneratedChunks).
+    """
+    from Create_data import is_arrow_file
+    path = path or os.getenv('DATASET_PATH')
+    if not path:
+        return GeneratedChunks()
+    if not os.path.exists(path):
+        raise Exception(f"Không tìm thấy file dữ liệu: {path}")
+    return ArrowChunks(path) if is_arrow_file(path) else ParquetChunks(path)
+
+
+def _split_holdout(X, y, holdout_rows):
+    """Tách holdout_rows dòng cuối của khối làm tập kiểm tra (các dòng trong khối đã ngẫu nhiên)."""
+    cut = len(X) - holdout_rows
+    return X[:cut], y[:cut], X[cut:], y[cut:]
+
+
+def _fit_forest_chunk(source, index, encoders, config, n_trees, seed, holdout_rows, extra_train):
+    """Huấn luyện một nhóm n_trees cây trên khối index (chạy trong tiến trình con). Trả về (mô hình, X_test, y_test)."""
+    X, y = encode_frame(source.load(index), encoders, config.dtype)
+    X_fit, y_fit, X_test, y_test = _split_holdout(X, y, min(holdout_rows, int(len(X) * TEST_SIZE)))
+    if extra_train is not None:
+        X_fit = np.concatenate([X_fit, extra_train[0]])
+        y_fit = np.concatenate([y_fit, extra_train[1]])
+    model = config.build_estimator(n_estimators=n_trees, random_state=int(seed), n_jobs=1)
+    model.fit(X_fit, y_fit)
+    return model, X_test.copy(), y_test.copy()
+
+
+def fit_chunked(source, config, encoders=None, extra_train=None):
+    """
+    Huấn luyện theo khối trên source (GeneratedChunks/ParquetChunks/ArrowChunks) mà không tải toàn bộ dữ liệu vào RAM.
+    extra_train: (X, y) đã mã hóa được thêm vào dữ liệu huấn luyện của mọi khối (ví dụ: dữ liệu thực tế).
+    Mỗi khối giữ lại một phần dòng cuối làm tập kiểm tra (tổng cộng tối đa MAX_HOLDOUT_ROWS dòng).
+    Trả về (mô hình, encoders, X_test, y_test).
+    """
+    encoders = encoders or fit_category_encoders()
+    n_chunks = len(source)
+    holdout_rows = -(-MAX_HOLDOUT_ROWS // n_chunks)
+    tests = []
+
+    if config.is_forest:
+        # Chia đều số cây cho các khối (mỗi khối ít nhất một cây); mỗi khối có seed riêng
+        trees = [len(part) for part in np.array_split(np.arange(max(config.n_estimators, n_chunks)), n_chunks)]
+        seeds = np.random.SeedSequence(config.random_state).generate_state(n_chunks)
+        results = Parallel(n_jobs=config.n_jobs if config.n_jobs is not None else 1)(
+            delayed(_fit_forest_chunk)(source, i, encoders, config, trees[i], seeds[i], holdout_rows, extra_train)
+            for i in range(n_chunks)
+        )
+        # Gộp các nhóm cây thành một rừng: dự đoán của rừng là trung bình của mọi cây
+        model = results[0][0]
+        for sub_model, _, _ in results[1:]:
+            model.estimators_ += sub_model.estimators_
+        model.set_params(n_estimators=len(model.estimators_))
+        tests = [(X_test, y_test) for _, X_test, y_test in results]
+    else:
+        # Boosting là tuần tự: mỗi khối thêm một số vòng boosting vào mô hình warm_start
+        per_chunk = max(1, config.n_estimators // n_chunks)
+        model = config.build_estimator(max_iter=per_chunk, warm_start=True, early_stopping=False)
+        with threadpool_limits(limits=config._thread_limit(), user_api='openmp'):
+            for i in range(n_chunks):
+                X, y = encode_frame(source.load(i), encoders, config.dtype)
+                X_fit, y_fit, X_test, y_test = _split_holdout(X, y, min(holdout_rows, int(len(X) * TEST_SIZE)))
+                if extra_train is not None:
+                    X_fit = np.concatenate([X_fit, extra_train[0]])
+                    y_fit = np.concatenate([y_fit, extra_train[1]])
+                model.set_params(max_iter=per_chunk * (i + 1))
+                model.fit(X_fit, y_fit)
+                tests.append((X_test.copy(), y_test.copy()))
+                del X, y, X_fit, y_fit
+        model.set_params(warm_start=False)
+
+    X_test = np.concatenate([t[0] for t in tests])
+    y_test = np.concatenate([t[1] for t in tests])
+    return _for_serving(model), encoders, X_test, y_test
+
@@ -0,0 +1 @@
+# benchmarks - Các kịch bản đo hiệu năng cho ứng dụng dự đoán lương
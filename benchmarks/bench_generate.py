@@ -0,0 +1,67 @@
+# bench_generate.py - So sánh tốc độ giữa vòng lặp generate_sample() và generate_dataset() vector hóa
+#
+# Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.bench_generate --rows 1000 100000 1000000
+
+import argparse # Đọc tham số dòng lệnh
+import time # Đo thời gian bằng đồng hồ đơn điệu (perf_counter)
+import numpy as np
+import pandas as pd
+
+import Create_data # Module tạo dữ liệu (chứa generate_sample và generate_dataset)
+
+
+def time_loop(n):
+    """Đo thời gian tạo n dòng bằng vòng lặp generate_sample() như cách cũ."""
+    rng = np.random.default_rng(42)
+    start = time.perf_counter()
+    data = [Create_data.generate_sample(rng) for _ in range(n)]
+    df = pd.DataFrame(data, columns=Create_data.COLUMNS)
+    return time.perf_counter() - start, df
+
+
+def time_vectorized(n):
+    """Đo thời gian tạo n dòng bằng generate_dataset() vector hóa."""
+    start = time.perf_counter()
+    df = Create_data.generate_dataset(n, seed=42)
+    return time.perf_counter() - start, df
+
+
+def compare_distributions(df_loop, df_vec):
+    """In ra lương trung bình theo từng biến phân loại để đối chiếu phân phối của hai cách tạo."""
+    for col in ["Trình độ", "Chức vụ", "Loại hợp đồng", "Khu vực làm việc", "Loại hình mục tiêu"]:
+        summary = pd.DataFrame({
+            'tỷ lệ (loop)': df_loop[col].value_counts(normalize=True),
+            'tỷ lệ (vector)': df_vec[col].value_counts(normalize=True),
+            'lương TB (loop)': df_loop.groupby(col)["Lương"].mean(),
+            'lương TB (vector)': df_vec.groupby(col)["Lương"].mean(),
+        })
+        print(f"\n--- {col} ---")
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(summary.round(3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tạo dữ liệu: vòng lặp so với vector hóa")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000],
+                        help="Các kích thước bộ dữ liệu cần đo")
+    parser.add_argument('--loop-limit', type=int, default=100_000,
+                        help="Bỏ qua vòng lặp generate_sample() khi số dòng lớn hơn giá trị này")
+    parser.add_argument('--check', action='store_true',
+                        help="In bảng đối chiếu phân phối giữa hai cách tạo dữ liệu")
+    args = parser.parse_args()
+
+    print(f"{'Số dòng':>12} {'Vòng lặp (s)':>14} {'Vector (s)':>12} {'Tăng tốc':>10}")
+    for n in args.rows:
+        vec_time, df_vec = time_vectorized(n)
+        if n <= args.loop_limit:
+            loop_time, df_loop = time_loop(n)
+            print(f"{n:>12,} {loop_time:>14.3f} {vec_time:>12.4f} {loop_time / vec_time:>9.0f}x")
+            if args.check:
+                compare_distributions(df_loop, df_vec)
+        else:
+            print(f"{n:>12,} {'(bỏ qua)':>14} {vec_time:>12.4f} {'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
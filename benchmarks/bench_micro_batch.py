@@ -0,0 +1,74 @@
+# bench_micro_batch.py - So sánh thông lượng và độ trễ dự đoán một dòng đồng thời, có và không gộp lô (Micro_batcher)
+#
+# Nhiều luồng cùng gọi predict_salary liên tục trong một khoảng thời gian (đã tắt bộ nhớ đệm kết quả),
+# lần lượt với MicroBatcher tắt và bật (với các thời gian chờ gom lô khác nhau).
+# Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.bench_micro_batch --threads 1 8 32 --wait-ms 0 2
+
+import argparse # Đọc tham số dòng lệnh
+import os
+import threading
+import time
+import numpy as np
+
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0') # Mỗi lần gọi đều phải chạy mô hình
+
+from Micro_batcher import MicroBatcher
+from Predict_engine import SalaryPredictionEngine
+from benchmarks.bench_predict import SAMPLE_PROFILE
+
+
+def run_load(engine, threads, seconds):
+    """threads luồng gọi predict_salary liên tục trong seconds giây; trả về (yêu cầu/giây, p50 µs, p99 µs)."""
+    rng = np.random.default_rng(0)
+    profiles = [dict(SAMPLE_PROFILE, experience=int(rng.integers(0, 11)),
+                     allowances_percentage=round(float(rng.uniform(0, 0.3)), 4)) for _ in range(256)]
+    latencies = [[] for _ in range(threads)]
+    deadline = time.perf_counter() + seconds
+
+    def worker(k):
+        samples, i = latencies[k], k
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            engine.predict_salary(**profiles[i % len(profiles)])
+            samples.append(time.perf_counter() - start)
+            i += threads
+
+    pool = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    samples = np.concatenate([np.asarray(s) for s in latencies]) * 1e6
+    return len(samples) / seconds, np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thông lượng dự đoán đồng thời có và không gộp lô")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--wait-ms', type=float, nargs='+', default=[0, 2], help="Thời gian chờ gom lô cần thử")
+    parser.add_argument('--max-rows', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=3.0, help="Thời gian đo mỗi kịch bản")
+    args = parser.parse_args()
+
+    engine = SalaryPredictionEngine(micro_batch=False)
+    if not engine.load_or_train():
+        raise SystemExit("Không thể tải hoặc huấn luyện mô hình.")
+    engine.predict_salary(**SAMPLE_PROFILE) # Khởi động (warm-up)
+
+    modes = [('không gộp', None)] + [(f"gộp, chờ {w:g} ms", MicroBatcher(args.max_rows, w)) for w in args.wait_ms]
+    print(f"{'Luồng':>6} {'Chế độ':<16} {'Yêu cầu/s':>10} {'p50 (µs)':>10} {'p99 (µs)':>10} {'Dòng/lô':>8}")
+    for threads in args.threads:
+        for name, batcher in modes:
+            engine.batcher = batcher
+            before = (batcher.batches, batcher.rows) if batcher else None
+            throughput, p50, p99 = run_load(engine, threads, args.seconds)
+            rows_per_batch = ''
+            if batcher:
+                batches, rows = batcher.batches - before[0], batcher.rows - before[1]
+                rows_per_batch = f"{rows / max(batches, 1):.1f}"
+            print(f"{threads:>6} {name:<16} {throughput:>10,.0f} {p50:>10,.0f} {p99:>10,.0f} {rows_per_batch:>8}")
+
+
+if __name__ == '__main__':
+    main()
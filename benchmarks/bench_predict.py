@@ -0,0 +1,110 @@
+# bench_predict.py - Đo chi phí mỗi lần dự đoán đơn lẻ của SalaryPredictionEngine
+#
+# Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.bench_predict --iterations 2000
+
+import argparse # Đọc tham số dòng lệnh
+import copy # Sao chép mô hình để tái hiện đường dự đoán cũ có tên cột
+import time # Đo thời gian bằng đồng hồ đơn điệu (perf_counter)
+import numpy as np
+import pandas as pd
+
+from Predict_engine import SalaryPredictionEngine, FEATURE_COLUMNS
+
+# Hồ sơ mẫu dùng cho mọi lần đo
+SAMPLE_PROFILE = {
+    'experience': 5, 'education': 'ĐH', 'certificate': 1, 'night_shift': 0, 'overtime': 1,
+    'position': 'Tổ trưởng', 'contract_type': 'Chính thức', 'special_skills': 1,
+    'work_area': 'Vùng I (TP.HCM, Hà Nội)', 'client_type': 'VIP', 'allowances_percentage': 0.1,
+}
+CATEGORICAL_VALUES = {
+    'Trình độ': 'ĐH', 'Chức vụ': 'Tổ trưởng', 'Loại hợp đồng': 'Chính thức',
+    'Khu vực làm việc': 'Vùng I (TP.HCM, Hà Nội)', 'Loại hình mục tiêu': 'VIP',
+}
+
+
+def measure(func, iterations):
+    """Gọi func() iterations lần, trả về (p50, p99, trung bình) theo micro giây."""
+    func() # Khởi động (warm-up) trước khi đo
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+    samples *= 1e6
+    return np.percentile(samples, 50), np.percentile(samples, 99), samples.mean()
+
+
+def encode_with_label_encoders(engine):
+    """Cách mã hóa cũ: kiểm tra `value in classes_` rồi gọi LabelEncoder.transform cho từng giá trị."""
+    for col, value in CATEGORICAL_VALUES.items():
+        encoder = engine.encoders[col]
+        if value not in encoder.classes_:
+            raise ValueError(value)
+        encoder.transform([value])[0]
+
+
+def encode_with_lookups(engine):
+    """Cách mã hóa mới: tra cứu trong bảng dict đã dựng sẵn."""
+    snapshot = engine.snapshot
+    for col, value in CATEGORICAL_VALUES.items():
+        snapshot.encode(col, value)
+
+
+def predict_with_dataframe(model, encoded):
+    """Cách dự đoán cũ: tạo DataFrame một dòng có tên cột rồi gọi model.predict (kèm kiểm tra tên cột)."""
+    return model.predict(pd.DataFrame([encoded], columns=FEATURE_COLUMNS))[0]
+
+
+def predict_with_row_buffer(engine, encoded):
+    """Cách dự đoán mới: ghi vào bộ đệm float32 cấp phát sẵn rồi gọi model.predict trên mảng NumPy."""
+    row = engine._row_buffer()
+    row[0] = encoded
+    return engine.model.predict(row)[0]
+
+
+def report(name, stats):
+    p50, p99, mean = stats
+    print(f"{name:<40} p50={p50:>9.1f}µs  p99={p99:>9.1f}µs  mean={mean:>9.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark dự đoán đơn lẻ")
+    parser.add_argument('--iterations', type=int, default=2000, help="Số lần đo cho mỗi kịch bản")
+    args = parser.parse_args()
+
+    engine = SalaryPredictionEngine()
+    if not engine.load_or_train():
+        raise SystemExit("Không thể tải hoặc huấn luyện mô hình.")
+
+    report("Mã hóa 5 cột (LabelEncoder.transform)", measure(lambda: encode_with_label_encoders(engine), args.iterations))
+    report("Mã hóa 5 cột (bảng tra cứu)", measure(lambda: encode_with_lookups(engine), args.iterations))
+    encoded = [5, 3, 1, 0, 1, 1, 0, 1, 0, 4, 0.1]
+    # Bản sao nông của mô hình có gắn tên cột, để tái hiện đường dự đoán cũ (mô hình học trên DataFrame)
+    named_model = copy.copy(engine.model)
+    named_model.feature_names_in_ = np.array(FEATURE_COLUMNS, dtype=object)
+    report("model.predict (DataFrame 1 dòng)", measure(lambda: predict_with_dataframe(named_model, encoded), args.iterations))
+    report("model.predict (bộ đệm float32)", measure(lambda: predict_with_row_buffer(engine, encoded), args.iterations))
+    report("predict_salary (sklearn)", measure(lambda: engine.predict_salary(**SAMPLE_PROFILE), args.iterations))
+
+    # Backend 'flat': cùng mô hình nhưng duyệt các cây đã làm phẳng bằng NumPy
+    flat_engine = SalaryPredictionEngine(inference_backend='flat')
+    flat_engine.load_or_train()
+    report("predict_salary (flat)", measure(lambda: flat_engine.predict_salary(**SAMPLE_PROFILE), args.iterations))
+
+    # Grid mode: trả lời bằng nội suy trên lưới tính sẵn
+    grid_engine = SalaryPredictionEngine(use_grid=True)
+    grid_engine.load_or_train()
+    report("predict_salary (grid)", measure(lambda: grid_engine.predict_salary(**SAMPLE_PROFILE), args.iterations))
+
+    # Kiểm tra kết quả của hai backend trùng nhau (trong sai số dấu phẩy động) trên toàn bộ dữ liệu
+    X, _ = engine.load_and_prepare_data()
+    expected = engine.model.predict(X)
+    actual = flat_engine.flat_forest.predict(X)
+    print(f"Sai lệch lớn nhất giữa sklearn và flat trên {len(X)} dòng: {np.max(np.abs(expected - actual)):.6f} VND")
+    report(f"Dự đoán theo lô {len(X)} dòng (sklearn)", measure(lambda: engine.model.predict(X), 50))
+    report(f"Dự đoán theo lô {len(X)} dòng (flat)", measure(lambda: flat_engine.flat_forest.predict(X), 50))
+
+
+if __name__ == '__main__':
+    main()
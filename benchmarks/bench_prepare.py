@@ -0,0 +1,103 @@
+# bench_prepare.py - Đo bộ nhớ đỉnh (peak RSS) và thời gian của bước chuẩn bị dữ liệu huấn luyện
+#
+# So sánh hai cách trên cùng một bộ dữ liệu tổng hợp, mỗi cách chạy trong một tiến trình riêng
+# (peak RSS của tiến trình không thể đặt lại):
+# - legacy: cách cũ (cột chuỗi object, cờ int64, thêm 5 cột *_encoded int64 vào DataFrame, cắt X rồi ép float32)
+# - compact: cách hiện tại (cột category + int8, mã hóa thẳng vào một ma trận float32 duy nhất)
+# Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.bench_prepare --rows 1000000 5000000
+
+import argparse # Đọc tham số dòng lệnh
+import json
+import resource # Peak RSS của tiến trình (ru_maxrss)
+import subprocess # Mỗi cách đo trong một tiến trình mới
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+import Create_data
+from Predict_engine import SalaryPredictionEngine, CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from Training_pipeline import GeneratedChunks
+
+MODES = ('legacy', 'compact')
+
+
+def legacy_chunk(df):
+    """Chuyển một khối về dạng của bộ sinh dữ liệu cũ: cột phân loại là mảng chuỗi object, cột số nguyên int64."""
+    columns = {}
+    for col in Create_data.COLUMNS:
+        if col in CATEGORICAL_COLUMNS:
+            columns[col] = np.asarray(df[col], dtype=object)
+        elif df[col].dtype == np.int8:
+            columns[col] = df[col].to_numpy(dtype=np.int64)
+        else:
+            columns[col] = df[col].to_numpy()
+    return pd.DataFrame(columns, columns=Create_data.COLUMNS)
+
+
+def prepare_legacy(n, seed):
+    """Chuẩn bị dữ liệu như load_and_prepare_data + prepare_training_data trước đây."""
+    df = pd.concat([legacy_chunk(chunk) for chunk in Create_data.iter_dataset_chunks(n, seed)], ignore_index=True)
+    for col in CATEGORICAL_COLUMNS:
+        df[f"{col}_encoded"] = LabelEncoder().fit_transform(df[col])
+    X, y = df[FEATURE_COLUMNS], df["Lương"]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_train.to_numpy(dtype=np.float32), X_test.to_numpy(dtype=np.float32)
+
+
+def prepare_compact(n, seed):
+    """Chuẩn bị dữ liệu bằng prepare_training_data hiện tại."""
+    engine = SalaryPredictionEngine(data_source=GeneratedChunks(n, seed))
+    _, X_train, X_test, _, _ = engine.prepare_training_data()
+    return X_train, X_test
+
+
+def measure(mode, n, seed):
+    """Chạy một cách chuẩn bị dữ liệu trong tiến trình hiện tại; trả về dict kết quả."""
+    start = time.perf_counter()
+    X_train, X_test = (prepare_legacy if mode == 'legacy' else prepare_compact)(n, seed)
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'rows': n,
+        'seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # Linux: KB
+        'matrix_mb': (X_train.nbytes + X_test.nbytes) / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo peak RSS của bước chuẩn bị dữ liệu (cách cũ so với hiện tại)")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--seed', type=int, default=Create_data.DEFAULT_SEED)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS) # Dùng nội bộ: đo trong tiến trình con
+    parser.add_argument('--output', help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.rows[0], args.seed)))
+        return
+
+    results = []
+    print(f"{'Số dòng':>12} {'Cách':>8} {'Thời gian (s)':>14} {'Peak RSS (MB)':>14} {'Ma trận (MB)':>13}")
+    for n in args.rows:
+        for mode in MODES:
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_prepare', '--mode', mode,
+                                     '--rows', str(n), '--seed', str(args.seed)],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{n:>12,} {mode:>8} {result['seconds']:>14.2f} {result['peak_rss_mb']:>14.0f} {result['matrix_mb']:>13.0f}")
+        legacy, compact = results[-2], results[-1]
+        print(f"{'':>12} Peak RSS giảm {1 - compact['peak_rss_mb'] / legacy['peak_rss_mb']:.0%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# bench_train.py - Đo thời gian huấn luyện theo số dòng dữ liệu và n_jobs (độ tăng tốc khi song song hóa)
+#
+# Dữ liệu lớn hơn --out-of-core-rows được sinh và huấn luyện theo từng khối (không giữ toàn bộ trong RAM).
+# Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.bench_train --rows 100000 1000000 --n-jobs 1 2 4 8
+#     python -m benchmarks.bench_train --rows 50000000 --n-jobs 1 32 --estimator hist_gradient_boosting
+
+import argparse # Đọc tham số dòng lệnh
+import json
+import time # Đo thời gian bằng đồng hồ đơn điệu (perf_counter)
+from dataclasses import replace
+
+from sklearn.metrics import mean_absolute_error
+
+from Training_pipeline import ESTIMATORS, TrainingConfig, GeneratedChunks, fit_chunked, encode_frame, fit_category_encoders, TEST_SIZE
+
+
+def time_fit(config, n_rows, seed=42):
+    """Huấn luyện một lần với config trên n_rows dòng; trả về (giây, MAE trên tập kiểm tra)."""
+    source = GeneratedChunks(n_rows, seed)
+    start = time.perf_counter()
+    if n_rows > config.out_of_core_rows:
+        model, _, X_test, y_test = fit_chunked(source, config)
+    else:
+        df = source.load_all()
+        X, y = encode_frame(df, fit_category_encoders(), config.dtype)
+        n_test = int(len(X) * TEST_SIZE)
+        X_test, y_test = X[:n_test], y[:n_test]
+        model = config.fit(X[n_test:], y[n_test:])
+    elapsed = time.perf_counter() - start
+    return elapsed, mean_absolute_error(y_test, model.predict(X_test))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo thời gian huấn luyện theo số dòng và n_jobs")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--n-jobs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--estimator', choices=ESTIMATORS, default=None)
+    parser.add_argument('--n-estimators', type=int, default=None)
+    parser.add_argument('--max-depth', type=int, default=None, help="Giới hạn độ sâu cây (giảm bộ nhớ mô hình)")
+    parser.add_argument('--max-samples', type=float, default=None, help="Tỷ lệ mẫu bootstrap cho mỗi cây")
+    parser.add_argument('--out-of-core-rows', type=int, default=None)
+    parser.add_argument('--output', help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    # Cấu hình gốc đọc từ biến môi trường TRAIN_*, các tham số dòng lệnh ghi đè lên
+    overrides = {key: value for key, value in {
+        'estimator': args.estimator, 'n_estimators': args.n_estimators, 'max_depth': args.max_depth,
+        'max_samples': args.max_samples, 'out_of_core_rows': args.out_of_core_rows,
+    }.items() if value is not None}
+    base = replace(TrainingConfig.from_env(), **overrides)
+    print(f"Cấu hình: {base.to_dict()}")
+
+    results = []
+    print(f"{'Số dòng':>12} {'n_jobs':>7} {'Thời gian (s)':>14} {'Tăng tốc':>9} {'MAE':>14}")
+    for n_rows in args.rows:
+        baseline = None
+        for n_jobs in args.n_jobs:
+            elapsed, mae = time_fit(replace(base, n_jobs=n_jobs), n_rows)
+            baseline = baseline or elapsed
+            results.append({'rows': n_rows, 'n_jobs': n_jobs, 'seconds': elapsed, 'speedup': baseline / elapsed, 'mae': mae})
+            print(f"{n_rows:>12,} {n_jobs:>7} {elapsed:>14.2f} {baseline / elapsed:>8.2f}x {mae:>14,.0f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': base.to_dict(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# load_test.py - Đo thông lượng /predict của gunicorn theo số lượng worker
+#
+# Khởi động gunicorn (gunicorn.conf.py, wsgi:app) với từng số worker, chờ /readyz, rồi nhiều tiến trình client
+# gửi /predict liên tục (kết nối keep-alive) trong một khoảng thời gian. Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.load_test --workers 1 2 4 --clients 16 --duration 10
+
+import argparse # Đọc tham số dòng lệnh
+import http.client # Client HTTP đơn giản, giữ kết nối giữa các yêu cầu
+import json
+import multiprocessing # Mỗi client chạy trong một tiến trình riêng để không bị giới hạn bởi GIL
+import os
+import random
+import socket
+import subprocess # Khởi động/dừng gunicorn
+import sys
+import time
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_PROFILE = {
+    'experience': 5, 'education': 'ĐH', 'certificate': 1, 'night_shift': 0, 'overtime': 1,
+    'position': 'Tổ trưởng', 'contract_type': 'Chính thức', 'special_skills': 1,
+    'work_area': 'Vùng I (TP.HCM, Hà Nội)', 'client_type': 'VIP', 'allowances_percentage': 0.1,
+}
+
+
+def free_port():
+    """Tìm một cổng TCP còn trống trên máy."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=120):
+    """Chờ đến khi /readyz trả về 200 (mô hình đã được nạp)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/readyz')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def client_loop(port, duration, path, seed):
+    """Gửi yêu cầu liên tục trong duration giây; trả về danh sách độ trễ (giây) và số lỗi."""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        # Thay đổi kinh nghiệm/phụ cấp để không đo nhầm bộ nhớ đệm kết quả dự đoán
+        profile = dict(BASE_PROFILE, experience=rng.randint(0, 10), allowances_percentage=round(rng.uniform(0, 0.3), 4))
+        body = json.dumps(profile)
+        start = time.perf_counter()
+        try:
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_scenario(workers, threads, clients, duration, path, extra_env):
+    """Chạy một kịch bản với số worker cho trước; trả về dict kết quả."""
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               BIND=f'127.0.0.1:{port}', LOG_SAMPLE_RATE='0', **extra_env)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(port):
+            raise RuntimeError("gunicorn không sẵn sàng")
+        with multiprocessing.Pool(clients) as pool:
+            outcomes = pool.starmap(client_loop, [(port, duration, path, seed) for seed in range(clients)])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.array([lat for result, _ in outcomes for lat in result]) * 1000
+    errors = sum(err for _, err in outcomes)
+    return {
+        'workers': workers,
+        'threads': threads,
+        'clients': clients,
+        'requests': int(latencies.size),
+        'errors': errors,
+        'throughput_rps': latencies.size / duration,
+        'p50_ms': float(np.percentile(latencies, 50)) if latencies.size else None,
+        'p99_ms': float(np.percentile(latencies, 99)) if latencies.size else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo thông lượng /predict theo số worker của gunicorn")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4, help="Số luồng mỗi worker")
+    parser.add_argument('--clients', type=int, default=16, help="Số tiến trình client đồng thời")
+    parser.add_argument('--duration', type=float, default=10, help="Thời gian đo mỗi kịch bản (giây)")
+    parser.add_argument('--path', default='/predict')
+    parser.add_argument('--backend', default=None, help="PREDICT_BACKEND cho server (sklearn/flat)")
+    parser.add_argument('--output', help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    # Tắt bộ nhớ đệm kết quả dự đoán để đo chi phí dự đoán thật
+    extra_env = {'PREDICTION_CACHE_SIZE': '0'}
+    if args.backend:
+        extra_env['PREDICT_BACKEND'] = args.backend
+
+    results = []
+    print(f"{'Worker':>7} {'Req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'Lỗi':>6}")
+    for workers in args.workers:
+        result = run_scenario(workers, args.threads, args.clients, args.duration, args.path, extra_env)
+        results.append(result)
+        print(f"{workers:>7} {result['throughput_rps']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['errors']:>6}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+# suite.py - Bộ benchmark lặp lại được cho toàn bộ ứng dụng, ghi kết quả JSON và so sánh giữa các commit
+#
+# Các kịch bản:
+# - generate: thời gian sinh dữ liệu (generate_dataset) với 1k, 100k, 1M dòng
+# - train:    thời gian huấn luyện (và MAE) theo số dòng và n_jobs
+# - predict:  độ trễ predict_salary (một dòng) và predict_batch (theo lô), đã tắt bộ nhớ đệm kết quả
+# - http:     thông lượng và độ trễ POST /predict qua Flask test client với nhiều luồng gửi yêu cầu đồng thời
+#
+# Mỗi chỉ số có tên cố định (kèm tham số, ví dụ "train.rows=100000.n_jobs=1.seconds") nên các file kết quả
+# của những commit khác nhau so sánh được với nhau. Chạy từ thư mục gốc của dự án:
+#     python -m benchmarks.suite run --output before.json
+#     python -m benchmarks.suite run --quick --scenarios predict http --baseline before.json --threshold 0.1
+#     python -m benchmarks.suite compare before.json after.json --threshold 0.1
+# Lệnh run (khi có --baseline) và compare trả về mã thoát 1 nếu có chỉ số chậm đi quá ngưỡng.
+
+import os
+
+# Đo chi phí dự đoán thật (không trả lời từ bộ nhớ đệm) và không ghi log từng yêu cầu.
+# Phải đặt trước khi import các module của dự án (đọc cấu hình lúc import)
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+
+import argparse # Đọc tham số dòng lệnh
+import concurrent.futures # Các luồng gửi yêu cầu đồng thời (kịch bản http)
+import datetime
+import json
+import platform
+import subprocess # Lấy mã commit hiện tại
+import sys
+import time # Đo thời gian bằng đồng hồ đơn điệu (perf_counter)
+from dataclasses import replace
+import numpy as np
+import sklearn
+
+import Create_data
+from benchmarks.bench_predict import SAMPLE_PROFILE, measure
+from benchmarks.bench_train import time_fit
+from Training_pipeline import TrainingConfig
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+
+# Ngưỡng mặc định: chỉ số xấu đi hơn 10% được coi là chậm đi (regression)
+DEFAULT_THRESHOLD = 0.10
+
+# Kích thước của từng kịch bản: đầy đủ và rút gọn (--quick, để kiểm tra nhanh trước khi commit)
+SIZES = {
+    'full': {
+        'generate_rows': [1_000, 100_000, 1_000_000],
+        'train_rows': [10_000, 100_000],
+        'train_n_jobs': [1, -1],
+        'train_n_estimators': 100,
+        'predict_iterations': 2000,
+        'batch_rows': 1000,
+        'http_seconds': 5.0,
+        'http_clients': 4,
+    },
+    'quick': {
+        'generate_rows': [1_000, 100_000],
+        'train_rows': [10_000],
+        'train_n_jobs': [1, -1],
+        'train_n_estimators': 20,
+        'predict_iterations': 500,
+        'batch_rows': 1000,
+        'http_seconds': 2.0,
+        'http_clients': 4,
+    },
+}
+
+
+def metric(value, unit, better='lower'):
+    """Một chỉ số: giá trị, đơn vị và chiều tốt hơn ('lower' hoặc 'higher')."""
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+def best_of(func, repeats=3, min_seconds=1.0):
+    """
+    Thời gian nhỏ nhất (giây) của một lần gọi func() (ít nhiễu hơn trung bình). Gọi ít nhất repeats lần
+    và tiếp tục đến khi tổng thời gian đạt min_seconds, để các phép đo rất ngắn cũng có đủ mẫu.
+    """
+    func() # Khởi động (warm-up) trước khi đo
+    timings = []
+    while len(timings) < repeats or sum(timings) < min_seconds:
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def scenario_generate(sizes):
+    """Thời gian sinh bộ dữ liệu tổng hợp với các kích thước khác nhau (seed cố định)."""
+    results = {}
+    for n in sizes['generate_rows']:
+        seconds = best_of(lambda: Create_data.generate_dataset(n, seed=42))
+        results[f"generate.rows={n}.seconds"] = metric(seconds, 's')
+    return results
+
+
+def scenario_train(sizes):
+    """Thời gian huấn luyện và MAE trên tập kiểm tra theo số dòng và n_jobs (cấu hình TRAIN_* hiện tại)."""
+    results = {}
+    for n in sizes['train_rows']:
+        for n_jobs in sizes['train_n_jobs']:
+            config = replace(TrainingConfig.from_env(), n_jobs=n_jobs, n_estimators=sizes['train_n_estimators'])
+            seconds, mae = time_fit(config, n)
+            results[f"train.rows={n}.n_jobs={n_jobs}.seconds"] = metric(seconds, 's')
+            results[f"train.rows={n}.n_jobs={n_jobs}.mae"] = metric(mae, 'VND')
+    return results
+
+
+def _varied_profiles(count):
+    """Các hồ sơ khác nhau (đổi kinh nghiệm/phụ cấp) để không đo nhầm bộ nhớ đệm ở bất kỳ tầng nào."""
+    rng = np.random.default_rng(0)
+    return [dict(SAMPLE_PROFILE, experience=int(rng.integers(0, 11)),
+                 allowances_percentage=round(float(rng.uniform(0, 0.3)), 4)) for _ in range(count)]
+
+
+def scenario_predict(sizes):
+    """Độ trễ dự đoán một dòng (predict_salary) và chi phí mỗi dòng khi dự đoán theo lô (predict_batch)."""
+    from Predict_engine import SalaryPredictionEngine
+    engine = SalaryPredictionEngine()
+    if not engine.load_or_train():
+        raise RuntimeError("Không thể tải hoặc huấn luyện mô hình")
+
+    profiles = _varied_profiles(256)
+    counter = iter(range(10**9))
+    p50, p99, mean = measure(lambda: engine.predict_salary(**profiles[next(counter) % len(profiles)]),
+                             sizes['predict_iterations'])
+    results = {
+        'predict.single.p50_us': metric(p50, 'µs'),
+        'predict.single.p99_us': metric(p99, 'µs'),
+        'predict.single.mean_us': metric(mean, 'µs'),
+    }
+
+    records = _varied_profiles(sizes['batch_rows'])
+    seconds = best_of(lambda: engine.predict_batch(records))
+    results[f"predict.batch.rows={len(records)}.us_per_row"] = metric(seconds / len(records) * 1e6, 'µs')
+    return results
+
+
+def scenario_http(sizes):
+    """Thông lượng và độ trễ POST /predict (Flask test client, nhiều luồng gửi yêu cầu trong một khoảng thời gian)."""
+    from Main import app, init_model
+    if not init_model():
+        raise RuntimeError("Không thể tải hoặc huấn luyện mô hình")
+    profiles = _varied_profiles(256)
+
+    def client_loop(seed, deadline):
+        client = app.test_client()
+        latencies, errors, i = [], 0, seed
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/predict', json=profiles[i % len(profiles)])
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+            i += 1
+        return latencies, errors
+
+    client_loop(0, time.perf_counter() + 0.2) # Khởi động
+    clients, duration = sizes['http_clients'], sizes['http_seconds']
+    deadline = time.perf_counter() + duration
+    with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+        outcomes = list(pool.map(client_loop, range(clients), [deadline] * clients))
+
+    latencies = np.array([lat for result, _ in outcomes for lat in result]) * 1000
+    errors = sum(err for _, err in outcomes)
+    return {
+        f"http.predict.clients={clients}.throughput_rps": metric(latencies.size / duration, 'req/s', better='higher'),
+        f"http.predict.clients={clients}.p50_ms": metric(np.percentile(latencies, 50), 'ms'),
+        f"http.predict.clients={clients}.p99_ms": metric(np.percentile(latencies, 99), 'ms'),
+        f"http.predict.clients={clients}.errors": metric(errors, 'count'),
+    }
+
+
+SCENARIOS = {
+    'generate': scenario_generate,
+    'train': scenario_train,
+    'predict': scenario_predict,
+    'http': scenario_http,
+}
+
+
+def environment_info():
+    """Thông tin để đối chiếu các lần chạy: commit, phiên bản thư viện, máy."""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run(scenarios, quick=False):
+    """Chạy các kịch bản theo thứ tự; trả về dict {'meta': ..., 'results': {tên chỉ số: chỉ số}}."""
+    sizes = SIZES['quick' if quick else 'full']
+    results = {}
+    for name in scenarios:
+        start = time.perf_counter()
+        scenario_results = SCENARIOS[name](sizes)
+        results.update(scenario_results)
+        print(f"[{name}] xong sau {time.perf_counter() - start:.1f}s")
+        for key, value in scenario_results.items():
+            print(f"    {key:<48} {value['value']:>14,.3f} {value['unit']}")
+    return {'meta': dict(environment_info(), scenarios=list(scenarios), quick=quick), 'results': results}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    So sánh các chỉ số có trong cả hai lần chạy. Một chỉ số bị coi là chậm đi (regression) khi xấu đi
+    hơn threshold (tỷ lệ, 0.1 = 10%) theo chiều 'better' của nó. Trả về danh sách tên các chỉ số chậm đi.
+    """
+    regressions = []
+    print(f"{'Chỉ số':<48} {'Trước':>14} {'Sau':>14} {'Thay đổi':>9}")
+    for key in sorted(set(baseline['results']) & set(current['results'])):
+        before, after = baseline['results'][key], current['results'][key]
+        if before['value'] == 0:
+            change = 0.0 if after['value'] == 0 else float('inf')
+        else:
+            change = (after['value'] - before['value']) / abs(before['value'])
+        worse = change if after.get('better', 'lower') == 'lower' else -change
+        flag = ''
+        if worse > threshold:
+            regressions.append(key)
+            flag = '  <-- chậm đi'
+        print(f"{key:<48} {before['value']:>14,.3f} {after['value']:>14,.3f} {change:>+8.1%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} chỉ số xấu đi quá {threshold:.0%}: {', '.join(regressions)}")
+    else:
+        print(f"Không có chỉ số nào xấu đi quá {threshold:.0%}.")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bộ benchmark: sinh dữ liệu, huấn luyện, dự đoán, HTTP")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Chạy các kịch bản và ghi kết quả JSON")
+    run_parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    run_parser.add_argument('--quick', action='store_true', help="Kích thước rút gọn (chạy nhanh)")
+    run_parser.add_argument('--output', help="File kết quả (mặc định: benchmarks/results/<commit>-<thời điểm>.json)")
+    run_parser.add_argument('--baseline', help="File kết quả để so sánh sau khi chạy")
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = subparsers.add_parser('compare', help="So sánh hai file kết quả")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    report = run(args.scenarios, quick=args.quick)
+    output = args.output
+    if not output:
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{(report['meta']['commit'] or 'unknown')[:10]}-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Đã ghi kết quả: {output}")
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# gunicorn.conf.py - Cấu hình gunicorn cho chế độ production
+#
+# Chạy: gunicorn -c gunicorn.conf.py wsgi:app
+# Các giá trị có thể thay đổi qua biến môi trường: BIND, WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT
+
+import gc # Đóng băng các đối tượng đã tạo trước khi fork để giữ các trang nhớ dùng chung
+import multiprocessing # Đếm số lõi CPU để chọn số worker mặc định
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Số tiến trình worker (mặc định: số lõi CPU) và số luồng mỗi worker
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# Nạp ứng dụng (và mô hình) một lần trong master trước khi fork các worker
+preload_app = True
+
+
+def when_ready(server):
+    # Ứng dụng đã được nạp trong master. gc.freeze() chuyển mọi đối tượng hiện có sang thế hệ vĩnh viễn,
+    # để bộ thu gom rác trong worker không chạm (ghi) vào header của chúng và làm mất tính chia sẻ copy-on-write
+    gc.freeze()
+    server.log.info("Mô hình đã được nạp trong master; bắt đầu fork %s worker x %s luồng", workers, threads)
+
+
+def post_worker_init(worker):
+    # Luồng nền của bộ lập lịch không tồn tại sau fork: khởi động trong từng worker (khi RETRAIN_ENABLED=1).
+    # Chỉ một worker được bầu (khóa file <kho dữ liệu>.scheduler.lock) chạy huấn luyện lại và pool tiến trình con;
+    # các worker còn lại chỉ tự nạp gói mô hình mới khi phát hiện file đã bị thay
+    from Main import start_retrain_scheduler
+    start_retrain_scheduler()
@@ -0,0 +1,244 @@
+// app.js - Logic phía trình duyệt của trang dự đoán lương (gọi các API của backend)
+
+// Hàm định dạng tiền tệ
+const formatCurrency = (amount) => {
+    if (typeof amount !== 'number') return 'N/A'; // Handle non-numeric input
+    return Number(amount).toLocaleString('vi-VN', { style: 'currency', currency: 'VND' });
+};
+
+// Dữ liệu thị trường giả định cho mục đích minh họa
+// Dữ liệu này chỉ mang tính chất tham khảo và được đơn giản hóa
+const marketData = {
+    "Vùng I (TP.HCM, Hà Nội)": {
+        "THCS": { "0-2 năm": 4000000, "3-5 năm": 5000000, "6-10 năm": 6000000 },
+        "THPT": { "0-2 năm": 5000000, "3-5 năm": 6500000, "6-10 năm": 8000000 },
+        "CĐ": { "0-2 năm": 6500000, "3-5 năm": 8500000, "6-10 năm": 10500000 },
+        "ĐH": { "0-2 năm": 8000000, "3-5 năm": 11000000, "6-10 năm": 15000000 }
+    },
+    "Vùng II (TP. Đà Nẵng, Hải Phòng)": {
+        "THCS": { "0-2 năm": 3800000, "3-5 năm": 4800000, "6-10 năm": 5800000 },
+        "THPT": { "0-2 năm": 4800000, "3-5 năm": 6200000, "6-10 năm": 7700000 },
+        "CĐ": { "0-2 năm": 6000000, "3-5 năm": 8000000, "6-10 năm": 10000000 },
+        "ĐH": { "0-2 năm": 7500000, "3-5 năm": 10500000, "6-10 năm": 14000000 }
+    },
+    "Vùng III (TP. Buôn Ma Thuột, Huế)": {
+        "THCS": { "0-2 năm": 3500000, "3-5 năm": 4500000, "6-10 năm": 5500000 },
+        "THPT": { "0-2 năm": 4500000, "3-5 năm": 5800000, "6-10 năm": 7200000 },
+        "CĐ": { "0-2 năm": 5700000, "3-5 năm": 7500000, "6-10 năm": 9500000 },
+        "ĐH": { "0-2 năm": 7000000, "3-5 năm": 9500000, "6-10 năm": 13000000 }
+    },
+    "Vùng IV (Nông thôn)": {
+        "THCS": { "0-2 năm": 3200000, "3-5 năm": 4200000, "6-10 năm": 5200000 },
+        "THPT": { "0-2 năm": 4200000, "3-5 năm": 5500000, "6-10 năm": 6800000 },
+        "CĐ": { "0-2 năm": 5300000, "3-5 năm": 7000000, "6-10 năm": 9000000 },
+        "ĐH": { "0-2 năm": 6500000, "3-5 năm": 9000000, "6-10 năm": 12000000 }
+    }
+};
+
+function getExperienceRange(experience) {
+    if (experience >= 0 && experience <= 2) return "0-2 năm";
+    if (experience >= 3 && experience <= 5) return "3-5 năm";
+    if (experience >= 6 && experience <= 10) return "6-10 năm";
+    return "Ngoài phạm vi"; // For experience > 10
+}
+
+// Hàm hiển thị bảng so sánh thị trường
+function displayMarketComparison(inputData, predicted_salary) {
+    const marketTableBody = document.getElementById('marketTableBody');
+    const marketComparisonNote = document.getElementById('marketComparisonNote');
+    marketTableBody.innerHTML = ''; // Clear previous results
+
+    const selectedArea = inputData.work_area;
+    const selectedEdu = inputData.education;
+    const selectedExpRange = getExperienceRange(inputData.experience);
+
+    let foundMarketSalary = null;
+
+    if (marketData[selectedArea] && marketData[selectedArea][selectedEdu] && marketData[selectedArea][selectedEdu][selectedExpRange]) {
+        foundMarketSalary = marketData[selectedArea][selectedEdu][selectedExpRange];
+
+        const row = `
+            <tr class="hover:bg-gray-50">
+                <td class="py-2 px-4 text-gray-700">${selectedArea}</td>
+                <td class="py-2 px-4 text-gray-700">${selectedEdu}</td>
+                <td class="py-2 px-4 text-gray-700">${selectedExpRange}</td>
+                <td class="py-2 px-4 text-gray-900 font-bold">${formatCurrency(foundMarketSalary)}</td>
+            </tr>
+        `;
+        marketTableBody.innerHTML = row;
+    } else {
+        marketTableBody.innerHTML = `<tr><td colspan="4" class="py-2 px-4 text-center text-gray-500">Không tìm thấy dữ liệu thị trường tham khảo cho các tiêu chí đã chọn.</td></tr>`;
+    }
+
+    // So sánh với mức lương dự đoán
+    if (foundMarketSalary !== null && predicted_salary !== null) {
+        const diff = predicted_salary - foundMarketSalary;
+        const percentageDiff = (diff / foundMarketSalary) * 100;
+        let comparisonText = '';
+        if (diff > 0) {
+            comparisonText = `Mức lương dự đoán của bạn (${formatCurrency(predicted_salary)}) cao hơn thị trường khoảng ${percentageDiff.toFixed(1)}%.`;
+            marketComparisonNote.className = 'mt-4 text-green-600 text-sm italic font-semibold';
+        } else if (diff < 0) {
+            comparisonText = `Mức lương dự đoán của bạn (${formatCurrency(predicted_salary)}) thấp hơn thị trường khoảng ${Math.abs(percentageDiff).toFixed(1)}%.`;
+            marketComparisonNote.className = 'mt-4 text-red-600 text-sm italic font-semibold';
+        } else {
+            comparisonText = `Mức lương dự đoán của bạn (${formatCurrency(predicted_salary)}) tương đương với thị trường.`;
+            marketComparisonNote.className = 'mt-4 text-blue-600 text-sm italic font-semibold';
+        }
+        marketComparisonNote.textContent = comparisonText;
+    } else {
+        marketComparisonNote.textContent = 'Không thể so sánh với thị trường do thiếu dữ liệu hoặc lỗi.';
+        marketComparisonNote.className = 'mt-4 text-gray-600 text-sm italic';
+    }
+}
+
+
+// Hàm hiển thị kết quả dự đoán thành công
+function displayResult(data) {
+    const resultDiv = document.getElementById('result');
+    const contentDiv = document.getElementById('resultContent');
+
+    contentDiv.innerHTML = `
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Kinh nghiệm:</span>
+            <span class="font-medium text-green-800">${data.experience} năm</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Trình độ:</span>
+            <span class="font-medium text-green-800">${data.education}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Chứng chỉ:</span>
+            <span class="font-medium text-green-800">${data.certificate ? '✅ Có' : '❌ Không'}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Ca đêm:</span>
+            <span class="font-medium text-green-800">${data.night_shift ? '✅ Có' : '❌ Không'}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Làm thêm:</span>
+            <span class="font-medium text-green-800">${data.overtime ? '✅ Có' : '❌ Không'}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Chức vụ:</span>
+            <span class="font-medium text-green-800">${data.position}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Loại hợp đồng:</span>
+            <span class="font-medium text-green-800">${data.contract_type}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Kỹ năng đặc thù:</span>
+            <span class="font-medium text-green-800">${data.special_skills ? '✅ Có' : '❌ Không'}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Khu vực làm việc:</span>
+            <span class="font-medium text-green-800">${data.work_area}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Loại hình mục tiêu:</span>
+            <span class="font-medium text-green-800">${data.client_type}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-green-200">
+            <span class="text-gray-700">🔹 Tỷ lệ phụ cấp/phúc lợi:</span>
+            <span class="font-medium text-green-800">${(data.allowances_percentage * 100).toFixed(1)}%</span>
+        </div>
+        <div class="flex justify-between items-center py-2 border-b border-purple-200">
+            <span class="text-gray-700 font-semibold">✨ Điều chỉnh AI:</span>
+            <span class="font-medium text-purple-700">${(data.ai_adjustment_percentage * 100).toFixed(1)}% (${data.ai_insight_text})</span>
+        </div>
+        <div class="flex justify-between items-center py-2 pt-4 text-lg font-bold text-green-700">
+            <span>💰 Lương dự đoán/tháng:</span>
+            <span>${formatCurrency(data.predicted_salary)}</span>
+        </div>
+        <div class="flex justify-between items-center py-2 text-lg font-bold text-green-700">
+            <span>💰 Lương dự đoán/năm:</span>
+            <span>${formatCurrency(data.predicted_salary_year)}</span>
+        </div>
+    `;
+
+    resultDiv.classList.remove('hidden'); // Hiển thị khối kết quả
+    resultDiv.classList.remove('bg-red-50', 'border-red-500'); // Đảm bảo không có styling lỗi
+    resultDiv.classList.add('bg-green-50', 'border-green-500'); // Thêm styling thành công
+
+    // Gọi hàm hiển thị so sánh thị trường
+    displayMarketComparison(data, data.predicted_salary);
+}
+
+// Hàm hiển thị thông báo lỗi
+function displayError(error) {
+    const resultDiv = document.getElementById('result');
+    const contentDiv = document.getElementById('resultContent');
+
+    contentDiv.innerHTML = `<p class="text-red-700 font-semibold text-lg"><strong>❌ Lỗi:</strong> ${error}</p>`;
+    resultDiv.classList.remove('hidden'); // Hiển thị khối kết quả (với nội dung lỗi)
+    resultDiv.classList.remove('bg-green-50', 'border-green-500'); // Xóa styling thành công
+    resultDiv.classList.add('bg-red-50', 'border-red-500'); // Thêm styling lỗi
+
+    // Ẩn bảng so sánh thị trường khi có lỗi
+    document.querySelector('.market-comparison').classList.add('hidden');
+}
+
+document.getElementById('predictionForm').addEventListener('submit', async function(e) {
+    e.preventDefault(); // Ngăn chặn hành vi gửi form mặc định
+
+    const formData = new FormData(this);
+    const inputData = {
+        experience: parseFloat(formData.get('experience')),
+        education: formData.get('education'),
+        certificate: formData.get('certificate') ? 1 : 0,
+        night_shift: formData.get('night_shift') ? 1 : 0,
+        overtime: formData.get('overtime') ? 1 : 0,
+        position: formData.get('position'),
+        contract_type: formData.get('contract_type'),
+        special_skills: formData.get('special_skills') ? 1 : 0,
+        work_area: formData.get('work_area'),
+        client_type: formData.get('client_type'),
+        allowances_percentage: parseFloat(formData.get('allowances_percentage')) / 100,
+        ai_prompt: formData.get('ai_prompt') || '' // Lấy prompt AI hoặc chuỗi rỗng nếu không có
+    };
+
+    // Hiển thị trạng thái loading và ẩn kết quả/lỗi trước đó
+    const loadingDiv = document.getElementById('loading');
+    const loadingMessage = document.getElementById('loadingMessage');
+    loadingDiv.classList.remove('hidden');
+    loadingMessage.textContent = 'Đang dự đoán lương cơ bản...'; // Set initial loading message
+
+    document.getElementById('result').classList.add('hidden');
+    document.getElementById('result').classList.remove('error'); // Xóa lớp error nếu có
+    document.querySelector('.market-comparison').classList.add('hidden'); // Ẩn bảng thị trường
+
+    try {
+        // Gửi toàn bộ dữ liệu đến Flask backend. Nếu có ai_prompt, server vừa dự đoán lương bằng ML
+        // vừa gọi Gemini AI (song song) rồi trả về lương đã điều chỉnh; nếu không, chỉ dự đoán bằng ML
+        const hasAiPrompt = inputData.ai_prompt.trim() !== '';
+        if (hasAiPrompt) {
+            loadingMessage.textContent = 'Đang dự đoán và điều chỉnh lương bằng AI...';
+        }
+        const response = await fetch(hasAiPrompt ? '/predict/ai-adjust' : '/predict', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(inputData)
+        });
+        const result = await response.json();
+
+        if (!response.ok || !result.success) {
+            throw new Error(result.error || 'Lỗi khi dự đoán lương.');
+        }
+
+        // Chuẩn bị dữ liệu để hiển thị
+        const displayData = {
+            ...inputData, // Giữ nguyên các input ban đầu
+            ai_adjustment_percentage: 0,
+            ai_insight_text: "Không có gợi ý AI nào được cung cấp.",
+            ...result.data
+        };
+        displayResult(displayData);
+
+    } catch (error) {
+        console.error("Error during prediction:", error); // Log detailed error
+        displayError('Lỗi: ' + error.message);
+    } finally {
+        loadingDiv.classList.add('hidden'); // Always hide loading indicator
+    }
+});
@@ -0,0 +1,19 @@
+// tailwind.config.js - Cấu hình Tailwind dùng chung cho bước build (Tailwind CLI, qua Build_assets.py)
+// và cho chế độ phát triển khi chưa build (Tailwind CDN biên dịch trong trình duyệt)
+const salaryTailwindConfig = {
+    // Các file có dùng lớp tiện ích (đường dẫn tính từ thư mục gốc của dự án, nơi Build_assets.py chạy Tailwind CLI)
+    content: ['./templates/**/*.html', './static/src/**/*.js'],
+    theme: {
+        extend: {
+            fontFamily: {
+                sans: ['Inter', 'sans-serif'], // Sử dụng font Inter hoặc sans-serif mặc định
+            },
+        }
+    }
+};
+
+if (typeof module !== 'undefined') {
+    module.exports = salaryTailwindConfig; // Tailwind CLI (Node.js)
+} else {
+    tailwind.config = salaryTailwindConfig; // Tailwind CDN (trình duyệt)
+}
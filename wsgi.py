@@ -0,0 +1,9 @@
+# wsgi.py - Điểm vào WSGI cho chế độ production
+#
+# Chạy: gunicorn -c gunicorn.conf.py wsgi:app
+# Với preload_app=True (gunicorn.conf.py), module này được import một lần trong tiến trình master:
+# mô hình được tải trước khi fork, nên các worker dùng chung bộ nhớ của mô hình (copy-on-write).
+
+from Main import create_app
+
+app = create_app()